@@ -0,0 +1,413 @@
+import numpy as np
+from collections.abc import Mapping
+from scipy.spatial.transform import Rotation as R
+import rotation_cache
+from fast_euler import euler_to_quaternion, quaternion_to_euler
+from instrumentation import stage
+from maneuver_report import write_maneuver_report
+from reference_frames import CONJUGATE, check_convention, check_direction, convert_quaternions
+
+
+def compute_single_rotation(initial_attitude, euler_angles, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                            degrees=True, rotation_direction='body_to_inertial'):
+    # An initial attitude that is already a Rotation is used as-is, so chained callers never round-trip through Euler
+    # With rotation_direction='inertial_to_body' inputs and results are all inertial-to-body rotations
+    with stage('from_euler'):
+        if not isinstance(initial_attitude, R):
+            initial_attitude = rotation_cache.from_euler(euler_sequence, initial_attitude, degrees)
+        commanded_rotation = rotation_cache.from_euler(euler_sequence, euler_angles, degrees)
+    check_direction(rotation_direction)
+    if rotation_direction == 'inertial_to_body':
+        initial_attitude, commanded_rotation = initial_attitude.inv(), commanded_rotation.inv()
+    if euler_angle_type == 'commanded_attitude':
+        final_attitude = commanded_rotation
+        with stage('compose'):
+            rotation = final_attitude * initial_attitude.inv()
+    elif euler_angle_type == 'commanded_maneuver':
+        rotation = commanded_rotation
+        with stage('compose'):
+            final_attitude = rotation * initial_attitude
+    else:
+        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+    if rotation_direction == 'inertial_to_body':
+        return rotation.inv(), final_attitude.inv()
+    return rotation, final_attitude
+
+
+class EulerAngleDictionary(Mapping):
+    # Read-only index-keyed view over an (N, 3) Euler array, kept so dictionary-style callers keep working
+    # The array comes from euler_source and is only requested on the first read
+    def __init__(self, indices, euler_source):
+        self._indices = indices
+        self._euler_source = euler_source
+        self._positions = None
+
+    def __getitem__(self, index):
+        if self._positions is None:
+            self._positions = {key: position for position, key in enumerate(self._indices)}
+        return self._euler_source()[self._positions[index]]
+
+    def __iter__(self):
+        return iter(self._indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def copy(self):
+        return dict(zip(self._indices, self._euler_source()))
+
+
+REPRESENTATIONS = ('quaternion', 'matrix', 'rotvec', 'mrp', 'euler')
+
+
+class ManeuverPlan:
+    # Array-backed plan: (N + 1, 4) attitude and (N, 4) maneuver quaternions, scalar-last as in scipy
+    # Attitude row 0 is the initial attitude and row i is the attitude after leg i
+    # Other representations (matrix, rotvec, MRP, Euler in any sequence/unit) come from attitude_as and maneuver_as,
+    # converted from the quaternions in one vectorized call on first use and cached per plan
+    # reference_frame and rotation_direction record the convention the quaternions (and so every Euler angle) are in
+    __slots__ = ('attitude_quaternions', 'maneuver_quaternions', 'indices', 'start_index', 'euler_angle_type',
+                 'euler_sequence', 'degrees', 'initial_attitude', 'reference_frame', 'rotation_direction',
+                 '_attitude_euler', '_maneuver_euler', '_representations')
+
+    def __init__(self, attitude_quaternions, maneuver_quaternions, indices=None, start_index=0,
+                 euler_angle_type='commanded_attitude', euler_sequence='ZYX', degrees=True, initial_attitude=None,
+                 dtype=None, reference_frame='ENU', rotation_direction='body_to_inertial'):
+        check_convention(reference_frame, rotation_direction)
+        attitude_quaternions = np.asarray(attitude_quaternions, dtype=dtype)
+        maneuver_quaternions = np.asarray(maneuver_quaternions, dtype=dtype)
+        if attitude_quaternions.ndim != 2 or attitude_quaternions.shape[1] != 4:
+            raise ValueError(f'attitude_quaternions must have shape (N + 1, 4), got {attitude_quaternions.shape}')
+        if maneuver_quaternions.ndim != 2 or maneuver_quaternions.shape[1] != 4:
+            raise ValueError(f'maneuver_quaternions must have shape (N, 4), got {maneuver_quaternions.shape}')
+        if len(attitude_quaternions) != len(maneuver_quaternions) + 1:
+            raise ValueError(f'{len(attitude_quaternions)} attitudes for {len(maneuver_quaternions)} maneuvers, '
+                             f'expected exactly one more attitude than maneuvers')
+        if indices is None:
+            indices = range(start_index + 1, start_index + len(maneuver_quaternions) + 1)
+        if len(indices) != len(maneuver_quaternions):
+            raise ValueError(f'{len(indices)} indices for {len(maneuver_quaternions)} maneuvers')
+
+        self.attitude_quaternions = attitude_quaternions
+        self.maneuver_quaternions = maneuver_quaternions
+        self.indices = indices
+        self.start_index = start_index
+        self.euler_angle_type = euler_angle_type
+        self.euler_sequence = euler_sequence
+        self.degrees = degrees
+        self.initial_attitude = initial_attitude
+        self.reference_frame = reference_frame
+        self.rotation_direction = rotation_direction
+        self._attitude_euler = None
+        self._maneuver_euler = None
+        self._representations = {}
+
+    @classmethod
+    def from_rotations(cls, initial_rotation, rotations, resulting_attitudes, dtype=np.float64, **plan_options):
+        attitude_quaternions = np.empty((len(rotations) + 1, 4), dtype=dtype)
+        attitude_quaternions[0] = initial_rotation.as_quat()
+        attitude_quaternions[1:] = resulting_attitudes.as_quat()
+        maneuver_quaternions = rotations.as_quat().astype(dtype, copy=False)
+        return cls(attitude_quaternions, maneuver_quaternions, **plan_options)
+
+    def __len__(self):
+        return len(self.maneuver_quaternions)
+
+    def __getitem__(self, legs):
+        # Slicing selects legs; the result shares memory with this plan
+        if not isinstance(legs, slice):
+            raise TypeError('ManeuverPlan only supports slicing, use maneuver_dictionary or attitude_dictionary for '
+                            'single legs')
+        start, stop, step = legs.indices(len(self))
+        if step != 1:
+            raise ValueError('ManeuverPlan slices must be contiguous')
+        stop = max(start, stop)
+        plan = ManeuverPlan(self.attitude_quaternions[start:stop + 1], self.maneuver_quaternions[start:stop],
+                            indices=self.indices[start:stop],
+                            start_index=self.indices[start - 1] if start > 0 else self.start_index,
+                            euler_angle_type=self.euler_angle_type, euler_sequence=self.euler_sequence,
+                            degrees=self.degrees, initial_attitude=self.initial_attitude if start == 0 else None,
+                            reference_frame=self.reference_frame, rotation_direction=self.rotation_direction)
+        if self._attitude_euler is not None:
+            plan._attitude_euler = self._attitude_euler[start:stop + 1]
+        if self._maneuver_euler is not None:
+            plan._maneuver_euler = self._maneuver_euler[start:stop]
+        for key, values in self._representations.items():
+            plan._representations[key] = values[start:stop + 1] if key[0] == 'attitude' else values[start:stop]
+        return plan
+
+    def in_frame(self, reference_frame=None, rotation_direction=None):
+        # The same plan re-expressed in another convention: each quaternion stack goes through one precomputed product
+        # and Euler angles are recomputed from the converted quaternions on first use
+        reference_frame = reference_frame or self.reference_frame
+        rotation_direction = rotation_direction or self.rotation_direction
+        convention = (self.reference_frame, self.rotation_direction, reference_frame, rotation_direction)
+        return ManeuverPlan(convert_quaternions(self.attitude_quaternions, *convention, 'attitude'),
+                            convert_quaternions(self.maneuver_quaternions, *convention, 'maneuver'),
+                            indices=self.indices, start_index=self.start_index,
+                            euler_angle_type=self.euler_angle_type, euler_sequence=self.euler_sequence,
+                            degrees=self.degrees, dtype=self.attitude_quaternions.dtype,
+                            reference_frame=reference_frame, rotation_direction=rotation_direction)
+
+    @property
+    def nbytes(self):
+        return self.attitude_quaternions.nbytes + self.maneuver_quaternions.nbytes
+
+    @property
+    def attitude_rotations(self):
+        return R.from_quat(self.attitude_quaternions)
+
+    @property
+    def maneuver_rotations(self):
+        return R.from_quat(self.maneuver_quaternions)
+
+    def attitude_euler(self):
+        # Row 0 is the initial attitude exactly as given, matching attitude_dictionary[0] of the original API
+        if self._attitude_euler is None:
+            with stage('as_euler'):
+                attitude_euler = quaternion_to_euler(self.euler_sequence, self.attitude_quaternions, self.degrees)
+            if self.initial_attitude is not None:
+                attitude_euler[0] = self.initial_attitude
+            self._attitude_euler = attitude_euler
+        return self._attitude_euler
+
+    def maneuver_euler(self):
+        if self._maneuver_euler is None:
+            with stage('as_euler'):
+                self._maneuver_euler = quaternion_to_euler(self.euler_sequence, self.maneuver_quaternions, self.degrees)
+        return self._maneuver_euler
+
+    def _representation(self, rotations, representation, euler_sequence, degrees):
+        quaternions = self.attitude_quaternions if rotations == 'attitude' else self.maneuver_quaternions
+        if representation == 'quaternion':
+            return quaternions
+        own_euler = euler_sequence in (None, self.euler_sequence) and degrees in (None, self.degrees)
+        if representation == 'euler' and own_euler:
+            return self.attitude_euler() if rotations == 'attitude' else self.maneuver_euler()
+        if representation not in REPRESENTATIONS:
+            raise ValueError(f'representation must be one of {REPRESENTATIONS}, got {representation!r}')
+        euler_sequence = euler_sequence or self.euler_sequence
+        degrees = self.degrees if degrees is None else degrees
+        key = (rotations, representation)
+        if representation == 'euler':
+            key += (euler_sequence, degrees)
+        elif representation == 'rotvec':
+            key += (degrees,)
+        if key not in self._representations:
+            with stage(f'as_{representation}'):
+                if representation == 'euler':
+                    values = quaternion_to_euler(euler_sequence, quaternions, degrees)
+                elif representation == 'matrix':
+                    values = R.from_quat(quaternions).as_matrix()
+                elif representation == 'rotvec':
+                    values = R.from_quat(quaternions).as_rotvec(degrees=degrees)
+                else:
+                    values = R.from_quat(quaternions).as_mrp()
+            self._representations[key] = values
+        return self._representations[key]
+
+    def attitude_as(self, representation, euler_sequence=None, degrees=None):
+        # (N + 1, ...) array of the attitudes; euler_sequence and degrees default to the plan's own, and degrees also
+        # applies to rotvec
+        return self._representation('attitude', representation, euler_sequence, degrees)
+
+    def maneuver_as(self, representation, euler_sequence=None, degrees=None):
+        return self._representation('maneuver', representation, euler_sequence, degrees)
+
+    @property
+    def maneuver_dictionary(self):
+        return EulerAngleDictionary(list(self.indices), self.maneuver_euler)
+
+    @property
+    def attitude_dictionary(self):
+        return EulerAngleDictionary([self.start_index] + list(self.indices), self.attitude_euler)
+
+
+def chain_attitude_quaternions(initial_quaternions, commanded_quaternions, euler_angle_type='commanded_attitude'):
+    # Works on any leading batch shape: initial (..., 4) and commands (..., N, 4)
+    # Returns (maneuvers, resulting attitudes), both (..., N, 4)
+    if euler_angle_type == 'commanded_attitude':
+        batch_shape = np.broadcast_shapes(initial_quaternions.shape[:-1], commanded_quaternions.shape[:-2])
+        commanded_quaternions = np.broadcast_to(commanded_quaternions, batch_shape + commanded_quaternions.shape[-2:])
+        initial_quaternions = np.broadcast_to(initial_quaternions, batch_shape + (4,))
+        previous_quaternions = np.concatenate([initial_quaternions[..., np.newaxis, :],
+                                               commanded_quaternions[..., :-1, :]], axis=-2)
+        previous_quaternions[..., :3] *= -1
+        return compose_quaternions(commanded_quaternions, previous_quaternions), commanded_quaternions
+    elif euler_angle_type == 'commanded_maneuver':
+        attitude_quaternions = compose_quaternions(cumulative_quaternions(commanded_quaternions),
+                                                   initial_quaternions[..., np.newaxis, :])
+        return commanded_quaternions, attitude_quaternions
+    else:
+        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+
+
+def chain_attitudes(initial_rotation, commanded_rotations, euler_angle_type='commanded_attitude',
+                    rotation_direction='body_to_inertial'):
+    # Quaternion core shared by every planner; returns (maneuvers, resulting attitudes) as stacked Rotations
+    # Composition happens body-to-inertial; inertial-to-body inputs and outputs are conjugated as whole stacks
+    check_direction(rotation_direction)
+    conjugate = CONJUGATE if rotation_direction == 'inertial_to_body' else 1.
+    with stage('compose'):
+        maneuver_quaternions, attitude_quaternions = chain_attitude_quaternions(
+            initial_rotation.as_quat() * conjugate, commanded_rotations.as_quat().reshape(-1, 4) * conjugate,
+            euler_angle_type)
+    if euler_angle_type == 'commanded_attitude':
+        return R.from_quat(maneuver_quaternions * conjugate), commanded_rotations
+    return commanded_rotations, R.from_quat(attitude_quaternions * conjugate)
+
+
+def plan_maneuvers(initial_attitude, angle_array, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                   degrees=True, indices=None, dtype=np.float64, reference_frame='ENU',
+                   rotation_direction='body_to_inertial'):
+    # reference_frame only labels the plan (composition is the same in every inertial frame) so plots and in_frame
+    # know how to re-express it; rotation_direction changes how attitudes and maneuvers compose
+    angle_array = np.asarray(angle_array, dtype=float).reshape(-1, 3)
+    with stage('from_euler'):
+        initial_rotation = R.from_euler(seq=euler_sequence, angles=initial_attitude, degrees=degrees)
+        commanded_rotations = R.from_quat(euler_to_quaternion(euler_sequence, angle_array, degrees))
+    rotations, resulting_attitudes = chain_attitudes(initial_rotation, commanded_rotations, euler_angle_type,
+                                                     rotation_direction)
+    return ManeuverPlan.from_rotations(initial_rotation, rotations, resulting_attitudes, dtype=dtype, indices=indices,
+                                       euler_angle_type=euler_angle_type, euler_sequence=euler_sequence,
+                                       degrees=degrees, initial_attitude=np.array(initial_attitude, dtype=float),
+                                       reference_frame=reference_frame, rotation_direction=rotation_direction)
+
+
+def combine_rotations(initial_attitude, angle_dictionary, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                      degrees=True, rotation_direction='body_to_inertial'):
+    # Attitudes stay as quaternions; Euler angles are only produced when the dictionaries are read
+    attitude_indices = list(angle_dictionary.keys())
+    angle_array = [angle_dictionary[index] for index in attitude_indices]
+    plan = plan_maneuvers(initial_attitude, angle_array, euler_angle_type=euler_angle_type,
+                          euler_sequence=euler_sequence, degrees=degrees, indices=attitude_indices,
+                          rotation_direction=rotation_direction)
+    return plan.maneuver_dictionary, plan.attitude_dictionary
+
+
+def _command_chunks(command_stream, chunk_size):
+    # Groups (index, angles) pairs into arrays of up to chunk_size legs; (k, 3) arrays pass straight through
+    # Yields (indices, angle_chunk) where indices is None for array chunks
+    pending_indices = []
+    pending_angles = []
+    for command in command_stream:
+        if isinstance(command, tuple) and len(command) == 2 and np.ndim(command[0]) == 0:
+            pending_indices.append(command[0])
+            pending_angles.append(command[1])
+            if len(pending_indices) >= chunk_size:
+                yield pending_indices, np.array(pending_angles, dtype=float).reshape(-1, 3)
+                pending_indices, pending_angles = [], []
+        else:
+            if pending_indices:
+                yield pending_indices, np.array(pending_angles, dtype=float).reshape(-1, 3)
+                pending_indices, pending_angles = [], []
+            angle_chunk = np.asarray(command, dtype=float).reshape(-1, 3)
+            if len(angle_chunk):
+                yield None, angle_chunk
+    if pending_indices:
+        yield pending_indices, np.array(pending_angles, dtype=float).reshape(-1, 3)
+
+
+def stream_rotations(initial_attitude, command_stream, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                     degrees=True, chunk_size=1024, dtype=np.float64, reference_frame='ENU',
+                     rotation_direction='body_to_inertial'):
+    # Generator form of plan_maneuvers for unbounded feeds: yields one ManeuverPlan per chunk of commands
+    # command_stream may mix (index, angles) pairs and (k, 3) arrays; array legs continue the previous numbering
+    # Only the running attitude and the current chunk are held between iterations
+    previous_rotation = R.from_euler(seq=euler_sequence, angles=initial_attitude, degrees=degrees)
+    previous_index = 0
+    first_attitude = np.array(initial_attitude, dtype=float)
+    for indices, angle_chunk in _command_chunks(command_stream, chunk_size):
+        if indices is None:
+            indices = range(previous_index + 1, previous_index + len(angle_chunk) + 1)
+        with stage('from_euler'):
+            commanded_rotations = R.from_quat(euler_to_quaternion(euler_sequence, angle_chunk, degrees))
+        rotations, resulting_attitudes = chain_attitudes(previous_rotation, commanded_rotations, euler_angle_type,
+                                                         rotation_direction)
+        yield ManeuverPlan.from_rotations(previous_rotation, rotations, resulting_attitudes, dtype=dtype,
+                                          indices=indices, start_index=previous_index,
+                                          euler_angle_type=euler_angle_type, euler_sequence=euler_sequence,
+                                          degrees=degrees, initial_attitude=first_attitude,
+                                          reference_frame=reference_frame, rotation_direction=rotation_direction)
+        previous_rotation = resulting_attitudes[-1]
+        previous_index = indices[-1]
+        first_attitude = None
+
+
+def compose_quaternions(left, right):
+    # Hamilton product of scalar-last quaternion arrays, same convention as R.from_quat(left) * R.from_quat(right)
+    left_x, left_y, left_z, left_w = np.moveaxis(left, -1, 0)
+    right_x, right_y, right_z, right_w = np.moveaxis(right, -1, 0)
+    return np.stack([left_w * right_x + left_x * right_w + left_y * right_z - left_z * right_y,
+                     left_w * right_y - left_x * right_z + left_y * right_w + left_z * right_x,
+                     left_w * right_z + left_x * right_y - left_y * right_x + left_z * right_w,
+                     left_w * right_w - left_x * right_x - left_y * right_y - left_z * right_z], axis=-1)
+
+
+def quaternion_angles(quaternions):
+    # Eigen-axis rotation angle in radians of each scalar-last quaternion, always in [0, pi]
+    return 2 * np.arctan2(np.linalg.norm(quaternions[..., :3], axis=-1), np.abs(quaternions[..., 3]))
+
+
+def slerp_quaternions(start_quaternions, end_quaternions, fractions):
+    # Spherical interpolation of N legs at F fractions in one pass: (N, 4), (N, 4), (F,) -> (N, F, 4)
+    # Passing (N, 1) fractions instead interpolates each leg at its own fraction and returns (N, 1, 4)
+    start_quaternions = np.asarray(start_quaternions, dtype=float)
+    end_quaternions = np.array(end_quaternions, dtype=float)
+    fractions = np.asarray(fractions, dtype=float)
+    dots = np.sum(start_quaternions * end_quaternions, axis=-1)
+
+    # q and -q are the same attitude; flip the end so every leg takes the short way round
+    end_quaternions[dots < 0] *= -1
+    dots = np.abs(dots)
+    half_angles = np.arccos(np.clip(dots, -1, 1))[:, np.newaxis]
+    sin_half_angles = np.sin(half_angles)
+    nearly_equal = sin_half_angles < 1e-9
+    safe_sin = np.where(nearly_equal, 1.0, sin_half_angles)
+    start_weights = np.where(nearly_equal, 1 - fractions, np.sin((1 - fractions) * half_angles) / safe_sin)
+    end_weights = np.where(nearly_equal, fractions, np.sin(fractions * half_angles) / safe_sin)
+
+    interpolated = (start_weights[..., np.newaxis] * start_quaternions[:, np.newaxis, :] +
+                    end_weights[..., np.newaxis] * end_quaternions[:, np.newaxis, :])
+    return interpolated / np.linalg.norm(interpolated, axis=-1, keepdims=True)
+
+
+def cumulative_quaternions(quaternions):
+    # Inclusive prefix product along the leg axis of (..., N, 4) in log2(N) stacked compositions (Hillis-Steele scan)
+    # After the pass with a given offset, entry i holds q[i] * ... * q[i - 2 * offset + 1]
+    cumulative = np.array(quaternions, dtype=float)
+    offset = 1
+    while offset < cumulative.shape[-2]:
+        cumulative[..., offset:, :] = compose_quaternions(cumulative[..., offset:, :], cumulative[..., :-offset, :])
+        offset *= 2
+    return cumulative / np.linalg.norm(cumulative, axis=-1, keepdims=True)
+
+
+def cumulative_rotations(rotations):
+    return R.from_quat(cumulative_quaternions(rotations.as_quat()))
+
+
+def combine_rotations_batch(initial_attitude, angle_array, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                            degrees=True, rotation_direction='body_to_inertial'):
+    # Same results as combine_rotations, but commands are an (N, 3) array and every leg is computed in stacked operations
+    plan = plan_maneuvers(initial_attitude, angle_array, euler_angle_type=euler_angle_type,
+                          euler_sequence=euler_sequence, degrees=degrees, rotation_direction=rotation_direction)
+    return plan.maneuver_euler(), plan.attitude_euler()
+
+
+def print_maneuvers(initial_attitude, maneuver_dictionary, attitude_dictionary):
+    dictionary_difference = len(attitude_dictionary) - len(maneuver_dictionary)
+    if dictionary_difference > 1:
+        raise ValueError(f'{dictionary_difference} attitudes without corresponding maneuvers')
+    elif dictionary_difference < 1:
+        raise ValueError(f'{dictionary_difference} maneuvers without corresponding attitudes')
+    write_maneuver_report(initial_attitude, maneuver_dictionary, attitude_dictionary)
+
+
+def euler_sequence_decoder(xyz_in):
+    sequence_code = {'X': 'R', 'Y': 'P', 'Z': 'Y'}
+    disp_sequence = ''.join(sequence_code[letter] for letter in xyz_in)
+    return disp_sequence
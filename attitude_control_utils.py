@@ -1,67 +1,22 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy.spatial.transform import Rotation as R
+from attitude_control_core import compute_single_rotation, EulerAngleDictionary, ManeuverPlan, chain_attitudes, \
+    plan_maneuvers, combine_rotations, stream_rotations, cumulative_rotations, combine_rotations_batch, \
+    print_maneuvers, euler_sequence_decoder
+from rotation_cache import from_euler
+from fast_euler import euler_to_quaternion
+from batch_plotting import render_attitude_pages
+from instrumentation import instrumented
+from reference_frames import display_matrices
 
 
-def compute_single_rotation(initial_attitude, euler_angles, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
-                            degrees=True):
-    initial_attitude = R.from_euler(seq=euler_sequence, angles=initial_attitude, degrees=degrees)
-    if euler_angle_type == 'commanded_attitude':
-        final_attitude = R.from_euler(seq=euler_sequence, angles=euler_angles, degrees=degrees)
-        rotation = final_attitude * initial_attitude.inv()
-        return rotation, final_attitude
-    elif euler_angle_type == 'commanded_maneuver':
-        rotation = R.from_euler(seq=euler_sequence, angles=euler_angles, degrees=degrees)
-        final_attitude = rotation * initial_attitude
-        return rotation, final_attitude
-    else:
-        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
-
-
-def combine_rotations(initial_attitude, angle_dictionary, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
-                      degrees=True):
-    maneuver_dictionary = dict()
-    attitude_dictionary = {0: initial_attitude}
-    resulting_attitude = initial_attitude
-    for attitude_index, angles in angle_dictionary.items():
-        if attitude_index == 1:
-            rotation, resulting_attitude = compute_single_rotation(initial_attitude=attitude_dictionary[0],
-                                                                   euler_angles=angles,
-                                                                   euler_angle_type=euler_angle_type,
-                                                                   euler_sequence=euler_sequence, degrees=degrees)
-        else:
-            rotation, resulting_attitude = compute_single_rotation(
-                initial_attitude=resulting_attitude.as_euler(seq=euler_sequence, degrees=degrees),
-                euler_angles=angles, euler_angle_type=euler_angle_type,
-                euler_sequence=euler_sequence, degrees=degrees)
-
-        maneuver_dictionary[attitude_index] = rotation.as_euler(seq=euler_sequence, degrees=degrees)
-        attitude_dictionary[attitude_index] = resulting_attitude.as_euler(seq=euler_sequence, degrees=degrees)
-
-    return maneuver_dictionary, attitude_dictionary
-
-
-def print_maneuvers(initial_attitude, maneuver_dictionary, attitude_dictionary):
-    dictionary_difference = len(attitude_dictionary) - len(maneuver_dictionary)
-    if dictionary_difference > 1:
-        raise ValueError(f'{dictionary_difference} attitudes without corresponding maneuvers')
-    elif dictionary_difference < 1:
-        raise ValueError(f'{dictionary_difference} maneuvers without corresponding attitudes')
-    num_maneuvers = len(maneuver_dictionary)
-    attitude_dictionary[0] = initial_attitude
-    for maneuver_index in range(1, num_maneuvers + 1):
-        print(f'=====================================')
-        print(f'Starting Attitude: {attitude_dictionary[maneuver_index - 1]}')
-        print(f'Maneuver Required: {maneuver_dictionary[maneuver_index]}')
-        print(f'Ending Attitude:   {attitude_dictionary[maneuver_index]}')
-
-
-def euler_sequence_decoder(xyz_in):
-    sequence_code = {'X': 'R', 'Y': 'P', 'Z': 'Y'}
-    disp_sequence = ''.join(sequence_code[letter] for letter in xyz_in)
-    return disp_sequence
+def _pyplot():
+    # matplotlib is only imported the first time something is plotted, so compute-only users never pay for it
+    import matplotlib.pyplot as plt
+    return plt
 
 
+@instrumented('plot_setup')
 def plot_setup(axis, reference_frame, reference_frame_label, euler_sequence='ZYX', origin=np.array([0, 0, 0]),
                maneuver_angles=None, attitude_in=None, attitude_out=None):
     x_color = 'r'
@@ -129,7 +84,16 @@ def plot_setup(axis, reference_frame, reference_frame_label, euler_sequence='ZYX
         axis.text2D(x=1.05, y=y_positions[i], s=text, transform=axis.transAxes, fontsize=10, ha='left')
 
 
-def plot_attitudes(attitude_dictionary, maneuver_dictionary, euler_sequence='ZYX', degrees=True):
+def plot_attitudes(attitude_dictionary, maneuver_dictionary, euler_sequence='ZYX', degrees=True, output_directory=None,
+                   reference_frame='ENU', rotation_direction='body_to_inertial', **page_options):
+    # With an output_directory the plan is rendered headless into fixed-size pages instead of one interactive figure
+    # Attitudes in any frame convention are drawn in ENU plot coordinates (x east, y north, z up)
+    if output_directory is not None:
+        return render_attitude_pages(list(attitude_dictionary.values()), list(maneuver_dictionary.values()),
+                                     output_directory, euler_sequence=euler_sequence, degrees=degrees,
+                                     indices=maneuver_dictionary.keys(), reference_frame=reference_frame,
+                                     rotation_direction=rotation_direction, **page_options)
+
     total_plots = len(attitude_dictionary)
     num_rows = int(np.ceil(total_plots ** 0.5))
     num_columns = int(np.ceil(total_plots / num_rows))
@@ -137,22 +101,26 @@ def plot_attitudes(attitude_dictionary, maneuver_dictionary, euler_sequence='ZYX
     # Convert XYZ sequence to RPY equivalent
     disp_sequence = euler_sequence_decoder(euler_sequence)
 
+    # Every frame matrix in one vectorized conversion rather than one per subplot
+    attitude_matrices = R.from_quat(euler_to_quaternion(euler_sequence, list(attitude_dictionary.values()),
+                                                        degrees)).as_matrix().reshape(-1, 3, 3)
+    frame_matrices = display_matrices(attitude_matrices, reference_frame, rotation_direction)
+
+    plt = _pyplot()
     fig = plt.figure(figsize=(num_columns * 4, num_rows * 5))
     fig.suptitle(f'Maneuver Plotter\nEuler Sequence:\n{disp_sequence}', y=0.95, fontsize=16)
 
-    for index, attitude_angles in attitude_dictionary.items():
+    for position, index in enumerate(attitude_dictionary):
         axis = fig.add_subplot(num_rows, num_columns, index + 1, projection='3d')
         if index == 0:
             axis_label = 'Initial Attitude'
             attitude_in = attitude_dictionary[0]
-            plot_setup(axis,
-                       R.from_euler(angles=attitude_dictionary[0], seq=euler_sequence, degrees=degrees).as_matrix(),
-                       axis_label, attitude_in=attitude_in, euler_sequence=euler_sequence)
+            plot_setup(axis, frame_matrices[position], axis_label, attitude_in=attitude_in,
+                       euler_sequence=euler_sequence)
         else:
             attitude_in = attitude_dictionary[index - 1]
             attitude_out = attitude_dictionary[index]
-            plot_setup(axis, R.from_euler(angles=attitude_out, seq=euler_sequence, degrees=degrees).as_matrix(),
-                       f'Maneuver {index}', maneuver_angles=maneuver_dictionary[index],
+            plot_setup(axis, frame_matrices[position], f'Maneuver {index}', maneuver_angles=maneuver_dictionary[index],
                        attitude_in=attitude_in, attitude_out=attitude_out, euler_sequence=euler_sequence)
 
     plt.tight_layout(pad=3.0)
@@ -161,17 +129,18 @@ def plot_attitudes(attitude_dictionary, maneuver_dictionary, euler_sequence='ZYX
 
 
 def plot_single_maneuver(initial_attitude, final_attitude, euler_sequence='ZYX', degrees=True,
-                         origin=np.array([0, 0, 0])):
+                         origin=np.array([0, 0, 0]), reference_frame='ENU', rotation_direction='body_to_inertial'):
+    plt = _pyplot()
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
 
     # Convert XYZ sequence to RPY equivalent
     disp_sequence = euler_sequence_decoder(euler_sequence)
 
-    initial_rotation = R.from_euler(angles=initial_attitude, seq=euler_sequence, degrees=degrees)
-    plot_setup(ax, initial_rotation.as_matrix(), "Initial Attitude", origin=origin, euler_sequence=euler_sequence)
-
-    final_rotation_matrix = R.from_euler(angles=final_attitude, seq=euler_sequence, degrees=degrees).as_matrix()
+    initial_rotation_matrix, final_rotation_matrix = display_matrices(
+        [from_euler(euler_sequence, initial_attitude, degrees).as_matrix(),
+         from_euler(euler_sequence, final_attitude, degrees).as_matrix()], reference_frame, rotation_direction)
+    plot_setup(ax, initial_rotation_matrix, "Initial Attitude", origin=origin, euler_sequence=euler_sequence)
 
     length = 0.75
     label_distance = 1
@@ -224,13 +193,14 @@ def plot_single_maneuver(initial_attitude, final_attitude, euler_sequence='ZYX',
     plt.show()
 
 
-initial_att = [0, 0, 0]
-att_commands = {1: [20, 0, 0], 2: [20, 15, 0], 3: [0, 0, 0]}
-eul_seq = 'zyx'.upper()
+if __name__ == '__main__':
+    initial_att = [0, 0, 0]
+    att_commands = {1: [20, 0, 0], 2: [20, 15, 0], 3: [0, 0, 0]}
+    eul_seq = 'zyx'.upper()
 
-maneuver_out, att_out = combine_rotations(initial_att, att_commands, euler_angle_type='commanded_attitude')
+    maneuver_out, att_out = combine_rotations(initial_att, att_commands, euler_angle_type='commanded_attitude')
 
-# plot_attitudes(att_out, maneuver_out, euler_sequence=eul_seq, degrees=True)
+    # plot_attitudes(att_out, maneuver_out, euler_sequence=eul_seq, degrees=True)
 
-fin_att = [20, 0, 0]
-plot_single_maneuver(initial_att, fin_att, eul_seq)
+    fin_att = [20, 0, 0]
+    plot_single_maneuver(initial_att, fin_att, eul_seq)
@@ -0,0 +1,60 @@
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import quaternion_angles, slerp_quaternions
+
+
+def slew_durations(slew_angles, max_rate, max_acceleration):
+    # Rest-to-rest eigen-axis slew: accelerate, coast at max_rate if the angle allows it, decelerate
+    # Angles, rates and accelerations share one angular unit
+    slew_angles = np.asarray(slew_angles, dtype=float)
+    ramp_angle = max_rate ** 2 / max_acceleration
+    return np.where(slew_angles >= ramp_angle, slew_angles / max_rate + max_rate / max_acceleration,
+                    2 * np.sqrt(slew_angles / max_acceleration))
+
+
+def slew_fractions(elapsed, slew_angles, durations, max_rate, max_acceleration):
+    # Fraction of each slew angle covered after elapsed seconds of the same rate-limited profile
+    peak_rates = np.minimum(max_rate, np.sqrt(slew_angles * max_acceleration))
+    ramp_times = peak_rates / max_acceleration
+    elapsed = np.clip(elapsed, 0, durations)
+    accelerating = 0.5 * max_acceleration * elapsed ** 2
+    coasting = 0.5 * peak_rates * ramp_times + peak_rates * (elapsed - ramp_times)
+    decelerating = slew_angles - 0.5 * max_acceleration * (durations - elapsed) ** 2
+    covered = np.where(elapsed < ramp_times, accelerating,
+                       np.where(elapsed > durations - ramp_times, decelerating, coasting))
+    return np.where(slew_angles > 0, covered / np.where(slew_angles > 0, slew_angles, 1), 1.0)
+
+
+def leg_timing(plan, max_rate, max_acceleration):
+    # Slew angle, duration and start time of every leg in one vectorized pass
+    # Limits are in the plan's unit per second (and per second squared)
+    slew_angles = quaternion_angles(np.asarray(plan.maneuver_quaternions, dtype=float))
+    if plan.degrees:
+        slew_angles = np.degrees(slew_angles)
+    durations = slew_durations(slew_angles, max_rate, max_acceleration)
+    boundaries = np.concatenate([[0.], np.cumsum(durations)])
+    return {'slew_angles': slew_angles, 'durations': durations, 'start_times': boundaries[:-1],
+            'end_times': boundaries[1:]}
+
+
+def sample_attitude_profile(plan, sample_rate, max_rate, max_acceleration, chunk_samples=100000, include_euler=True):
+    # Yields the time-tagged attitude over the whole plan at sample_rate Hz, chunk_samples samples at a time
+    # Each chunk is a dict of 'time', 'leg' (1-based), 'quaternions' and, when include_euler is set, 'euler'
+    if len(plan) == 0:
+        raise ValueError('plan has no legs to sample')
+    timing = leg_timing(plan, max_rate, max_acceleration)
+    attitude_quaternions = np.asarray(plan.attitude_quaternions, dtype=float)
+    num_samples = int(np.floor(timing['end_times'][-1] * sample_rate + 1e-9)) + 1
+    last_leg = len(plan) - 1
+
+    for first_sample in range(0, num_samples, chunk_samples):
+        times = np.arange(first_sample, min(first_sample + chunk_samples, num_samples)) / sample_rate
+        legs = np.minimum(np.searchsorted(timing['end_times'], times, side='right'), last_leg)
+        fractions = slew_fractions(times - timing['start_times'][legs], timing['slew_angles'][legs],
+                                   timing['durations'][legs], max_rate, max_acceleration)
+        quaternions = slerp_quaternions(attitude_quaternions[legs], attitude_quaternions[legs + 1],
+                                        fractions[:, np.newaxis])[:, 0]
+        chunk = {'time': times, 'leg': legs + 1, 'quaternions': quaternions}
+        if include_euler:
+            chunk['euler'] = R.from_quat(quaternions).as_euler(seq=plan.euler_sequence, degrees=plan.degrees)
+        yield chunk
@@ -0,0 +1,162 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import euler_sequence_decoder
+from reference_frames import display_matrices
+
+AXIS_COLORS = ('r', 'g', 'b')
+AXIS_LABELS = (' X', ' Y', ' Z')
+ARROW_LENGTH = 0.75
+HEAD_RATIO = 0.3
+HEAD_ANGLE = np.radians(15)
+TEXT_POSITIONS = (0.7, 0.35, 0.0)
+
+
+def body_axis_segments(frame_matrices, arrow_length=ARROW_LENGTH):
+    # Quiver geometry for every frame at once: (K, 3, 3) matrices -> (K, 3 axes, 3 segments, 2 points, 3)
+    # Each axis is a shaft from the origin plus two arrowhead barbs, matching what axis.quiver draws
+    tips = np.swapaxes(frame_matrices, -1, -2) * arrow_length
+    backs = -tips * HEAD_RATIO
+
+    # Barbs are the reversed shaft rotated by +/- HEAD_ANGLE about an axis perpendicular to the shaft
+    hinge_axes = np.cross(tips, [0., 0., 1.])
+    parallel_to_z = np.linalg.norm(hinge_axes, axis=-1) < 1e-9
+    hinge_axes[parallel_to_z] = np.cross(tips[parallel_to_z], [1., 0., 0.])
+    hinge_axes /= np.linalg.norm(hinge_axes, axis=-1, keepdims=True)
+    swung_backs = np.cross(hinge_axes, backs) * np.sin(HEAD_ANGLE)
+    barb_ends = [tips + backs * np.cos(HEAD_ANGLE) + swung_backs, tips + backs * np.cos(HEAD_ANGLE) - swung_backs]
+
+    segments = np.empty(tips.shape[:-1] + (3, 2, 3))
+    segments[..., 0, 0, :] = 0
+    segments[..., 0, 1, :] = tips
+    segments[..., 1, 0, :] = tips
+    segments[..., 1, 1, :] = barb_ends[0]
+    segments[..., 2, 0, :] = tips
+    segments[..., 2, 1, :] = barb_ends[1]
+    return segments
+
+
+def _angle_block(title, disp_sequence, angles):
+    angles = np.round(angles, 2)
+    return f'{title}:\n{disp_sequence[0]} = {angles[0]}\n{disp_sequence[1]} = {angles[1]}\n{disp_sequence[2]} = {angles[2]}'
+
+
+def _build_page_template(rows, columns, disp_sequence, dpi):
+    # One figure with rows x columns pre-configured 3D axes; only artist data changes from page to page
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(columns * 4, rows * 5), dpi=dpi)
+    FigureCanvasAgg(figure)
+    figure.suptitle(f'Maneuver Plotter\nEuler Sequence:\n{disp_sequence}', y=0.95, fontsize=16)
+    panels = []
+    for slot in range(rows * columns):
+        axis = figure.add_subplot(rows, columns, slot + 1, projection='3d')
+        axis.set_xlabel('x')
+        axis.set_ylabel('y')
+        axis.set_zlabel('z')
+        axis.set_xlim(-1, 1)
+        axis.set_ylim(-1, 1)
+        axis.set_zlim(-1, 1)
+        axis.xaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.yaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.zaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.view_init(azim=110, elev=200)
+        quivers = [axis.quiver(0, 0, 0, 1, 0, 0, color=color, length=ARROW_LENGTH) for color in AXIS_COLORS]
+        labels = [axis.text(0, 0, 0, label, color=color) for label, color in zip(AXIS_LABELS, AXIS_COLORS)]
+        annotations = [axis.text2D(x=1.05, y=y_position, s='', transform=axis.transAxes, fontsize=10, ha='left')
+                       for y_position in TEXT_POSITIONS]
+        panels.append((axis, quivers, labels, annotations))
+    figure.subplots_adjust(top=0.9, hspace=0, wspace=0.5)
+    return figure, panels
+
+
+def _render_page_range(pages, page_data, rows, columns, disp_sequence, dpi):
+    # Renders a contiguous run of pages on one reusable template; runs in a worker process when parallel
+    figure, panels = _build_page_template(rows, columns, disp_sequence, dpi)
+    report = []
+    for page_number, output_path, frames in zip(pages, page_data['output_paths'], page_data['frames']):
+        start_time = time.perf_counter()
+        for slot, (axis, quivers, labels, annotations) in enumerate(panels):
+            if slot >= len(frames):
+                axis.set_visible(False)
+                continue
+            segments, label_positions, title, text_lines = frames[slot]
+            axis.set_visible(True)
+            axis.set_title(title)
+            for axis_number in range(3):
+                quivers[axis_number].set_segments(segments[axis_number])
+                labels[axis_number].set_position_3d(label_positions[axis_number])
+            for annotation, text in zip(annotations, text_lines + [''] * (len(annotations) - len(text_lines))):
+                annotation.set_text(text)
+        figure.savefig(output_path)
+        report.append({'page': page_number, 'path': output_path, 'panels': len(frames),
+                       'seconds': time.perf_counter() - start_time})
+    return report
+
+
+def render_attitude_pages(attitude_angles, maneuver_angles, output_directory, euler_sequence='ZYX', degrees=True,
+                          indices=None, rows=3, columns=4, file_prefix='maneuver_page', file_format='png', dpi=100,
+                          num_workers=1, frame_matrices=None, reference_frame='ENU',
+                          rotation_direction='body_to_inertial'):
+    # Headless (Agg) version of plot_attitudes: one panel per attitude, written rows x columns panels per page
+    # Returns a per-page timing report; pages are split across num_workers processes when num_workers > 1
+    # frame_matrices, when given, are the (N + 1, 3, 3) attitude matrices and skip the Euler conversion; either way
+    # they are taken in the given frame convention and drawn in ENU plot coordinates
+    attitude_angles = np.asarray(attitude_angles, dtype=float).reshape(-1, 3)
+    maneuver_angles = np.asarray(maneuver_angles, dtype=float).reshape(-1, 3)
+    if len(attitude_angles) != len(maneuver_angles) + 1:
+        raise ValueError(f'{len(attitude_angles)} attitudes for {len(maneuver_angles)} maneuvers, '
+                         f'expected exactly one more attitude than maneuvers')
+    if indices is None:
+        indices = range(1, len(maneuver_angles) + 1)
+    indices = list(indices)
+    disp_sequence = euler_sequence_decoder(euler_sequence)
+
+    # All frame geometry is computed in one vectorized pass before any drawing
+    if frame_matrices is None:
+        frame_matrices = R.from_euler(seq=euler_sequence, angles=attitude_angles, degrees=degrees).as_matrix()
+    frame_matrices = display_matrices(frame_matrices, reference_frame, rotation_direction)
+    segments = body_axis_segments(frame_matrices)
+    label_positions = np.swapaxes(frame_matrices, -1, -2)
+
+    frames = [(segments[0], label_positions[0], 'Initial Attitude',
+               [_angle_block('Attitude In', disp_sequence, attitude_angles[0])])]
+    for leg, index in enumerate(indices, start=1):
+        frames.append((segments[leg], label_positions[leg], f'Maneuver {index}',
+                       [_angle_block('Attitude In', disp_sequence, attitude_angles[leg - 1]),
+                        _angle_block('Maneuver', disp_sequence, maneuver_angles[leg - 1]),
+                        _angle_block('Attitude Out', disp_sequence, attitude_angles[leg])]))
+
+    os.makedirs(output_directory, exist_ok=True)
+    panels_per_page = rows * columns
+    page_frames = [frames[start:start + panels_per_page] for start in range(0, len(frames), panels_per_page)]
+    pages = list(range(1, len(page_frames) + 1))
+    output_paths = [os.path.join(output_directory, f'{file_prefix}_{page:04d}.{file_format}') for page in pages]
+
+    num_workers = max(1, min(num_workers, len(pages)))
+    pages_per_worker = int(np.ceil(len(pages) / num_workers))
+    work = [(pages[start:start + pages_per_worker],
+             {'output_paths': output_paths[start:start + pages_per_worker],
+              'frames': page_frames[start:start + pages_per_worker]})
+            for start in range(0, len(pages), pages_per_worker)]
+
+    start_time = time.perf_counter()
+    if num_workers == 1:
+        page_reports = [_render_page_range(worker_pages, page_data, rows, columns, disp_sequence, dpi)
+                        for worker_pages, page_data in work]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            page_reports = list(executor.map(_render_page_range, *zip(*work), [rows] * len(work),
+                                             [columns] * len(work), [disp_sequence] * len(work), [dpi] * len(work)))
+    return {'pages': [page for worker_report in page_reports for page in worker_report],
+            'total_seconds': time.perf_counter() - start_time}
+
+
+def render_plan_pages(plan, output_directory, **page_options):
+    return render_attitude_pages(plan.attitude_euler(), plan.maneuver_euler(), output_directory,
+                                 euler_sequence=plan.euler_sequence, degrees=plan.degrees, indices=plan.indices,
+                                 frame_matrices=plan.attitude_as('matrix'), reference_frame=plan.reference_frame,
+                                 rotation_direction=plan.rotation_direction, **page_options)
@@ -0,0 +1,223 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from attitude_control_core import plan_maneuvers
+from batch_plotting import render_plan_pages
+from maneuver_report import write_plan_report
+from plan_store import write_plan
+
+COMMAND_FILE_EXTENSIONS = ('.csv', '.json')
+OUTPUT_EXTENSIONS = {'plan': '.plan', 'text': '.txt', 'csv': '.csv', 'jsonl': '.jsonl'}
+OUTPUT_FORMATS = tuple(OUTPUT_EXTENSIONS)
+MANIFEST_NAME = 'batch_manifest.jsonl'
+
+
+def find_command_files(sources):
+    # Each source is a directory (its .csv and .json files, not recursive) or a glob pattern
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            candidates = [os.path.join(source, name) for name in os.listdir(source)]
+        else:
+            candidates = glob.glob(source)
+        paths.update(os.path.abspath(path) for path in candidates
+                     if os.path.isfile(path) and path.lower().endswith(COMMAND_FILE_EXTENSIONS))
+    return sorted(paths)
+
+
+def read_command_file(path, euler_angle_type='commanded_attitude', euler_sequence='ZYX', degrees=True,
+                      initial_attitude=(0., 0., 0.)):
+    # JSON: {"initial_attitude": [...], "commands": {"1": [...], ...} or [[...], ...]} and optionally
+    # "euler_angle_type", "euler_sequence" and "degrees", which override the defaults passed in
+    # CSV: index,angle_1,angle_2,angle_3 rows with an optional header line; the row with index 0 is the initial attitude
+    job = {'euler_angle_type': euler_angle_type, 'euler_sequence': euler_sequence, 'degrees': degrees,
+           'initial_attitude': np.asarray(initial_attitude, dtype=float)}
+    if path.lower().endswith('.json'):
+        with open(path) as command_file:
+            contents = json.load(command_file)
+        for key in ('euler_angle_type', 'euler_sequence', 'degrees'):
+            job[key] = contents.get(key, job[key])
+        job['initial_attitude'] = np.asarray(contents.get('initial_attitude', job['initial_attitude']), dtype=float)
+        commands = contents['commands']
+        if isinstance(commands, dict):
+            job['indices'] = [int(index) for index in commands]
+            job['angles'] = np.array(list(commands.values()), dtype=float).reshape(-1, 3)
+        else:
+            job['angles'] = np.array(commands, dtype=float).reshape(-1, 3)
+            job['indices'] = list(range(1, len(job['angles']) + 1))
+        return job
+
+    with open(path) as command_file:
+        first_line = command_file.readline().split(',')[0].strip()
+    try:
+        float(first_line)
+        header_rows = 0
+    except ValueError:
+        header_rows = 1
+    rows = np.loadtxt(path, delimiter=',', skiprows=header_rows, ndmin=2, comments='#')
+    if rows.size == 0:
+        rows = rows.reshape(0, 4)
+    elif rows.ndim != 2 or rows.shape[1] != 4:
+        raise ValueError(f'{path}: expected 4 columns (index,angle_1,angle_2,angle_3), got {rows.shape[-1]}')
+    initial_rows = rows[:, 0] == 0
+    if initial_rows.any():
+        job['initial_attitude'] = rows[initial_rows][0, 1:]
+    job['indices'] = rows[~initial_rows, 0].astype(np.int64).tolist()
+    job['angles'] = rows[~initial_rows, 1:]
+    return job
+
+
+def run_command_file(path, output_directory, output_formats=('csv',), plot=False, plot_options=None, **job_defaults):
+    # Plans one command file and writes its outputs; each output is written under a temporary name and renamed into
+    # place, so an interrupted run never leaves a complete-looking file behind
+    start_time = time.perf_counter()
+    job = read_command_file(path, **job_defaults)
+    plan = plan_maneuvers(job['initial_attitude'], job['angles'], job['euler_angle_type'], job['euler_sequence'],
+                          job['degrees'], indices=job['indices'])
+    stem = os.path.splitext(os.path.basename(path))[0]
+    outputs = []
+    for output_format in output_formats:
+        output_path = os.path.join(output_directory, stem + OUTPUT_EXTENSIONS[output_format])
+        partial_path = output_path + '.partial'
+        if output_format == 'plan':
+            write_plan(partial_path, plan)
+        else:
+            write_plan_report(plan, partial_path, output_format)
+        os.replace(partial_path, output_path)
+        outputs.append(output_path)
+    if plot:
+        plot_directory = os.path.join(output_directory, f'{stem}_plots')
+        render_plan_pages(plan, plot_directory, file_prefix=stem, **(plot_options or {}))
+        outputs.append(plot_directory)
+    return {'source': path, 'legs': len(plan), 'seconds': time.perf_counter() - start_time,
+            'formats': list(output_formats), 'plot': plot, 'outputs': outputs}
+
+
+def _file_signature(path):
+    status = os.stat(path)
+    return {'size': status.st_size, 'mtime_ns': status.st_mtime_ns}
+
+
+def load_manifest(output_directory):
+    # Completed files by source path; a line cut short by a crash is ignored
+    completed = {}
+    manifest_path = os.path.join(output_directory, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            for line in manifest_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                completed[record['source']] = record
+    return completed
+
+
+def run_batch(sources, output_directory, output_formats=('csv',), plot=False, plot_options=None, num_workers=None,
+              resume=True, executor=None, **job_defaults):
+    # Plans every command file found in sources across a process pool and records each finished file in the output
+    # directory's manifest; with resume, files already in the manifest and unchanged since are skipped
+    start_time = time.perf_counter()
+    unknown_formats = set(output_formats) - set(OUTPUT_FORMATS)
+    if unknown_formats:
+        raise ValueError(f'unknown output formats {sorted(unknown_formats)}, expected some of {OUTPUT_FORMATS}')
+    paths = find_command_files(sources)
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    duplicate_stems = sorted({stem for stem in stems if stems.count(stem) > 1})
+    if duplicate_stems:
+        raise ValueError(f'command files would write to the same outputs: {duplicate_stems}')
+    # CSV outputs share the command files' names, so writing next to them would overwrite the inputs
+    if any(os.path.realpath(os.path.dirname(path)) == os.path.realpath(output_directory) for path in paths):
+        raise ValueError(f'output directory {output_directory} holds command files; choose a separate directory')
+
+    os.makedirs(output_directory, exist_ok=True)
+    completed = load_manifest(output_directory) if resume else {}
+    # A file is redone when it changed since it was recorded or this run asks for outputs it did not produce
+    pending = [path for path in paths
+               if completed.get(path, {}).get('signature') != _file_signature(path)
+               or not set(output_formats) <= set(completed[path]['formats'])
+               or (plot and not completed[path]['plot'])]
+    summary = {'files': 0, 'skipped': len(paths) - len(pending), 'failed': [], 'legs': 0}
+
+    with open(os.path.join(output_directory, MANIFEST_NAME), 'a' if resume else 'w') as manifest_file:
+        def record(path, result=None, error=None):
+            if error is not None:
+                summary['failed'].append({'source': path, 'error': repr(error)})
+                return
+            result['signature'] = _file_signature(path)
+            # Outputs from earlier runs of the same unchanged file are still valid, so the entry keeps them
+            previous = completed.get(path)
+            if previous is not None and previous.get('signature') == result['signature']:
+                result['formats'] = sorted(set(previous['formats']) | set(result['formats']))
+                result['plot'] = previous['plot'] or result['plot']
+                result['outputs'] = sorted(set(previous['outputs']) | set(result['outputs']))
+            manifest_file.write(json.dumps(result) + '\n')
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+            summary['files'] += 1
+            summary['legs'] += result['legs']
+
+        job_arguments = dict(output_directory=output_directory, output_formats=tuple(output_formats), plot=plot,
+                             plot_options=plot_options, **job_defaults)
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers == 1 and executor is None:
+            for path in pending:
+                try:
+                    record(path, run_command_file(path, **job_arguments))
+                except Exception as error:
+                    record(path, error=error)
+        else:
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(max_workers=num_workers)
+            try:
+                futures = {executor.submit(run_command_file, path, **job_arguments): path for path in pending}
+                for future in as_completed(futures):
+                    error = future.exception()
+                    record(futures[future], None if error else future.result(), error)
+            finally:
+                if own_executor:
+                    executor.shutdown()
+
+    summary['seconds'] = time.perf_counter() - start_time
+    summary['files_per_second'] = summary['files'] / summary['seconds']
+    summary['legs_per_second'] = summary['legs'] / summary['seconds']
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plan every command file in a directory or glob')
+    parser.add_argument('sources', nargs='+', help='directories or glob patterns of .csv/.json command files')
+    parser.add_argument('-o', '--output-directory', required=True)
+    parser.add_argument('--formats', nargs='+', default=['csv'], choices=OUTPUT_FORMATS)
+    parser.add_argument('--plots', action='store_true', help='also render headless plot pages for every file')
+    parser.add_argument('--plot-format', default='png')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--no-resume', action='store_true', help='redo files already listed in the manifest')
+    parser.add_argument('--mode', default='commanded_attitude', choices=('commanded_attitude', 'commanded_maneuver'))
+    parser.add_argument('--sequence', default='ZYX')
+    parser.add_argument('--radians', action='store_true')
+    parser.add_argument('--initial-attitude', nargs=3, type=float, default=[0., 0., 0.],
+                        help='used for files that do not give one')
+    arguments = parser.parse_args(argv)
+
+    summary = run_batch(arguments.sources, arguments.output_directory, arguments.formats, arguments.plots,
+                        {'file_format': arguments.plot_format}, arguments.workers, not arguments.no_resume,
+                        euler_angle_type=arguments.mode, euler_sequence=arguments.sequence,
+                        degrees=not arguments.radians, initial_attitude=arguments.initial_attitude)
+    for failure in summary['failed']:
+        print(f'FAILED {failure["source"]}: {failure["error"]}')
+    print(f'{summary["files"]} files ({summary["skipped"]} already done, {len(summary["failed"])} failed), '
+          f'{summary["legs"]} legs in {summary["seconds"]:.2f} s: {summary["files_per_second"]:.1f} files/s, '
+          f'{summary["legs_per_second"]:.0f} legs/s')
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import scipy
+from attitude_control_core import combine_rotations, compute_single_rotation, plan_maneuvers
+from fast_euler import compute_single_maneuver
+
+EULER_SEQUENCES = ('ZYX', 'XYZ', 'ZXZ')
+EULER_ANGLE_TYPES = ('commanded_attitude', 'commanded_maneuver')
+# Baselines are machine-specific, so each checkout records its own with --update-baseline (the file is not tracked)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# The dictionary API builds one Python object per leg, so it is swept to a shorter length than the array API
+DICTIONARY_MAX_LEGS = 10 ** 5
+
+
+def _time_samples(function, repeat, min_seconds=0.2):
+    # `repeat` per-call timings, each looping the call until it takes at least min_seconds
+    samples = []
+    for _ in range(repeat):
+        calls = 0
+        start_time = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start_time
+            if elapsed >= min_seconds:
+                break
+        samples.append(elapsed / calls)
+    return samples
+
+
+def _result(samples, work, unit):
+    # Median per-call time plus the spread of the samples (fastest to slowest, relative to the median) so the gate
+    # can tell a real slowdown from run-to-run noise
+    seconds = float(np.median(samples))
+    return {'seconds': seconds, 'throughput': work / seconds, 'unit': unit,
+            'spread': (max(samples) - min(samples)) / seconds, 'samples': len(samples)}
+
+
+def _plan_lengths(max_legs):
+    return [10 ** power for power in range(int(np.log10(max_legs)) + 1)]
+
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'system': platform.system()}
+
+
+def benchmark_import(repeat=3):
+    # Cold import of the compute core and the plotting wrapper in a fresh interpreter
+    results = {}
+    for module_name in ('attitude_control_core', 'attitude_control_utils'):
+        script = f'import time\nstart = time.perf_counter()\nimport {module_name}\nprint(time.perf_counter() - start)'
+        samples = [float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+                   for _ in range(repeat)]
+        results[f'import/{module_name}'] = _result(samples, 1, 'imports/s')
+    return results
+
+
+def benchmark_plot_render(repeat=3):
+    from batch_plotting import render_plan_pages
+    plan = plan_maneuvers([0, 0, 0], np.random.default_rng(0).uniform(-90, 90, (11, 3)))
+    with tempfile.TemporaryDirectory() as output_directory:
+        samples = _time_samples(lambda: render_plan_pages(plan, output_directory, rows=3, columns=4), repeat,
+                                min_seconds=0)
+    return {'plot/render_page_3x4': _result(samples, 1, 'pages/s')}
+
+
+def benchmark_compute(max_legs=10 ** 4, repeat=3, euler_sequences=EULER_SEQUENCES, min_seconds=0.2):
+    results = {}
+    rng = np.random.default_rng(0)
+    for euler_sequence in euler_sequences:
+        for degrees in (True, False):
+            unit = 'deg' if degrees else 'rad'
+            scale = 60 if degrees else np.radians(60)
+            initial_attitude = rng.uniform(-scale, scale, 3)
+            for euler_angle_type in EULER_ANGLE_TYPES:
+                command = rng.uniform(-scale, scale, 3)
+                samples = _time_samples(lambda: compute_single_rotation(initial_attitude, command, euler_angle_type,
+                                                                        euler_sequence, degrees), repeat, min_seconds)
+                results[f'compute_single_rotation/{euler_angle_type}/{euler_sequence}/{unit}'] = _result(
+                    samples, 1, 'calls/s')
+                samples = _time_samples(lambda: compute_single_maneuver(initial_attitude, command, euler_angle_type,
+                                                                        euler_sequence, degrees), repeat, min_seconds)
+                results[f'compute_single_maneuver/{euler_angle_type}/{euler_sequence}/{unit}'] = _result(
+                    samples, 1, 'calls/s')
+
+                for num_legs in _plan_lengths(max_legs):
+                    angle_array = rng.uniform(-scale, scale, (num_legs, 3))
+                    samples = _time_samples(lambda: plan_maneuvers(initial_attitude, angle_array, euler_angle_type,
+                                                                   euler_sequence, degrees).attitude_euler(),
+                                            repeat, min_seconds)
+                    results[f'plan_maneuvers/{euler_angle_type}/{euler_sequence}/{unit}/n={num_legs}'] = _result(
+                        samples, num_legs, 'legs/s')
+                    if num_legs > DICTIONARY_MAX_LEGS:
+                        continue
+                    angle_dictionary = {index: angles for index, angles in enumerate(angle_array, start=1)}
+
+                    def run_dictionary_api():
+                        maneuvers, attitudes = combine_rotations(initial_attitude, angle_dictionary, euler_angle_type,
+                                                                 euler_sequence, degrees)
+                        return [attitudes[index] for index in attitudes]
+
+                    samples = _time_samples(run_dictionary_api, repeat, min_seconds)
+                    results[f'combine_rotations/{euler_angle_type}/{euler_sequence}/{unit}/n={num_legs}'] = _result(
+                        samples, num_legs, 'legs/s')
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold=0.1):
+    # A case regresses when its throughput falls below the baseline by more than `threshold` (a fraction) on top of
+    # the sample spread recorded for both runs, so cases that are merely noisy do not fail the gate
+    regressions = []
+    for name, result in results.items():
+        baseline_result = baseline.get('results', {}).get(name)
+        if baseline_result is None:
+            continue
+        allowed_drop = threshold + baseline_result.get('spread', 0.0) + result.get('spread', 0.0)
+        change = result['throughput'] / baseline_result['throughput'] - 1
+        if change < -allowed_drop:
+            regressions.append({'case': name, 'baseline': baseline_result['throughput'],
+                                'current': result['throughput'], 'unit': result['unit'], 'change': change,
+                                'allowed_drop': allowed_drop})
+    return regressions
+
+
+def run_benchmarks(max_legs=10 ** 4, repeat=3, include_import=True, include_plot=True,
+                   euler_sequences=EULER_SEQUENCES, min_seconds=0.2):
+    results = {}
+    if include_import:
+        results.update(benchmark_import(repeat))
+    results.update(benchmark_compute(max_legs, repeat, euler_sequences, min_seconds))
+    if include_plot:
+        results.update(benchmark_plot_render(repeat))
+    return {'environment': environment(), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the rotation core and gate on throughput regressions')
+    parser.add_argument('--max-legs', type=float, default=1e4, help='longest plan in the sweep (full sweep: 1e6)')
+    parser.add_argument('--repeat', type=int, default=7, help='timed samples per case; the median is reported')
+    parser.add_argument('--min-seconds', type=float, default=0.2, help='minimum duration of each timed sample')
+    parser.add_argument('--sequences', nargs='+', default=list(EULER_SEQUENCES))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed fractional throughput drop, beyond the measured spread, before a case fails')
+    parser.add_argument('--update-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--output', help='also write these results to a JSON file')
+    parser.add_argument('--skip-import', action='store_true')
+    parser.add_argument('--skip-plot', action='store_true')
+    arguments = parser.parse_args(argv)
+
+    report = run_benchmarks(int(arguments.max_legs), arguments.repeat, not arguments.skip_import,
+                            not arguments.skip_plot, arguments.sequences, arguments.min_seconds)
+    for name, result in sorted(report['results'].items()):
+        print(f'{name:<70} {result["throughput"]:>14.1f} {result["unit"]:<10} +/-{result["spread"]:.0%}')
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if arguments.update_baseline:
+        with open(arguments.baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f'Baseline written to {arguments.baseline}')
+        return 0
+    if not os.path.exists(arguments.baseline):
+        print(f'No baseline at {arguments.baseline}, run with --update-baseline to create one')
+        return 0
+
+    with open(arguments.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_to_baseline(report['results'], baseline, arguments.threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression["case"]}: {regression["current"]:.1f} {regression["unit"]} vs baseline '
+              f'{regression["baseline"]:.1f} ({regression["change"]:+.0%}, allowed -{regression["allowed_drop"]:.0%})')
+    # Throughput only compares on the machine and library versions the baseline was recorded with
+    if baseline.get('environment') != report['environment']:
+        print('Baseline was recorded in a different environment; reporting only, not gating')
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
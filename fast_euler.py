@@ -0,0 +1,197 @@
+import math
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+import rotation_cache
+
+# Closed-form Euler <-> quaternion conversions for the sequences used throughout the planners
+# Quaternions are scalar-last and every result matches scipy's Rotation to within 1e-12
+# Each entry holds the elementary axes in composition order and the constants of the quaternion -> Euler formula
+# (Bernardes & Viollet 2022, the method scipy uses): permuted axes i, j, k, parity sign and whether it is symmetric
+FAST_SEQUENCES = {
+    'ZYX': {'axes': (2, 1, 0), 'i': 0, 'j': 1, 'k': 2, 'sign': 1, 'symmetric': False},
+    'XYZ': {'axes': (0, 1, 2), 'i': 2, 'j': 1, 'k': 0, 'sign': -1, 'symmetric': False},
+    'ZXZ': {'axes': (2, 0, 2), 'i': 2, 'j': 0, 'k': 1, 'sign': 1, 'symmetric': True},
+}
+
+# Middle angles this close to 0 or pi (radians) are gimbal locked; those conversions are left to scipy
+GIMBAL_LOCK_TOLERANCE = 1e-7
+
+
+def _compose_scalar(left, right):
+    left_x, left_y, left_z, left_w = left
+    right_x, right_y, right_z, right_w = right
+    return (left_w * right_x + left_x * right_w + left_y * right_z - left_z * right_y,
+            left_w * right_y - left_x * right_z + left_y * right_w + left_z * right_x,
+            left_w * right_z + left_x * right_y - left_y * right_x + left_z * right_w,
+            left_w * right_w - left_x * right_x - left_y * right_y - left_z * right_z)
+
+
+def _elementary_scalar(axis, angle):
+    quaternion = [0., 0., 0., math.cos(angle / 2)]
+    quaternion[axis] = math.sin(angle / 2)
+    return quaternion
+
+
+def _euler_to_quaternion_scalar(constants, angles):
+    # Pure-float path for a single 3-vector, where numpy call overhead would dominate
+    first, second, third = constants['axes']
+    return _compose_scalar(_compose_scalar(_elementary_scalar(first, angles[0]), _elementary_scalar(second, angles[1])),
+                           _elementary_scalar(third, angles[2]))
+
+
+def _euler_to_quaternion_array(constants, angles):
+    half_angles = angles / 2
+    quaternions = np.zeros(angles.shape[:-1] + (3, 4))
+    for position, axis in enumerate(constants['axes']):
+        quaternions[..., position, axis] = np.sin(half_angles[..., position])
+        quaternions[..., position, 3] = np.cos(half_angles[..., position])
+    return _compose_array(_compose_array(quaternions[..., 0, :], quaternions[..., 1, :]), quaternions[..., 2, :])
+
+
+def _compose_array(left, right):
+    left_x, left_y, left_z, left_w = left[..., 0], left[..., 1], left[..., 2], left[..., 3]
+    right_x, right_y, right_z, right_w = right[..., 0], right[..., 1], right[..., 2], right[..., 3]
+    return np.stack([left_w * right_x + left_x * right_w + left_y * right_z - left_z * right_y,
+                     left_w * right_y - left_x * right_z + left_y * right_w + left_z * right_x,
+                     left_w * right_z + left_x * right_y - left_y * right_x + left_z * right_w,
+                     left_w * right_w - left_x * right_x - left_y * right_y - left_z * right_z], axis=-1)
+
+
+def euler_to_quaternion(euler_sequence, angles, degrees=True):
+    # Drop-in for R.from_euler(seq, angles, degrees).as_quat() with (3,) or (..., 3) angles
+    constants = FAST_SEQUENCES.get(euler_sequence)
+    if constants is None:
+        return R.from_euler(seq=euler_sequence, angles=angles, degrees=degrees).as_quat()
+    if np.ndim(angles) == 1 and len(angles) == 3:
+        angles = [float(angle) for angle in angles]
+        if degrees:
+            angles = [math.radians(angle) for angle in angles]
+        return np.array(_euler_to_quaternion_scalar(constants, angles))
+    angles = np.asarray(angles, dtype=float)
+    if degrees:
+        angles = np.radians(angles)
+    return _euler_to_quaternion_array(constants, angles)
+
+
+def _wrap_scalar(angle):
+    # Same wrap as scipy: only angles outside [-pi, pi] move, so an exact +pi stays +pi instead of becoming -pi
+    if angle < -math.pi:
+        return angle + 2 * math.pi
+    if angle > math.pi:
+        return angle - 2 * math.pi
+    return angle
+
+
+def _quaternion_to_euler_scalar(constants, quaternion):
+    x, y, z, w = quaternion
+    components = (x, y, z)
+    i, j, k, sign = constants['i'], constants['j'], constants['k'], constants['sign']
+    if constants['symmetric']:
+        a, b, c, d = w, components[i], components[j], components[k] * sign
+    else:
+        a = w - components[j]
+        b = components[i] + components[k] * sign
+        c = components[j] + w
+        d = components[k] * sign - components[i]
+    middle = 2 * math.atan2(math.hypot(c, d), math.hypot(a, b))
+    if abs(middle) <= GIMBAL_LOCK_TOLERANCE or abs(middle - math.pi) <= GIMBAL_LOCK_TOLERANCE:
+        return None
+    half_sum = math.atan2(b, a)
+    half_diff = math.atan2(d, c)
+    # Intrinsic sequences are solved as the reversed extrinsic sequence, so the outer angles swap places
+    third = half_sum - half_diff
+    first = half_sum + half_diff
+    if not constants['symmetric']:
+        first *= sign
+        middle -= math.pi / 2
+    return tuple(_wrap_scalar(angle) for angle in (first, middle, third))
+
+
+def quaternion_to_euler(euler_sequence, quaternions, degrees=True):
+    # Drop-in for R.from_quat(quaternions).as_euler(seq, degrees) with (4,) or (..., 4) quaternions
+    # Single quaternions that fall back to scipy go through the active rotation cache, if any
+    constants = FAST_SEQUENCES.get(euler_sequence)
+    if constants is None:
+        return rotation_cache.as_euler(R.from_quat(quaternions), euler_sequence, degrees)
+    if np.ndim(quaternions) == 1:
+        quaternion = [float(component) for component in quaternions]
+        norm = math.sqrt(sum(component * component for component in quaternion))
+        angles = _quaternion_to_euler_scalar(constants, [component / norm for component in quaternion])
+        if angles is None:
+            return rotation_cache.as_euler(R.from_quat(quaternions), euler_sequence, degrees)
+        if degrees:
+            angles = [math.degrees(angle) for angle in angles]
+        return np.array(angles)
+
+    quaternions = np.asarray(quaternions, dtype=float)
+    quaternions = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    components = quaternions[..., :3]
+    w = quaternions[..., 3]
+    i, j, k, sign = constants['i'], constants['j'], constants['k'], constants['sign']
+    if constants['symmetric']:
+        a, b, c, d = w, components[..., i], components[..., j], components[..., k] * sign
+    else:
+        a = w - components[..., j]
+        b = components[..., i] + components[..., k] * sign
+        c = components[..., j] + w
+        d = components[..., k] * sign - components[..., i]
+    middle = 2 * np.arctan2(np.hypot(c, d), np.hypot(a, b))
+    if np.any((np.abs(middle) <= GIMBAL_LOCK_TOLERANCE) | (np.abs(middle - np.pi) <= GIMBAL_LOCK_TOLERANCE)):
+        return R.from_quat(quaternions).as_euler(seq=euler_sequence, degrees=degrees)
+    half_sum = np.arctan2(b, a)
+    half_diff = np.arctan2(d, c)
+    first = half_sum + half_diff
+    if not constants['symmetric']:
+        first *= sign
+        middle -= np.pi / 2
+    angles = np.stack([first, middle, half_sum - half_diff], axis=-1)
+    angles = np.where(angles < -np.pi, angles + 2 * np.pi, np.where(angles > np.pi, angles - 2 * np.pi, angles))
+    return np.degrees(angles) if degrees else angles
+
+
+def compute_single_maneuver(initial_attitude, euler_angles, euler_angle_type='commanded_attitude',
+                            euler_sequence='ZYX', degrees=True):
+    # Low-latency counterpart of compute_single_rotation that works in Euler angles end to end
+    # Returns (maneuver_angles, final_attitude_angles) as length-3 arrays
+    if euler_sequence not in FAST_SEQUENCES:
+        initial_rotation = rotation_cache.from_euler(euler_sequence, initial_attitude, degrees)
+        commanded_rotation = rotation_cache.from_euler(euler_sequence, euler_angles, degrees)
+        if euler_angle_type == 'commanded_attitude':
+            rotation, final_attitude = commanded_rotation * initial_rotation.inv(), commanded_rotation
+        elif euler_angle_type == 'commanded_maneuver':
+            rotation, final_attitude = commanded_rotation, commanded_rotation * initial_rotation
+        else:
+            raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+        return rotation_cache.as_euler(rotation, euler_sequence, degrees), \
+            rotation_cache.as_euler(final_attitude, euler_sequence, degrees)
+
+    constants = FAST_SEQUENCES[euler_sequence]
+    initial_angles = [float(angle) for angle in initial_attitude]
+    commanded_angles = [float(angle) for angle in euler_angles]
+    if degrees:
+        initial_angles = [math.radians(angle) for angle in initial_angles]
+        commanded_angles = [math.radians(angle) for angle in commanded_angles]
+    initial_quaternion = _euler_to_quaternion_scalar(constants, initial_angles)
+    commanded_quaternion = _euler_to_quaternion_scalar(constants, commanded_angles)
+    if euler_angle_type == 'commanded_attitude':
+        inverse_initial = (-initial_quaternion[0], -initial_quaternion[1], -initial_quaternion[2],
+                           initial_quaternion[3])
+        maneuver_quaternion = _compose_scalar(commanded_quaternion, inverse_initial)
+        final_quaternion = commanded_quaternion
+    elif euler_angle_type == 'commanded_maneuver':
+        maneuver_quaternion = commanded_quaternion
+        final_quaternion = _compose_scalar(commanded_quaternion, initial_quaternion)
+    else:
+        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+
+    results = []
+    for quaternion in (maneuver_quaternion, final_quaternion):
+        norm = math.sqrt(sum(component * component for component in quaternion))
+        angles = _quaternion_to_euler_scalar(constants, [component / norm for component in quaternion])
+        if angles is None:
+            results.append(rotation_cache.as_euler(R.from_quat(quaternion), euler_sequence, degrees))
+            continue
+        if degrees:
+            angles = [math.degrees(angle) for angle in angles]
+        results.append(np.array(angles))
+    return results[0], results[1]
@@ -0,0 +1,99 @@
+import time
+import numpy as np
+from attitude_control_core import chain_attitude_quaternions, compose_quaternions, cumulative_quaternions
+from fast_euler import euler_to_quaternion, quaternion_to_euler
+from reference_frames import CONJUGATE, check_convention
+
+# Rough working memory per vehicle-leg inside a chunk: command, maneuver and attitude quaternions, the prefix-scan
+# scratch and the temporaries of the Euler conversion, all float64
+FLEET_BYTES_PER_LEG = 40 * 8
+
+
+def plan_fleet(initial_attitudes, commands, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+               degrees=True, max_chunk_bytes=256 * 2 ** 20, include_quaternions=False, reference_frame='ENU',
+               rotation_direction='body_to_inertial'):
+    # Plans M vehicles at once: initial_attitudes is (M, 3) and commands is either an (N, 3) list shared by every
+    # vehicle or an (M, N, 3) per-vehicle tensor
+    # Returns dense arrays indexed [vehicle, leg]: maneuvers (M, N, 3) and attitudes (M, N + 1, 3), where
+    # attitudes[:, 0] are the initial attitudes as given
+    # Vehicles are processed in chunks so the working memory stays near max_chunk_bytes on top of the outputs
+    # Inputs and outputs are in the given convention; as in chain_attitudes, inertial-to-body quaternions are
+    # conjugated on the way in and out and composed body-to-inertial
+    start_time = time.perf_counter()
+    if euler_angle_type not in ('commanded_attitude', 'commanded_maneuver'):
+        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+    check_convention(reference_frame, rotation_direction)
+    conjugate = CONJUGATE if rotation_direction == 'inertial_to_body' else 1.
+    initial_attitudes = np.asarray(initial_attitudes, dtype=float).reshape(-1, 3)
+    commands = np.asarray(commands, dtype=float)
+    num_vehicles = len(initial_attitudes)
+    shared_commands = commands.ndim == 2
+    if commands.shape[-1:] != (3,) or commands.ndim not in (2, 3):
+        raise ValueError(f'commands must have shape (N, 3) or (M, N, 3), got {commands.shape}')
+    if not shared_commands and len(commands) != num_vehicles:
+        raise ValueError(f'{len(commands)} command sequences for {num_vehicles} vehicles')
+    num_legs = commands.shape[-2]
+
+    maneuvers = np.empty((num_vehicles, num_legs, 3))
+    attitudes = np.empty((num_vehicles, num_legs + 1, 3))
+    attitudes[:, 0] = initial_attitudes
+    maneuver_quaternions = np.empty((num_vehicles, num_legs, 4)) if include_quaternions else None
+    attitude_quaternions = np.empty((num_vehicles, num_legs + 1, 4)) if include_quaternions else None
+    initial_quaternions = euler_to_quaternion(euler_sequence, initial_attitudes, degrees).reshape(-1, 4) * conjugate
+    if include_quaternions:
+        attitude_quaternions[:, 0] = initial_quaternions * conjugate
+
+    def to_euler(quaternions):
+        return quaternion_to_euler(euler_sequence, quaternions * conjugate, degrees)
+
+    # With a shared command list everything that does not depend on the initial attitude is computed once and
+    # broadcast: in commanded_attitude mode that is every attitude and every maneuver after the first, in
+    # commanded_maneuver mode every maneuver and the cumulative command product
+    if shared_commands and num_legs:
+        commanded_quaternions = euler_to_quaternion(euler_sequence, commands, degrees).reshape(-1, 4) * conjugate
+        if euler_angle_type == 'commanded_attitude':
+            attitudes[:, 1:] = to_euler(commanded_quaternions)
+            tail_quaternions, _ = chain_attitude_quaternions(commanded_quaternions[0], commanded_quaternions[1:],
+                                                             euler_angle_type)
+            maneuvers[:, 1:] = to_euler(tail_quaternions)
+            if include_quaternions:
+                attitude_quaternions[:, 1:] = commanded_quaternions * conjugate
+                maneuver_quaternions[:, 1:] = tail_quaternions * conjugate
+        else:
+            maneuvers[:] = to_euler(commanded_quaternions)
+            command_products = cumulative_quaternions(commanded_quaternions)
+            if include_quaternions:
+                maneuver_quaternions[:] = commanded_quaternions * conjugate
+
+    chunk_vehicles = max(1, max_chunk_bytes // (FLEET_BYTES_PER_LEG * max(num_legs, 1)))
+    for start in range(0, num_vehicles if num_legs else 0, chunk_vehicles):
+        stop = min(start + chunk_vehicles, num_vehicles)
+        chunk_initial = initial_quaternions[start:stop]
+        if shared_commands and euler_angle_type == 'commanded_attitude':
+            inverse_initial = chunk_initial * CONJUGATE
+            first_maneuvers = compose_quaternions(commanded_quaternions[0], inverse_initial)
+            maneuvers[start:stop, 0] = to_euler(first_maneuvers)
+            if include_quaternions:
+                maneuver_quaternions[start:stop, 0] = first_maneuvers * conjugate
+            continue
+        if shared_commands:
+            chunk_attitudes = compose_quaternions(command_products, chunk_initial[:, np.newaxis, :])
+        else:
+            chunk_commands = euler_to_quaternion(euler_sequence, commands[start:stop], degrees) * conjugate
+            chunk_maneuvers, chunk_attitudes = chain_attitude_quaternions(chunk_initial, chunk_commands,
+                                                                          euler_angle_type)
+            maneuvers[start:stop] = to_euler(chunk_maneuvers)
+            if include_quaternions:
+                maneuver_quaternions[start:stop] = chunk_maneuvers * conjugate
+        attitudes[start:stop, 1:] = to_euler(chunk_attitudes)
+        if include_quaternions:
+            attitude_quaternions[start:stop, 1:] = chunk_attitudes * conjugate
+
+    elapsed_seconds = time.perf_counter() - start_time
+    results = {'maneuvers': maneuvers, 'attitudes': attitudes, 'reference_frame': reference_frame,
+               'rotation_direction': rotation_direction, 'elapsed_seconds': elapsed_seconds,
+               'legs_per_second': num_vehicles * num_legs / elapsed_seconds if elapsed_seconds > 0 else float('inf')}
+    if include_quaternions:
+        results['maneuver_quaternions'] = maneuver_quaternions
+        results['attitude_quaternions'] = attitude_quaternions
+    return results
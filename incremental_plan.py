@@ -0,0 +1,165 @@
+import numpy as np
+from attitude_control_core import ManeuverPlan, compose_quaternions, plan_maneuvers
+from fast_euler import euler_to_quaternion, quaternion_to_euler
+from reference_frames import CONJUGATE, check_convention
+
+
+class IncrementalPlan:
+    # Editable counterpart of combine_rotations for interactive re-planning: edit, insert and delete single commands
+    # and only the legs that depend on them are recomputed
+    # commanded_attitude: command k only feeds attitude k, so maneuvers k and k + 1 are the only ones to redo
+    # commanded_maneuver: attitudes from k onward move together, which is one composition with a fixed correction
+    # Euler angles are converted lazily, only for rows that changed since they were last read
+    # Quaternions are held body-to-inertial, the direction everything composes in; with
+    # rotation_direction='inertial_to_body' they are conjugated whenever they cross to or from the caller's angles
+    def __init__(self, initial_attitude, angle_dictionary, euler_angle_type='commanded_attitude', euler_sequence='ZYX',
+                 degrees=True, reference_frame='ENU', rotation_direction='body_to_inertial'):
+        if euler_angle_type not in ('commanded_attitude', 'commanded_maneuver'):
+            raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+        check_convention(reference_frame, rotation_direction)
+        self.reference_frame = reference_frame
+        self.rotation_direction = rotation_direction
+        self._conjugate = CONJUGATE if rotation_direction == 'inertial_to_body' else 1.
+        self.initial_attitude = np.array(initial_attitude, dtype=float)
+        self.euler_angle_type = euler_angle_type
+        self.euler_sequence = euler_sequence
+        self.degrees = degrees
+        self._indices = list(angle_dictionary)
+        self._commands = np.array(list(angle_dictionary.values()), dtype=float).reshape(-1, 3)
+        self.rebuild()
+
+    def rebuild(self):
+        # Full recomputation from the commands, which also clears any rounding drift from many tail corrections
+        plan = plan_maneuvers(self.initial_attitude, self._commands, self.euler_angle_type, self.euler_sequence,
+                              self.degrees, reference_frame=self.reference_frame,
+                              rotation_direction=self.rotation_direction)
+        self._attitude_quaternions = plan.attitude_quaternions * self._conjugate
+        self._maneuver_quaternions = plan.maneuver_quaternions * self._conjugate
+        self._attitude_euler = np.empty((len(self._indices) + 1, 3))
+        self._attitude_euler[0] = self.initial_attitude
+        self._maneuver_euler = np.empty((len(self._indices), 3))
+        self._attitude_stale = np.ones(len(self._indices) + 1, dtype=bool)
+        self._attitude_stale[0] = False
+        self._maneuver_stale = np.ones(len(self._indices), dtype=bool)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __contains__(self, index):
+        return index in self._indices
+
+    @property
+    def indices(self):
+        return list(self._indices)
+
+    def _position(self, index):
+        try:
+            return self._indices.index(index)
+        except ValueError:
+            raise KeyError(index) from None
+
+    def _refresh_maneuvers(self, *positions):
+        # commanded_attitude: maneuver k takes attitude k to attitude k + 1
+        positions = [position for position in positions if 0 <= position < len(self)]
+        if positions:
+            positions = np.array(positions)
+            self._maneuver_quaternions[positions] = compose_quaternions(
+                self._attitude_quaternions[positions + 1], self._attitude_quaternions[positions] * CONJUGATE)
+            self._maneuver_stale[positions] = True
+
+    def _rebase_attitudes(self, start, old_anchor, new_anchor):
+        # commanded_maneuver: attitudes from `start` on were chained from old_anchor and now chain from new_anchor
+        # Each is attitude * (old_anchor^-1 * new_anchor), a single composition across the whole tail
+        if start < len(self._attitude_quaternions):
+            correction = compose_quaternions(old_anchor * CONJUGATE, new_anchor)
+            tail = compose_quaternions(self._attitude_quaternions[start:], correction)
+            self._attitude_quaternions[start:] = tail / np.linalg.norm(tail, axis=-1, keepdims=True)
+            self._attitude_stale[start:] = True
+
+    def edit(self, index, angles):
+        position = self._position(index)
+        quaternion = euler_to_quaternion(self.euler_sequence, angles, self.degrees) * self._conjugate
+        self._commands[position] = angles
+        if self.euler_angle_type == 'commanded_attitude':
+            self._attitude_quaternions[position + 1] = quaternion
+            self._attitude_stale[position + 1] = True
+            self._refresh_maneuvers(position, position + 1)
+        else:
+            self._maneuver_quaternions[position] = quaternion
+            self._maneuver_stale[position] = True
+            old_anchor = self._attitude_quaternions[position + 1].copy()
+            self._set_attitude(position + 1, compose_quaternions(quaternion, self._attitude_quaternions[position]))
+            self._rebase_attitudes(position + 2, old_anchor, self._attitude_quaternions[position + 1])
+
+    def insert(self, index, angles, before=None):
+        # Adds a new command ahead of the command keyed `before`, or at the end of the plan when before is None
+        if index in self._indices:
+            raise ValueError(f'index {index} is already in the plan, use edit to change it')
+        position = len(self) if before is None else self._position(before)
+        quaternion = euler_to_quaternion(self.euler_sequence, angles, self.degrees) * self._conjugate
+        self._indices.insert(position, index)
+        self._commands = np.insert(self._commands, position, angles, axis=0)
+        self._attitude_quaternions = np.insert(self._attitude_quaternions, position + 1, quaternion, axis=0)
+        self._maneuver_quaternions = np.insert(self._maneuver_quaternions, position, quaternion, axis=0)
+        self._attitude_euler = np.insert(self._attitude_euler, position + 1, 0, axis=0)
+        self._maneuver_euler = np.insert(self._maneuver_euler, position, 0, axis=0)
+        self._attitude_stale = np.insert(self._attitude_stale, position + 1, True)
+        self._maneuver_stale = np.insert(self._maneuver_stale, position, True)
+        if self.euler_angle_type == 'commanded_attitude':
+            self._refresh_maneuvers(position, position + 1)
+        else:
+            self._set_attitude(position + 1, compose_quaternions(quaternion, self._attitude_quaternions[position]))
+            self._rebase_attitudes(position + 2, self._attitude_quaternions[position],
+                                   self._attitude_quaternions[position + 1])
+
+    def delete(self, index):
+        position = self._position(index)
+        old_anchor = self._attitude_quaternions[position + 1].copy()
+        del self._indices[position]
+        self._commands = np.delete(self._commands, position, axis=0)
+        self._attitude_quaternions = np.delete(self._attitude_quaternions, position + 1, axis=0)
+        self._maneuver_quaternions = np.delete(self._maneuver_quaternions, position, axis=0)
+        self._attitude_euler = np.delete(self._attitude_euler, position + 1, axis=0)
+        self._maneuver_euler = np.delete(self._maneuver_euler, position, axis=0)
+        self._attitude_stale = np.delete(self._attitude_stale, position + 1)
+        self._maneuver_stale = np.delete(self._maneuver_stale, position)
+        if self.euler_angle_type == 'commanded_attitude':
+            self._refresh_maneuvers(position)
+        else:
+            self._rebase_attitudes(position + 1, old_anchor, self._attitude_quaternions[position])
+
+    def _set_attitude(self, position, quaternion):
+        self._attitude_quaternions[position] = quaternion / np.linalg.norm(quaternion)
+        self._attitude_stale[position] = True
+
+    def attitude_euler(self):
+        stale = np.flatnonzero(self._attitude_stale)
+        if len(stale):
+            self._attitude_euler[stale] = quaternion_to_euler(
+                self.euler_sequence, self._attitude_quaternions[stale] * self._conjugate, self.degrees)
+            self._attitude_stale[stale] = False
+        return self._attitude_euler
+
+    def maneuver_euler(self):
+        stale = np.flatnonzero(self._maneuver_stale)
+        if len(stale):
+            self._maneuver_euler[stale] = quaternion_to_euler(
+                self.euler_sequence, self._maneuver_quaternions[stale] * self._conjugate, self.degrees)
+            self._maneuver_stale[stale] = False
+        return self._maneuver_euler
+
+    def to_plan(self):
+        # Snapshot of the current state; later edits do not change the returned plan
+        plan = ManeuverPlan(self._attitude_quaternions * self._conjugate, self._maneuver_quaternions * self._conjugate,
+                            indices=list(self._indices), euler_angle_type=self.euler_angle_type,
+                            euler_sequence=self.euler_sequence, degrees=self.degrees,
+                            initial_attitude=self.initial_attitude, reference_frame=self.reference_frame,
+                            rotation_direction=self.rotation_direction)
+        plan._attitude_euler = self.attitude_euler().copy()
+        plan._maneuver_euler = self.maneuver_euler().copy()
+        return plan
+
+    def dictionaries(self):
+        # Same (maneuver_dictionary, attitude_dictionary) pair that combine_rotations returns
+        plan = self.to_plan()
+        return plan.maneuver_dictionary, plan.attitude_dictionary
@@ -0,0 +1,162 @@
+import json
+import time
+import tracemalloc
+from array import array
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
+
+
+class Profiler:
+    # Per-stage call counts, latencies and (with track_memory) peak bytes allocated inside the stage
+    # Peak memory uses tracemalloc, which slows everything down noticeably, so it is off by default
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        # Set when this profiler turned tracemalloc on, so it knows to turn it off again
+        self.started_tracing = False
+        self._durations = {}
+        self._allocated_bytes = {}
+        self._open_stages = []
+
+    def record(self, stage_name, seconds, allocated_bytes=0):
+        if stage_name not in self._durations:
+            self._durations[stage_name] = array('d')
+            self._allocated_bytes[stage_name] = 0
+        self._durations[stage_name].append(seconds)
+        self._allocated_bytes[stage_name] += allocated_bytes
+
+    def report(self):
+        report = {}
+        for stage_name, durations in self._durations.items():
+            durations = np.frombuffer(durations, dtype=float)
+            p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+            report[stage_name] = {'calls': len(durations), 'total_seconds': float(durations.sum()),
+                                  'mean_seconds': float(durations.mean()), 'p50_seconds': float(p50),
+                                  'p90_seconds': float(p90), 'p99_seconds': float(p99),
+                                  'max_seconds': float(durations.max()),
+                                  'allocated_bytes': self._allocated_bytes[stage_name]}
+        return report
+
+    def to_json(self, path=None):
+        report_json = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, 'w') as report_file:
+                report_file.write(report_json)
+        return report_json
+
+    def reset(self):
+        self._durations.clear()
+        self._allocated_bytes.clear()
+
+
+class _Stage:
+    # tracemalloc has a single peak counter, so a stage resets it on entry and hands the peak it saw on to the stage
+    # around it on exit; nested stages then each report their own peak without hiding the outer one's
+    __slots__ = ('profiler', 'name', 'start_time', 'memory_start', 'memory_peak')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            open_stages = self.profiler._open_stages
+            if open_stages:
+                open_stages[-1].memory_peak = max(open_stages[-1].memory_peak, peak)
+            self.memory_start = current
+            self.memory_peak = current
+            open_stages.append(self)
+            tracemalloc.reset_peak()
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception_info):
+        seconds = time.perf_counter() - self.start_time
+        allocated_bytes = 0
+        if self.profiler.track_memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self.memory_peak)
+            open_stages = self.profiler._open_stages
+            open_stages.pop()
+            if open_stages:
+                open_stages[-1].memory_peak = max(open_stages[-1].memory_peak, peak)
+            allocated_bytes = max(0, peak - self.memory_start)
+        self.profiler.record(self.name, seconds, allocated_bytes)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# Profiling is opt-in: with no active profiler every stage is a shared no-op context manager
+_active_profiler = None
+
+
+def stage(stage_name):
+    if _active_profiler is None:
+        return _NULL_STAGE
+    return _Stage(_active_profiler, stage_name)
+
+
+def instrumented(stage_name):
+    # Decorator form of stage for whole functions
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_profiler is None:
+                return function(*args, **kwargs)
+            with _Stage(_active_profiler, stage_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_profiling(track_memory=False):
+    # Replaces any active profiler, stopping the tracing it started
+    global _active_profiler
+    disable_profiling()
+    profiler = Profiler(track_memory=track_memory)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        profiler.started_tracing = True
+    _active_profiler = profiler
+    return profiler
+
+
+def disable_profiling():
+    global _active_profiler
+    profiler = _active_profiler
+    _active_profiler = None
+    if profiler is not None and profiler.started_tracing:
+        tracemalloc.stop()
+        profiler.started_tracing = False
+    return profiler
+
+
+def get_profiler():
+    return _active_profiler
+
+
+@contextmanager
+def profiling(track_memory=False):
+    global _active_profiler
+    previous_profiler = _active_profiler
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active_profiler = Profiler(track_memory=track_memory)
+    try:
+        yield _active_profiler
+    finally:
+        _active_profiler = previous_profiler
+        if started_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,140 @@
+import time
+import numpy as np
+from collections.abc import Mapping
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import ManeuverPlan, euler_sequence_decoder, slerp_quaternions
+from batch_plotting import AXIS_COLORS, AXIS_LABELS, body_axis_segments
+from reference_frames import display_matrices
+
+# Memory held by one precomputed frame: quaternion, rotation matrix and quiver segments, all float64
+FRAME_BYTES = (4 + 9 + 54) * 8
+
+
+def attitude_quaternions_from(attitudes, euler_sequence='ZYX', degrees=True):
+    # Accepts a ManeuverPlan, an attitude dictionary from combine_rotations, or a (K, 3) array of Euler angles
+    if isinstance(attitudes, ManeuverPlan):
+        return np.asarray(attitudes.attitude_quaternions, dtype=float)
+    if isinstance(attitudes, Mapping):
+        attitudes = list(attitudes.values())
+    return R.from_euler(seq=euler_sequence, angles=np.asarray(attitudes, dtype=float).reshape(-1, 3),
+                        degrees=degrees).as_quat()
+
+
+def maneuver_frame_blocks(attitude_quaternions, frames_per_leg, max_block_bytes=64 * 2 ** 20):
+    # Yields (leg_numbers, frame_quaternions) a block of legs at a time so long plans never hold every frame at once
+    # Each leg contributes frames_per_leg frames starting at its initial attitude; the final attitude closes the run
+    num_legs = len(attitude_quaternions) - 1
+    block_legs = max(1, max_block_bytes // (frames_per_leg * FRAME_BYTES))
+    fractions = np.arange(frames_per_leg) / frames_per_leg
+    for start in range(0, num_legs, block_legs):
+        stop = min(start + block_legs, num_legs)
+        frame_quaternions = slerp_quaternions(attitude_quaternions[start:stop], attitude_quaternions[start + 1:stop + 1],
+                                              fractions).reshape(-1, 4)
+        leg_numbers = np.repeat(np.arange(start + 1, stop + 1), frames_per_leg)
+        if stop == num_legs:
+            frame_quaternions = np.concatenate([frame_quaternions, attitude_quaternions[-1:]])
+            leg_numbers = np.append(leg_numbers, num_legs)
+        yield leg_numbers, frame_quaternions
+
+
+def _streaming_gif_writer_class():
+    from matplotlib.animation import AbstractMovieWriter
+    from PIL import GifImagePlugin, Image
+
+    class StreamingGifWriter(AbstractMovieWriter):
+        # Writes every grabbed frame straight to the GIF file with Pillow, so memory does not grow with frame count
+        def setup(self, fig, outfile, dpi=None):
+            super().setup(fig, outfile, dpi=dpi)
+            self._file = open(outfile, 'wb')
+            self._wrote_header = False
+            self._duration = int(round(1000 / self.fps))
+
+        def grab_frame(self, **savefig_kwargs):
+            self.fig.set_dpi(self.dpi)
+            self.fig.canvas.draw()
+            frame = Image.fromarray(np.asarray(self.fig.canvas.buffer_rgba())[..., :3]).quantize(colors=256)
+            if not self._wrote_header:
+                for chunk in GifImagePlugin.getheader(frame, None, {'loop': 0, 'duration': self._duration})[0]:
+                    self._file.write(chunk)
+                self._wrote_header = True
+            for chunk in GifImagePlugin.getdata(frame, (0, 0), duration=self._duration, include_color_table=True):
+                self._file.write(chunk)
+
+        def finish(self):
+            self._file.write(b';')
+            self._file.close()
+
+    return StreamingGifWriter
+
+
+def export_maneuver_animation(attitudes, output_path, frames_per_leg=30, fps=30, euler_sequence='ZYX', degrees=True,
+                              dpi=80, max_block_bytes=64 * 2 ** 20, writer=None, reference_frame='ENU',
+                              rotation_direction='body_to_inertial'):
+    # Animates the body frame through every leg of a plan with SLERP between consecutive attitudes
+    # attitudes is anything attitude_quaternions_from accepts; writer defaults to the in-process streaming GIF writer
+    # Plans are drawn and labelled in their own sequence, unit and frame convention; other inputs use the arguments
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if isinstance(attitudes, ManeuverPlan):
+        euler_sequence, degrees = attitudes.euler_sequence, attitudes.degrees
+        reference_frame, rotation_direction = attitudes.reference_frame, attitudes.rotation_direction
+    attitude_quaternions = attitude_quaternions_from(attitudes, euler_sequence, degrees)
+    if len(attitude_quaternions) < 2:
+        raise ValueError('at least two attitudes are needed to animate a maneuver')
+    num_legs = len(attitude_quaternions) - 1
+    disp_sequence = euler_sequence_decoder(euler_sequence)
+
+    figure = Figure(figsize=(6, 5), dpi=dpi)
+    FigureCanvasAgg(figure)
+    axis = figure.add_subplot(111, projection='3d')
+    axis.set_xlabel('x')
+    axis.set_ylabel('y')
+    axis.set_zlabel('z')
+    axis.set_xlim(-1, 1)
+    axis.set_ylim(-1, 1)
+    axis.set_zlim(-1, 1)
+    axis.xaxis.set_ticks(np.arange(-1, 1.5, 1))
+    axis.yaxis.set_ticks(np.arange(-1, 1.5, 1))
+    axis.zaxis.set_ticks(np.arange(-1, 1.5, 1))
+    axis.view_init(azim=110, elev=200)
+
+    # Artists are created once and moved in place on every frame
+    quivers = [axis.quiver(0, 0, 0, 1, 0, 0, color=color) for color in AXIS_COLORS]
+    labels = [axis.text(0, 0, 0, label, color=color) for label, color in zip(AXIS_LABELS, AXIS_COLORS)]
+    title = axis.set_title('')
+    annotation = axis.text2D(x=1.05, y=0.5, s='', transform=axis.transAxes, fontsize=10, ha='left')
+    figure.subplots_adjust(right=0.75)
+
+    if writer is None:
+        writer = _streaming_gif_writer_class()(fps=fps)
+    start_time = time.perf_counter()
+    num_frames = 0
+    with writer.saving(figure, output_path, dpi):
+        for leg_numbers, frame_quaternions in maneuver_frame_blocks(attitude_quaternions, frames_per_leg,
+                                                                    max_block_bytes):
+            frame_rotations = R.from_quat(frame_quaternions)
+            frame_matrices = display_matrices(frame_rotations.as_matrix(), reference_frame, rotation_direction)
+            frame_segments = body_axis_segments(frame_matrices)
+            label_positions = np.swapaxes(frame_matrices, -1, -2)
+            frame_angles = np.round(frame_rotations.as_euler(seq=euler_sequence, degrees=degrees), 2)
+            for frame in range(len(frame_quaternions)):
+                for axis_number in range(3):
+                    quivers[axis_number].set_segments(frame_segments[frame, axis_number])
+                    labels[axis_number].set_position_3d(label_positions[frame, axis_number])
+                title.set_text(f'Maneuver {leg_numbers[frame]} of {num_legs}')
+                angles = frame_angles[frame]
+                annotation.set_text(f'Attitude:\n{disp_sequence[0]} = {angles[0]}\n{disp_sequence[1]} = {angles[1]}'
+                                    f'\n{disp_sequence[2]} = {angles[2]}')
+                writer.grab_frame()
+                num_frames += 1
+    elapsed_seconds = time.perf_counter() - start_time
+    return {'path': output_path, 'frames': num_frames, 'seconds': elapsed_seconds,
+            'frames_per_second': num_frames / elapsed_seconds}
+
+
+def export_single_maneuver_animation(initial_attitude, final_attitude, output_path, euler_sequence='ZYX', degrees=True,
+                                     **animation_options):
+    # Same inputs as plot_single_maneuver
+    return export_maneuver_animation([initial_attitude, final_attitude], output_path, euler_sequence=euler_sequence,
+                                     degrees=degrees, **animation_options)
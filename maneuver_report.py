@@ -0,0 +1,91 @@
+import json
+import sys
+import time
+import numpy as np
+
+REPORT_FORMATS = ('text', 'csv', 'jsonl')
+REPORT_BLOCK_LEGS = 16384
+
+
+def _leg_template(report_format, precision, integer_indices):
+    # printf-style template for one leg; a whole block is rendered with a single % on the repeated template
+    # text reproduces print_maneuvers, which prints each row's numpy repr, so it takes preformatted strings and
+    # ignores precision
+    number = f'%.{precision}f'
+    index = '%d' if integer_indices else '%s'
+    if report_format == 'text':
+        return ('=====================================\nStarting Attitude: %s\n'
+                'Maneuver Required: %s\nEnding Attitude:   %s\n')
+    if report_format == 'csv':
+        return ','.join([index] + [number] * 9) + '\n'
+    if report_format == 'jsonl':
+        triple = ', '.join([number] * 3)
+        return f'{{"index": {index}, "start": [{triple}], "maneuver": [{triple}], "end": [{triple}]}}\n'
+    raise ValueError(f'report_format must be one of {REPORT_FORMATS}, got {report_format!r}')
+
+
+def write_report_arrays(indices, attitude_euler, maneuver_euler, output=None, report_format='text', precision=8,
+                        block_legs=REPORT_BLOCK_LEGS, buffer_size=2 ** 20, starting_attitude=None):
+    # Leg i goes from attitude_euler[i] to attitude_euler[i + 1] through maneuver_euler[i]; starting_attitude, when
+    # given, replaces attitude_euler[0] as the start of the first leg only (print_maneuvers semantics)
+    # output is a path, an open text file or None for stdout; inputs are only read, never modified
+    start_time = time.perf_counter()
+    attitude_euler = np.asarray(attitude_euler, dtype=float).reshape(-1, 3)
+    maneuver_euler = np.asarray(maneuver_euler, dtype=float).reshape(-1, 3)
+    indices = np.asarray(indices)
+    num_legs = len(maneuver_euler)
+    if len(attitude_euler) != num_legs + 1 or len(indices) != num_legs:
+        raise ValueError(f'{len(indices)} indices, {len(attitude_euler)} attitudes and {num_legs} maneuvers, expected '
+                         f'one index per maneuver and exactly one more attitude than maneuvers')
+    integer_indices = np.issubdtype(indices.dtype, np.integer)
+    template = _leg_template(report_format, precision, integer_indices)
+
+    if output is None:
+        output_file, close_output = sys.stdout, False
+    elif isinstance(output, str):
+        output_file, close_output = open(output, 'w', buffering=buffer_size, newline=''), True
+    else:
+        output_file, close_output = output, False
+    try:
+        if report_format == 'csv':
+            output_file.write('index,start_1,start_2,start_3,maneuver_1,maneuver_2,maneuver_3,end_1,end_2,end_3\n')
+        for start in range(0, num_legs, block_legs):
+            stop = min(start + block_legs, num_legs)
+            columns = [attitude_euler[start:stop], maneuver_euler[start:stop], attitude_euler[start + 1:stop + 1]]
+            if report_format == 'text':
+                columns = [[str(row) for row in column] for column in columns]
+                if start == 0 and starting_attitude is not None:
+                    columns[0][0] = str(starting_attitude)
+                values = [value for leg in zip(*columns) for value in leg]
+                output_file.write((template * (stop - start)) % tuple(values))
+                continue
+            if start == 0 and starting_attitude is not None:
+                columns[0] = columns[0].copy()
+                columns[0][0] = starting_attitude
+            block_indices = indices[start:stop]
+            if not integer_indices:
+                render = json.dumps if report_format == 'jsonl' else str
+                block_indices = np.array([render(index) for index in block_indices.tolist()], dtype=object)
+            columns.insert(0, block_indices[:, np.newaxis])
+            values = np.concatenate([np.asarray(column, dtype=object) for column in columns], axis=1)
+            output_file.write((template * (stop - start)) % tuple(values.ravel().tolist()))
+        output_file.flush()
+    finally:
+        if close_output:
+            output_file.close()
+    elapsed_seconds = time.perf_counter() - start_time
+    return {'legs': num_legs, 'seconds': elapsed_seconds,
+            'legs_per_minute': 60 * num_legs / elapsed_seconds if elapsed_seconds > 0 else float('inf')}
+
+
+def write_plan_report(plan, output=None, report_format='text', **report_options):
+    return write_report_arrays(plan.indices, plan.attitude_euler(), plan.maneuver_euler(), output, report_format,
+                               **report_options)
+
+
+def write_maneuver_report(initial_attitude, maneuver_dictionary, attitude_dictionary, output=None,
+                          report_format='text', **report_options):
+    # Same inputs as print_maneuvers, including its use of initial_attitude as the start of the first leg
+    return write_report_arrays(list(maneuver_dictionary), list(attitude_dictionary.values()),
+                               list(maneuver_dictionary.values()), output, report_format,
+                               starting_attitude=initial_attitude, **report_options)
@@ -0,0 +1,86 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import chain_attitude_quaternions, quaternion_angles
+from reference_frames import CONJUGATE, check_convention
+
+RESULT_KEYS = ('initial_attitudes', 'commands', 'maneuvers', 'attitudes', 'slew_angles')
+
+
+def _run_trial_chunk(chunk_seed, num_trials, initial_attitude, initial_attitude_spread, command_template,
+                     command_spread, euler_angle_type, euler_sequence, degrees, rotation_direction='body_to_inertial'):
+    # Samples and plans a whole chunk of trials at once; every trial is one row of the stacked arrays
+    # Quaternions are composed body-to-inertial, so inertial-to-body inputs and outputs are conjugated
+    rng = np.random.default_rng(chunk_seed)
+    num_legs = len(command_template)
+    initial_attitudes = initial_attitude + initial_attitude_spread * rng.standard_normal((num_trials, 3))
+    commands = command_template + command_spread * rng.standard_normal((num_trials, num_legs, 3))
+
+    conjugate = CONJUGATE if rotation_direction == 'inertial_to_body' else 1.
+    initial_quaternions = R.from_euler(seq=euler_sequence, angles=initial_attitudes, degrees=degrees).as_quat()
+    commanded_quaternions = R.from_euler(seq=euler_sequence, angles=commands.reshape(-1, 3),
+                                         degrees=degrees).as_quat().reshape(num_trials, num_legs, 4)
+    maneuver_quaternions, attitude_quaternions = chain_attitude_quaternions(
+        initial_quaternions * conjugate, commanded_quaternions * conjugate, euler_angle_type)
+    maneuver_quaternions, attitude_quaternions = maneuver_quaternions * conjugate, attitude_quaternions * conjugate
+
+    maneuvers = R.from_quat(maneuver_quaternions.reshape(-1, 4)).as_euler(seq=euler_sequence, degrees=degrees)
+    attitudes = np.empty((num_trials, num_legs + 1, 3))
+    attitudes[:, 0] = initial_attitudes
+    attitudes[:, 1:] = R.from_quat(attitude_quaternions.reshape(-1, 4)).as_euler(
+        seq=euler_sequence, degrees=degrees).reshape(num_trials, num_legs, 3)
+    slew_angles = quaternion_angles(maneuver_quaternions)
+    if degrees:
+        slew_angles = np.degrees(slew_angles)
+    return {'initial_attitudes': initial_attitudes, 'commands': commands,
+            'maneuvers': maneuvers.reshape(num_trials, num_legs, 3), 'attitudes': attitudes,
+            'slew_angles': slew_angles}
+
+
+def monte_carlo_sweep(initial_attitude, command_template, num_trials, initial_attitude_spread=0.0, command_spread=0.0,
+                      euler_angle_type='commanded_attitude', euler_sequence='ZYX', degrees=True, seed=None,
+                      num_workers=None, chunk_size=256, executor=None, reference_frame='ENU',
+                      rotation_direction='body_to_inertial'):
+    # Initial attitudes are drawn per axis from N(initial_attitude, initial_attitude_spread) and every command in
+    # command_template is perturbed by N(0, command_spread), all in the unit selected by degrees
+    # Each chunk of chunk_size trials gets its own child seed, so results depend on seed and chunk_size but never on
+    # the number of workers
+    # Angles are in the given reference_frame / rotation_direction convention, which the results record
+    if num_trials < 1:
+        raise ValueError('num_trials must be at least 1')
+    check_convention(reference_frame, rotation_direction)
+    start_time = time.perf_counter()
+    initial_attitude = np.asarray(initial_attitude, dtype=float)
+    initial_attitude_spread = np.asarray(initial_attitude_spread, dtype=float)
+    command_template = np.asarray(command_template, dtype=float).reshape(-1, 3)
+    command_spread = np.asarray(command_spread, dtype=float)
+
+    chunk_trials = [min(chunk_size, num_trials - start) for start in range(0, num_trials, chunk_size)]
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(chunk_trials))
+    chunk_arguments = [(chunk_seed, trials, initial_attitude, initial_attitude_spread, command_template,
+                        command_spread, euler_angle_type, euler_sequence, degrees, rotation_direction)
+                       for chunk_seed, trials in zip(chunk_seeds, chunk_trials)]
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    owns_executor = executor is None and num_workers > 1 and len(chunk_arguments) > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=num_workers)
+    try:
+        if executor is None:
+            chunk_results = [_run_trial_chunk(*arguments) for arguments in chunk_arguments]
+        else:
+            chunk_results = list(executor.map(_run_trial_chunk, *zip(*chunk_arguments)))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    results = {key: np.concatenate([chunk_result[key] for chunk_result in chunk_results]) for key in RESULT_KEYS}
+    elapsed_seconds = time.perf_counter() - start_time
+    results['reference_frame'] = reference_frame
+    results['rotation_direction'] = rotation_direction
+    results['elapsed_seconds'] = elapsed_seconds
+    results['trials_per_second'] = num_trials / elapsed_seconds
+    return results
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from attitude_control_core import ManeuverPlan, compose_quaternions, cumulative_quaternions
+from fast_euler import euler_to_quaternion
+from reference_frames import CONJUGATE, check_convention
+
+# Largest attitude difference (radians) between parallel_plan_maneuvers and the serial plan_maneuvers result
+# Blocks are composed in a different order than the serial scan, so results agree to rounding, not bit for bit
+PARALLEL_SCAN_TOLERANCE = 1e-9
+
+
+def _scan_block(angle_block, euler_sequence, degrees, conjugate=1.):
+    # The only pass that runs in the workers: each builds its block's maneuvers and their local prefix products,
+    # the latter composed body-to-inertial
+    maneuver_quaternions = euler_to_quaternion(euler_sequence, angle_block, degrees).reshape(-1, 4)
+    return maneuver_quaternions, cumulative_quaternions(maneuver_quaternions * conjugate)
+
+
+def parallel_plan_maneuvers(initial_attitude, angle_array, euler_sequence='ZYX', degrees=True, num_workers=None,
+                            block_size=None, executor=None, dtype=np.float64, reference_frame='ENU',
+                            rotation_direction='body_to_inertial'):
+    # Commanded-maneuver chain computed as a blocked prefix scan across worker processes
+    # Pass an existing executor to reuse its workers across calls; num_workers then only sets the default block count
+    # Inputs and the plan are in the given convention, composed body-to-inertial as in chain_attitudes
+    check_convention(reference_frame, rotation_direction)
+    conjugate = CONJUGATE if rotation_direction == 'inertial_to_body' else 1.
+    angle_array = np.asarray(angle_array, dtype=float).reshape(-1, 3)
+    num_legs = len(angle_array)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if block_size is None:
+        block_size = max(1, int(np.ceil(num_legs / num_workers)))
+    block_starts = list(range(0, num_legs, block_size))
+    angle_blocks = [angle_array[start:start + block_size] for start in block_starts]
+
+    initial_quaternion = euler_to_quaternion(euler_sequence, np.asarray(initial_attitude, dtype=float), degrees)
+    owns_executor = executor is None and num_workers > 1 and len(angle_blocks) > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=num_workers)
+    try:
+        if executor is None:
+            scanned_blocks = [_scan_block(block, euler_sequence, degrees, conjugate) for block in angle_blocks]
+        else:
+            scanned_blocks = list(executor.map(_scan_block, angle_blocks, [euler_sequence] * len(angle_blocks),
+                                               [degrees] * len(angle_blocks), [conjugate] * len(angle_blocks)))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    # The carry into each block is one product with the previous block's total, and applying it is a single stacked
+    # compose, so it happens here as the results are written out rather than in another round trip to the workers
+    attitude_quaternions = np.empty((num_legs + 1, 4), dtype=dtype)
+    attitude_quaternions[0] = initial_quaternion
+    maneuver_quaternions = np.empty((num_legs, 4), dtype=dtype)
+    carry = initial_quaternion * conjugate
+    for start, (maneuver_block, local_prefix) in zip(block_starts, scanned_blocks):
+        stop = start + len(maneuver_block)
+        maneuver_quaternions[start:stop] = maneuver_block
+        block_attitudes = compose_quaternions(local_prefix, carry)
+        attitude_quaternions[start + 1:stop + 1] = block_attitudes * conjugate
+        carry = block_attitudes[-1]
+
+    return ManeuverPlan(attitude_quaternions, maneuver_quaternions, euler_angle_type='commanded_maneuver',
+                        euler_sequence=euler_sequence, degrees=degrees,
+                        initial_attitude=np.array(initial_attitude, dtype=float), reference_frame=reference_frame,
+                        rotation_direction=rotation_direction)
@@ -0,0 +1,159 @@
+import numpy as np
+from collections.abc import Mapping
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import ManeuverPlan, euler_sequence_decoder
+from batch_plotting import AXIS_COLORS, AXIS_LABELS, TEXT_POSITIONS, body_axis_segments
+from fast_euler import euler_to_quaternion
+from reference_frames import display_matrices
+
+SCRUB_KEYS = {'right': 1, 'up': 1, 'left': -1, 'down': -1}
+
+
+def _angle_text(title, disp_sequence, angles):
+    return f'{title}:\n{disp_sequence[0]} = {angles[0]:.2f}\n{disp_sequence[1]} = {angles[1]:.2f}\n' \
+           f'{disp_sequence[2]} = {angles[2]:.2f}'
+
+
+class PlanScrubber:
+    # Interactive viewer that steps through the attitudes of a plan with a slider or the arrow, page and home/end keys
+    # All frame geometry is computed up front; stepping only moves the existing quivers and text, and on canvases that
+    # support it the moved artists are blitted over a cached background instead of redrawing the 3D axes
+    # attitudes is a ManeuverPlan, an attitude dictionary from combine_rotations or a (K, 3) Euler array; maneuvers
+    # (dictionary or (K - 1, 3) array) is only needed for the last two; plans carry their own frame convention
+    def __init__(self, attitudes, maneuvers=None, euler_sequence='ZYX', degrees=True, indices=None, figure=None,
+                 reference_frame='ENU', rotation_direction='body_to_inertial'):
+        if isinstance(attitudes, ManeuverPlan):
+            euler_sequence, degrees, indices = attitudes.euler_sequence, attitudes.degrees, attitudes.indices
+            reference_frame, rotation_direction = attitudes.reference_frame, attitudes.rotation_direction
+            frame_matrices = attitudes.attitude_as('matrix')
+            maneuvers = attitudes.maneuver_euler()
+            attitudes = attitudes.attitude_euler()
+        else:
+            if isinstance(maneuvers, Mapping):
+                indices = list(maneuvers) if indices is None else indices
+                maneuvers = list(maneuvers.values())
+            if isinstance(attitudes, Mapping):
+                attitudes = list(attitudes.values())
+            attitudes = np.asarray(attitudes, dtype=float).reshape(-1, 3)
+            frame_matrices = R.from_quat(euler_to_quaternion(euler_sequence, attitudes, degrees)).as_matrix()
+        self.attitude_euler = np.asarray(attitudes, dtype=float).reshape(-1, 3)
+        self.maneuver_euler = np.asarray(maneuvers, dtype=float).reshape(-1, 3)
+        if len(self.attitude_euler) != len(self.maneuver_euler) + 1:
+            raise ValueError(f'{len(self.attitude_euler)} attitudes for {len(self.maneuver_euler)} maneuvers, '
+                             f'expected exactly one more attitude than maneuvers')
+        self.indices = list(range(1, len(self.maneuver_euler) + 1) if indices is None else indices)
+        self.disp_sequence = euler_sequence_decoder(euler_sequence)
+
+        frame_matrices = display_matrices(frame_matrices, reference_frame, rotation_direction)
+        self.frame_segments = body_axis_segments(frame_matrices)
+        self.label_positions = np.swapaxes(frame_matrices, -1, -2)
+        self.leg = 0
+        self._background = None
+        self._build_figure(figure)
+        self.show_leg(0)
+
+    def __len__(self):
+        return len(self.attitude_euler)
+
+    def _build_figure(self, figure):
+        from matplotlib.widgets import Slider
+        if figure is None:
+            import matplotlib.pyplot as plt
+            figure = plt.figure(figsize=(8, 6))
+        self.figure = figure
+        self.canvas = figure.canvas
+        axis = figure.add_axes([0.0, 0.12, 0.7, 0.8], projection='3d')
+        axis.set_xlabel('x')
+        axis.set_ylabel('y')
+        axis.set_zlabel('z')
+        axis.set_xlim(-1, 1)
+        axis.set_ylim(-1, 1)
+        axis.set_zlim(-1, 1)
+        axis.xaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.yaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.zaxis.set_ticks(np.arange(-1, 1.5, 1))
+        axis.view_init(azim=110, elev=200)
+        self.axis = axis
+
+        # Moving artists are animated so full redraws leave them out of the cached background
+        self.quivers = [axis.quiver(0, 0, 0, 1, 0, 0, color=color, animated=True) for color in AXIS_COLORS]
+        self.labels = [axis.text(0, 0, 0, label, color=color, animated=True)
+                       for label, color in zip(AXIS_LABELS, AXIS_COLORS)]
+        self.title = axis.text2D(0.5, 1.0, '', transform=axis.transAxes, ha='center', fontsize=12, animated=True)
+        self.annotations = [axis.text2D(x=1.05, y=y_position, s='', transform=axis.transAxes, fontsize=10, ha='left',
+                                        animated=True) for y_position in TEXT_POSITIONS]
+
+        slider_axis = figure.add_axes([0.15, 0.03, 0.6, 0.03])
+        self.slider = Slider(slider_axis, 'Leg', 0, max(len(self) - 1, 1), valinit=0, valstep=1, valfmt='%d')
+        # The slider would otherwise request a full redraw on every change; its axes is blitted with the plan instead
+        self.slider.drawon = False
+        self.slider.on_changed(lambda value: self.show_leg(int(value)))
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('key_press_event', self._on_key)
+
+    def _on_draw(self, event):
+        if self.canvas.supports_blit:
+            self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+    def _on_key(self, event):
+        page = max(1, len(self) // 100)
+        steps = dict(SCRUB_KEYS, pageup=page, pagedown=-page)
+        if event.key in steps:
+            self.step(steps[event.key])
+        elif event.key == 'home':
+            self.show_leg(0)
+        elif event.key == 'end':
+            self.show_leg(len(self) - 1)
+
+    def _draw_animated(self):
+        for quiver in self.quivers:
+            quiver.do_3d_projection()
+            self.axis.draw_artist(quiver)
+        for artist in self.labels + self.annotations + [self.title]:
+            self.axis.draw_artist(artist)
+
+    def step(self, count):
+        self.show_leg(self.leg + count)
+
+    def show_leg(self, leg):
+        # Leg 0 is the initial attitude and leg k the attitude after the k-th maneuver
+        leg = int(np.clip(leg, 0, len(self) - 1))
+        self.leg = leg
+        for axis_number in range(3):
+            self.quivers[axis_number].set_segments(self.frame_segments[leg, axis_number])
+            self.labels[axis_number].set_position_3d(self.label_positions[leg, axis_number])
+        if leg == 0:
+            self.title.set_text('Initial Attitude')
+            text_lines = [_angle_text('Attitude In', self.disp_sequence, self.attitude_euler[0]), '', '']
+        else:
+            self.title.set_text(f'Maneuver {self.indices[leg - 1]} ({leg} of {len(self) - 1})')
+            text_lines = [_angle_text('Attitude In', self.disp_sequence, self.attitude_euler[leg - 1]),
+                          _angle_text('Maneuver', self.disp_sequence, self.maneuver_euler[leg - 1]),
+                          _angle_text('Attitude Out', self.disp_sequence, self.attitude_euler[leg])]
+        for annotation, text in zip(self.annotations, text_lines):
+            annotation.set_text(text)
+        if self.slider.val != leg:
+            self.slider.eventson = False
+            self.slider.set_val(leg)
+            self.slider.eventson = True
+
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self.figure.draw_artist(self.slider.ax)
+        self._draw_animated()
+        self.canvas.blit(self.figure.bbox)
+        self.canvas.flush_events()
+
+    def show(self):
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+def scrub_plan(attitudes, maneuvers=None, euler_sequence='ZYX', degrees=True, **scrubber_options):
+    # Opens the scrubber on a plan or combine_rotations output and blocks until the window is closed
+    scrubber = PlanScrubber(attitudes, maneuvers, euler_sequence, degrees, **scrubber_options)
+    scrubber.show()
+    return scrubber
@@ -0,0 +1,149 @@
+import json
+import os
+import numpy as np
+from attitude_control_core import ManeuverPlan
+from fast_euler import euler_to_quaternion
+
+# File layout: MAGIC, a little-endian uint32 header length, a JSON header padded to HEADER_ALIGNMENT bytes, then one
+# fixed-size record per leg. Record 0 holds the initial attitude with an identity maneuver, so the attitude fields of
+# the records line up with ManeuverPlan.attitude_quaternions and the record count never needs to be stored: it is
+# whatever whole records the file holds, which also makes an interrupted append harmless
+MAGIC = b'MNVPLAN\x00'
+FORMAT_VERSION = 1
+HEADER_ALIGNMENT = 64
+WRITE_BLOCK_LEGS = 65536
+# Header keys added after the first files were written, with the values those files implicitly used
+HEADER_DEFAULTS = {'reference_frame': 'ENU', 'rotation_direction': 'body_to_inertial'}
+
+
+def record_dtype(dtype=np.float64):
+    dtype = np.dtype(dtype).newbyteorder('<')
+    return np.dtype([('index', '<i8'), ('maneuver_quaternion', dtype, (4,)), ('attitude_quaternion', dtype, (4,)),
+                     ('maneuver_euler', dtype, (3,)), ('attitude_euler', dtype, (3,))])
+
+
+def _header_bytes(header):
+    header_json = json.dumps(header).encode()
+    prefix_size = len(MAGIC) + 4
+    padded_size = -(-(prefix_size + len(header_json)) // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+    header_json += b' ' * (padded_size - prefix_size - len(header_json))
+    return MAGIC + np.uint32(len(header_json)).astype('<u4').tobytes() + header_json
+
+
+def read_header(path):
+    # Returns (header, data_offset)
+    with open(path, 'rb') as plan_file:
+        if plan_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a maneuver plan file')
+        header_size = int(np.frombuffer(plan_file.read(4), dtype='<u4')[0])
+        header = json.loads(plan_file.read(header_size))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f'{path} has plan format version {header.get("version")}, expected {FORMAT_VERSION}')
+    return header, len(MAGIC) + 4 + header_size
+
+
+def _write_records(plan_file, plan, dtype, include_initial):
+    records_type = record_dtype(dtype)
+    attitude_euler = plan.attitude_euler()
+    maneuver_euler = plan.maneuver_euler()
+    indices = np.asarray(plan.indices, dtype=np.int64)
+    if include_initial:
+        initial_record = np.zeros(1, dtype=records_type)
+        initial_record['index'] = plan.start_index
+        initial_record['maneuver_quaternion'] = [0, 0, 0, 1]
+        initial_record['attitude_quaternion'] = plan.attitude_quaternions[0]
+        initial_record['attitude_euler'] = attitude_euler[0]
+        plan_file.write(initial_record.tobytes())
+    for start in range(0, len(plan), WRITE_BLOCK_LEGS):
+        stop = min(start + WRITE_BLOCK_LEGS, len(plan))
+        records = np.empty(stop - start, dtype=records_type)
+        records['index'] = indices[start:stop]
+        records['maneuver_quaternion'] = plan.maneuver_quaternions[start:stop]
+        records['attitude_quaternion'] = plan.attitude_quaternions[start + 1:stop + 1]
+        records['maneuver_euler'] = maneuver_euler[start:stop]
+        records['attitude_euler'] = attitude_euler[start + 1:stop + 1]
+        plan_file.write(records.tobytes())
+
+
+def write_plan(path, plan, dtype=None):
+    # Writes a ManeuverPlan, replacing any existing file; dtype defaults to the plan's own precision
+    dtype = np.dtype(dtype or plan.attitude_quaternions.dtype)
+    header = {'version': FORMAT_VERSION, 'euler_sequence': plan.euler_sequence, 'degrees': bool(plan.degrees),
+              'euler_angle_type': plan.euler_angle_type, 'dtype': dtype.name,
+              'reference_frame': plan.reference_frame, 'rotation_direction': plan.rotation_direction}
+    with open(path, 'wb') as plan_file:
+        plan_file.write(_header_bytes(header))
+        _write_records(plan_file, plan, dtype, include_initial=True)
+
+
+def plan_from_dictionaries(maneuver_dictionary, attitude_dictionary, euler_angle_type='commanded_attitude',
+                           euler_sequence='ZYX', degrees=True, reference_frame='ENU',
+                           rotation_direction='body_to_inertial'):
+    # Rebuilds a ManeuverPlan from combine_rotations output, keeping the Euler angles exactly as they were given
+    attitude_euler = np.array(list(attitude_dictionary.values()), dtype=float).reshape(-1, 3)
+    maneuver_euler = np.array(list(maneuver_dictionary.values()), dtype=float).reshape(-1, 3)
+    plan = ManeuverPlan(euler_to_quaternion(euler_sequence, attitude_euler, degrees).reshape(-1, 4),
+                        euler_to_quaternion(euler_sequence, maneuver_euler, degrees).reshape(-1, 4),
+                        indices=list(maneuver_dictionary), start_index=next(iter(attitude_dictionary)),
+                        euler_angle_type=euler_angle_type, euler_sequence=euler_sequence, degrees=degrees,
+                        initial_attitude=attitude_euler[0], reference_frame=reference_frame,
+                        rotation_direction=rotation_direction)
+    plan._attitude_euler = attitude_euler
+    plan._maneuver_euler = maneuver_euler
+    return plan
+
+
+def write_dictionaries(path, maneuver_dictionary, attitude_dictionary, euler_angle_type='commanded_attitude',
+                       euler_sequence='ZYX', degrees=True, dtype=np.float64, reference_frame='ENU',
+                       rotation_direction='body_to_inertial'):
+    # Writer for the (maneuver_dictionary, attitude_dictionary) pair returned by combine_rotations
+    write_plan(path, plan_from_dictionaries(maneuver_dictionary, attitude_dictionary, euler_angle_type,
+                                            euler_sequence, degrees, reference_frame, rotation_direction),
+               dtype=dtype)
+
+
+def _whole_record_count(path, data_offset, records_type):
+    return (os.path.getsize(path) - data_offset) // records_type.itemsize
+
+
+def append_plan(path, plan):
+    # Appends the legs of plan to an existing file; plan must start from the last stored attitude, as consecutive
+    # stream_rotations chunks do, and use the same sequence, unit, mode and frame convention
+    header, data_offset = read_header(path)
+    header = dict(HEADER_DEFAULTS, **header)
+    for key in ('euler_sequence', 'degrees', 'euler_angle_type', 'reference_frame', 'rotation_direction'):
+        if header[key] != getattr(plan, key):
+            raise ValueError(f'plan {key} is {getattr(plan, key)!r} but {path} stores {header[key]!r}')
+    records_type = record_dtype(header['dtype'])
+    num_records = _whole_record_count(path, data_offset, records_type)
+    # The last attitude is copied out and the mapping released before the file is truncated, which Windows refuses
+    # to do while any view of the file is still mapped
+    records = np.memmap(path, dtype=records_type, mode='r', offset=data_offset, shape=(num_records,))
+    last_attitude = np.array(records[-1]['attitude_quaternion'], dtype=float)
+    del records
+    continuity = abs(np.dot(last_attitude, np.asarray(plan.attitude_quaternions[0], dtype=float)))
+    if continuity < 1 - 1e-6:
+        raise ValueError('plan does not start from the last attitude stored in the file')
+    with open(path, 'r+b') as plan_file:
+        # Drop any partial record left by an interrupted append before adding new ones
+        plan_file.truncate(data_offset + num_records * records_type.itemsize)
+        plan_file.seek(0, os.SEEK_END)
+        _write_records(plan_file, plan, records_type['attitude_euler'].base, include_initial=False)
+
+
+def open_plan(path, mode='r'):
+    # Memory-maps a plan file as a ManeuverPlan whose quaternion and Euler arrays are views of the file
+    # Nothing is read until it is used, and slicing the plan selects a window of legs without copying
+    header, data_offset = read_header(path)
+    header = dict(HEADER_DEFAULTS, **header)
+    records_type = record_dtype(header['dtype'])
+    records = np.memmap(path, dtype=records_type, mode=mode, offset=data_offset,
+                        shape=(_whole_record_count(path, data_offset, records_type),))
+    plan = ManeuverPlan(records['attitude_quaternion'], records['maneuver_quaternion'][1:],
+                        indices=records['index'][1:], start_index=int(records['index'][0]),
+                        euler_angle_type=header['euler_angle_type'], euler_sequence=header['euler_sequence'],
+                        degrees=header['degrees'], initial_attitude=records['attitude_euler'][0],
+                        reference_frame=header['reference_frame'], rotation_direction=header['rotation_direction'])
+    plan._attitude_euler = records['attitude_euler']
+    plan._maneuver_euler = records['maneuver_euler'][1:]
+    return plan
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections.abc import Mapping
+import numpy as np
+from fleet import plan_fleet
+
+EULER_ANGLE_TYPES = ('commanded_attitude', 'commanded_maneuver')
+DEFAULT_HOST = '127.0.0.1'
+# Lines carry whole plans, so allow far more than asyncio's 64 KiB default
+STREAM_LIMIT = 64 * 2 ** 20
+
+
+def _parse_job(request):
+    # Normalizes a maneuver or plan request into its batching key, initial attitude, (N, 3) commands and leg indices
+    # Requests with the same key run together through one plan_fleet call
+    euler_angle_type = request.get('euler_angle_type', 'commanded_attitude')
+    if euler_angle_type not in EULER_ANGLE_TYPES:
+        raise ValueError('angle_type must be commanded_attitude or commanded_maneuver')
+    euler_sequence = request.get('euler_sequence', 'ZYX')
+    if not isinstance(euler_sequence, str):
+        raise TypeError(f'euler_sequence must be a string, got {euler_sequence!r}')
+    initial_attitude = np.asarray(request['initial_attitude'], dtype=float).reshape(3)
+    if request['op'] == 'maneuver':
+        commands = np.asarray(request['euler_angles'], dtype=float).reshape(1, 3)
+        indices = None
+    else:
+        commands = request['commands']
+        indices = [int(index) for index in commands] if isinstance(commands, Mapping) else None
+        commands = np.asarray(list(commands.values()) if indices else commands, dtype=float).reshape(-1, 3)
+        indices = list(range(1, len(commands) + 1)) if indices is None else indices
+    key = (euler_angle_type, euler_sequence, bool(request.get('degrees', True)), len(commands))
+    return key, initial_attitude, commands, indices
+
+
+def _open_connection(address):
+    # address is a Unix socket path, a port on localhost or a (host, port) pair
+    if isinstance(address, str):
+        return asyncio.open_unix_connection(address, limit=STREAM_LIMIT)
+    host, port = (DEFAULT_HOST, address) if isinstance(address, int) else address
+    return asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+
+
+class PlanningService:
+    # Long-running planner that speaks newline-delimited JSON over a Unix socket or localhost TCP
+    # Each request line is {"id": ..., "op": "maneuver" | "plan" | "metrics", ...} and is answered by one line with the
+    # same id; a connection may pipeline many requests and responses come back in completion order
+    # Maneuver and plan requests that arrive within max_batch_delay of each other are planned as one micro-batch
+    def __init__(self, max_batch_size=1024, max_batch_delay=0.001):
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.queue = None
+        self.server = None
+        self._batcher = None
+        self._collecting = []
+        self._started = time.perf_counter()
+        self._requests = 0
+        self._batches = 0
+        self._batch_seconds = 0.
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+        self._max_queue_depth = 0
+
+    async def start(self, address):
+        self.queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        if isinstance(address, str):
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=address, limit=STREAM_LIMIT)
+        else:
+            host, port = (DEFAULT_HOST, address) if isinstance(address, int) else address
+            self.server = await asyncio.start_server(self._handle_connection, host, port, limit=STREAM_LIMIT)
+        return self.server
+
+    async def close(self):
+        # Requests still queued or waiting out the batch delay are answered with an error instead of hanging
+        self.server.close()
+        self._batcher.cancel()
+        pending = self._collecting
+        self._collecting = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        for _, result in pending:
+            if not result.done():
+                result.set_exception(ConnectionError('planning service is shutting down'))
+        await self.server.wait_closed()
+
+    def metrics(self):
+        return {'queue_depth': self.queue.qsize(), 'max_queue_depth': self._max_queue_depth,
+                'requests': self._requests, 'batches': self._batches,
+                'mean_batch_size': self._requests / self._batches if self._batches else 0.,
+                'last_batch_size': self._last_batch_size, 'max_batch_size': self._max_batch_size_seen,
+                'batch_seconds': self._batch_seconds, 'uptime_seconds': time.perf_counter() - self._started}
+
+    async def submit(self, request):
+        # Answers one decoded request; latency_seconds runs from arrival to the result being ready
+        start_time = time.perf_counter()
+        response = {'id': request.get('id')}
+        try:
+            if request.get('op') == 'metrics':
+                return dict(response, **self.metrics())
+            if request.get('op') not in ('maneuver', 'plan'):
+                raise ValueError(f'op must be maneuver, plan or metrics, got {request.get("op")!r}')
+            job = _parse_job(request)
+        except (KeyError, TypeError, ValueError) as error:
+            return dict(response, error=f'{type(error).__name__}: {error}')
+        result = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((job, result))
+        self._max_queue_depth = max(self._max_queue_depth, self.queue.qsize())
+        try:
+            response.update(await result)
+        except Exception as error:
+            response['error'] = f'{type(error).__name__}: {error}'
+        response['latency_seconds'] = time.perf_counter() - start_time
+        return response
+
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+
+        async def answer(line):
+            try:
+                response = await self.submit(json.loads(line))
+            except json.JSONDecodeError as error:
+                response = {'id': None, 'error': f'JSONDecodeError: {error}'}
+            # Waiting for the transport to drain holds back a slow reader's responses instead of buffering them all
+            try:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batches(self):
+        while True:
+            batch = self._collecting = [await self.queue.get()]
+            # Give concurrent requests a moment to queue up unless a full batch is already waiting
+            if self.max_batch_delay and self.queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_batch_delay)
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self._collecting = []
+            self._plan_batch(batch)
+
+    def _plan_batch(self, batch):
+        # Runs on the event loop thread: a batch is a handful of vectorized calls, far shorter than a thread hop
+        # A group that fails only fails its own requests; anything escaping here would stop the batcher for good
+        start_time = time.perf_counter()
+        groups = {}
+        for job, result in batch:
+            groups.setdefault(job[0], []).append((job, result))
+        for (euler_angle_type, euler_sequence, degrees, num_legs), members in groups.items():
+            try:
+                planned = plan_fleet(np.array([job[1] for job, _ in members]),
+                                     np.array([job[2] for job, _ in members]).reshape(len(members), num_legs, 3),
+                                     euler_angle_type, euler_sequence, degrees)
+            except Exception as error:
+                for _, result in members:
+                    if not result.done():
+                        result.set_exception(error)
+                continue
+            for vehicle, (job, result) in enumerate(members):
+                if result.done():
+                    continue
+                if job[3] is None:
+                    result.set_result({'maneuver': planned['maneuvers'][vehicle, 0].tolist(),
+                                       'attitude': planned['attitudes'][vehicle, 1].tolist(),
+                                       'batch_size': len(batch)})
+                else:
+                    result.set_result({'indices': job[3], 'maneuvers': planned['maneuvers'][vehicle].tolist(),
+                                       'attitudes': planned['attitudes'][vehicle].tolist(),
+                                       'batch_size': len(batch)})
+        self._requests += len(batch)
+        self._batches += 1
+        self._last_batch_size = len(batch)
+        self._max_batch_size_seen = max(self._max_batch_size_seen, len(batch))
+        self._batch_seconds += time.perf_counter() - start_time
+
+
+async def run_service(address, **service_options):
+    service = PlanningService(**service_options)
+    server = await service.start(address)
+    async with server:
+        await server.serve_forever()
+
+
+class PlanningClient:
+    # Pipelined client for PlanningService: every request gets a fresh id, so many can be in flight on one connection
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, address):
+        reader, writer = await _open_connection(address)
+        return cls(reader, writer)
+
+    async def request(self, payload):
+        request_id = next(self._ids)
+        result = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = result
+        self.writer.write(json.dumps(dict(payload, id=request_id)).encode() + b'\n')
+        await self.writer.drain()
+        return await result
+
+    async def maneuver(self, initial_attitude, euler_angles, **options):
+        return await self.request(dict(options, op='maneuver', initial_attitude=list(initial_attitude),
+                                       euler_angles=list(euler_angles)))
+
+    async def plan(self, initial_attitude, commands, **options):
+        if isinstance(commands, Mapping):
+            commands = {str(index): list(angles) for index, angles in commands.items()}
+        else:
+            commands = np.asarray(commands, dtype=float).tolist()
+        return await self.request(dict(options, op='plan', initial_attitude=list(initial_attitude), commands=commands))
+
+    async def metrics(self):
+        return await self.request({'op': 'metrics'})
+
+    async def _receive(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            result = self._pending.pop(response['id'], None)
+            if result is not None and not result.done():
+                result.set_result(response)
+        for result in self._pending.values():
+            if not result.done():
+                result.set_exception(ConnectionError('planning service closed the connection'))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._receiver.cancel()
+
+
+async def run_load_test(address, num_requests=5000, concurrency=64, connections=4, plan_fraction=0.1, plan_legs=50,
+                        seed=0):
+    # Closed-loop load: concurrency workers each keep one request in flight, spread over a few connections
+    # A plan_fraction share of the requests are plans of plan_legs legs, the rest single maneuvers
+    rng = np.random.default_rng(seed)
+    is_plan = rng.random(num_requests) < plan_fraction
+    initial_attitudes = rng.uniform(-90, 90, (num_requests, 3)).tolist()
+    clients = [await PlanningClient.connect(address) for _ in range(connections)]
+    latencies = np.empty(num_requests)
+    server_latencies = np.empty(num_requests)
+    errors = 0
+    request_numbers = iter(range(num_requests))
+
+    async def worker(client):
+        nonlocal errors
+        for number in request_numbers:
+            start_time = time.perf_counter()
+            if is_plan[number]:
+                response = await client.plan(initial_attitudes[number], rng.uniform(-90, 90, (plan_legs, 3)))
+            else:
+                response = await client.maneuver(initial_attitudes[number], rng.uniform(-90, 90, 3).tolist())
+            latencies[number] = time.perf_counter() - start_time
+            server_latencies[number] = response.get('latency_seconds', np.nan)
+            errors += 'error' in response
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(clients[number % connections]) for number in range(concurrency)))
+    elapsed_seconds = time.perf_counter() - start_time
+    metrics = await clients[0].metrics()
+    for client in clients:
+        await client.close()
+    return {'requests': num_requests, 'errors': errors, 'seconds': elapsed_seconds,
+            'requests_per_second': num_requests / elapsed_seconds,
+            'p50_seconds': float(np.percentile(latencies, 50)), 'p99_seconds': float(np.percentile(latencies, 99)),
+            'server_p50_seconds': float(np.nanpercentile(server_latencies, 50)),
+            'server_p99_seconds': float(np.nanpercentile(server_latencies, 99)),
+            'mean_batch_size': metrics['mean_batch_size'], 'max_batch_size': metrics['max_batch_size'],
+            'max_queue_depth': metrics['max_queue_depth']}
+
+
+def load_test(address, **options):
+    return asyncio.run(run_load_test(address, **options))
+
+
+def _address(arguments):
+    return arguments.socket if arguments.socket else (arguments.host, arguments.port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-batching attitude planning service and its load tester')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'load-test'):
+        command = commands.add_parser(name)
+        command.add_argument('--socket', help='Unix socket path (default: TCP on --host/--port)')
+        command.add_argument('--host', default=DEFAULT_HOST)
+        command.add_argument('--port', type=int, default=8765)
+    commands.choices['serve'].add_argument('--max-batch-size', type=int, default=1024)
+    commands.choices['serve'].add_argument('--max-batch-delay', type=float, default=0.001, help='seconds')
+    load = commands.choices['load-test']
+    load.add_argument('--requests', type=int, default=5000)
+    load.add_argument('--concurrency', type=int, default=64)
+    load.add_argument('--connections', type=int, default=4)
+    load.add_argument('--plan-fraction', type=float, default=0.1)
+    load.add_argument('--plan-legs', type=int, default=50)
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == 'serve':
+        try:
+            asyncio.run(run_service(_address(arguments), max_batch_size=arguments.max_batch_size,
+                                    max_batch_delay=arguments.max_batch_delay))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    summary = load_test(_address(arguments), num_requests=arguments.requests, concurrency=arguments.concurrency,
+                        connections=arguments.connections, plan_fraction=arguments.plan_fraction,
+                        plan_legs=arguments.plan_legs)
+    print(f'{summary["requests"]} requests ({summary["errors"]} errors) in {summary["seconds"]:.2f} s: '
+          f'{summary["requests_per_second"]:.0f} requests/s, p50 {summary["p50_seconds"] * 1e3:.2f} ms, '
+          f'p99 {summary["p99_seconds"] * 1e3:.2f} ms, mean batch {summary["mean_batch_size"]:.1f} '
+          f'(max {summary["max_batch_size"]}), max queue depth {summary["max_queue_depth"]}')
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import itertools
+import numpy as np
+
+# Inertial frames the planner understands, each given by the rotation taking its coordinates to ENU (east, north, up),
+# the frame every plot is drawn in. NED (north, east, down) swaps x and y and flips z, which is a proper rotation:
+# half a turn about the north-east diagonal
+REFERENCE_FRAMES = ('ENU', 'NED')
+# body_to_inertial quaternions map body vectors into the inertial frame (matrix columns are the body axes), which is
+# what the planner composes; inertial_to_body quaternions are their conjugates
+ROTATION_DIRECTIONS = ('body_to_inertial', 'inertial_to_body')
+FRAME_MATRICES = {'ENU': np.eye(3),
+                  'NED': np.array([[0., 1., 0.],
+                                   [1., 0., 0.],
+                                   [0., 0., -1.]])}
+FRAME_QUATERNIONS = {'ENU': np.array([0., 0., 0., 1.]),
+                     'NED': np.array([np.sqrt(0.5), np.sqrt(0.5), 0., 0.])}
+CONJUGATE = np.array([-1., -1., -1., 1.])
+
+
+def _left_product_matrix(quaternion):
+    # L with (L @ q) == quaternion * q for scalar-last quaternions
+    x, y, z, w = quaternion
+    return np.array([[w, -z, y, x],
+                     [z, w, -x, y],
+                     [-y, x, w, z],
+                     [-x, -y, -z, w]])
+
+
+def _right_product_matrix(quaternion):
+    # M with (M @ q) == q * quaternion
+    x, y, z, w = quaternion
+    return np.array([[w, z, -y, x],
+                     [-z, w, x, y],
+                     [y, -x, w, z],
+                     [-x, -y, -z, w]])
+
+
+def _build_transforms():
+    # Every (source frame, source direction, target frame, target direction) pair as one 4 x 4 matrix per kind of
+    # rotation: attitudes are re-expressed as target <- source * attitude, maneuvers (which act in the inertial frame)
+    # are conjugated by the same frame rotation; direction changes fold in as a conjugation on either side
+    transforms = {}
+    for source_frame, source_direction, target_frame, target_direction in itertools.product(
+            REFERENCE_FRAMES, ROTATION_DIRECTIONS, REFERENCE_FRAMES, ROTATION_DIRECTIONS):
+        frame_change = _left_product_matrix(FRAME_QUATERNIONS[target_frame] * CONJUGATE) @ \
+            FRAME_QUATERNIONS[source_frame]
+        source_conjugate = np.diag(CONJUGATE if source_direction == 'inertial_to_body' else np.ones(4))
+        target_conjugate = np.diag(CONJUGATE if target_direction == 'inertial_to_body' else np.ones(4))
+        key = (source_frame, source_direction, target_frame, target_direction)
+        attitude_transform = _left_product_matrix(frame_change)
+        transforms['attitude', *key] = target_conjugate @ attitude_transform @ source_conjugate
+        transforms['maneuver', *key] = target_conjugate @ attitude_transform @ \
+            _right_product_matrix(frame_change * CONJUGATE) @ source_conjugate
+    return transforms
+
+
+QUATERNION_TRANSFORMS = _build_transforms()
+
+
+def check_direction(rotation_direction):
+    if rotation_direction not in ROTATION_DIRECTIONS:
+        raise ValueError(f'rotation_direction must be one of {ROTATION_DIRECTIONS}, got {rotation_direction!r}')
+
+
+def check_convention(reference_frame, rotation_direction):
+    if reference_frame not in REFERENCE_FRAMES:
+        raise ValueError(f'reference_frame must be one of {REFERENCE_FRAMES}, got {reference_frame!r}')
+    check_direction(rotation_direction)
+
+
+def convert_quaternions(quaternions, source_frame='ENU', source_direction='body_to_inertial', target_frame='ENU',
+                        target_direction='body_to_inertial', rotations='attitude'):
+    # Re-expresses a (..., 4) stack of attitude or maneuver quaternions in another convention with a single product
+    check_convention(source_frame, source_direction)
+    check_convention(target_frame, target_direction)
+    if rotations not in ('attitude', 'maneuver'):
+        raise ValueError(f'rotations must be attitude or maneuver, got {rotations!r}')
+    transform = QUATERNION_TRANSFORMS[rotations, source_frame, source_direction, target_frame, target_direction]
+    return np.asarray(quaternions, dtype=float) @ transform.T
+
+
+def display_matrices(attitude_matrices, reference_frame='ENU', rotation_direction='body_to_inertial'):
+    # Turns a (..., 3, 3) stack of attitude matrices in the given convention into body axes (as columns) in ENU plot
+    # coordinates, in one batched product
+    check_convention(reference_frame, rotation_direction)
+    attitude_matrices = np.asarray(attitude_matrices, dtype=float)
+    if rotation_direction == 'inertial_to_body':
+        attitude_matrices = np.swapaxes(attitude_matrices, -1, -2)
+    if reference_frame == 'ENU':
+        return attitude_matrices
+    return FRAME_MATRICES[reference_frame] @ attitude_matrices
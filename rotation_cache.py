@@ -0,0 +1,116 @@
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from scipy.spatial.transform import Rotation as R
+
+
+def _canonical_quaternion(quaternion):
+    # q and -q are the same rotation; key on the sign whose scalar part (or first nonzero vector part) is positive
+    ordered = quaternion[[3, 0, 1, 2]]
+    nonzero = np.flatnonzero(ordered)
+    if len(nonzero) and ordered[nonzero[0]] < 0:
+        return -quaternion
+    return quaternion
+
+
+class RotationCache:
+    # Bounded LRU cache for single Euler <-> Rotation conversions
+    # Keys are the sequence, unit and the values rounded to a multiple of resolution, so inputs that differ by less
+    # than resolution share an entry
+    def __init__(self, maxsize=4096, resolution=1e-9):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def _key(self, kind, values, euler_sequence, degrees):
+        quantized = np.rint(np.asarray(values, dtype=float).ravel() / self.resolution)
+        return kind, euler_sequence, bool(degrees), tuple(quantized.tolist())
+
+    def _lookup(self, key, compute):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = compute()
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def from_euler(self, euler_sequence, angles, degrees=True):
+        # Stacked inputs are already vectorized, so only single 3-vectors go through the cache
+        if np.ndim(angles) != 1:
+            return R.from_euler(seq=euler_sequence, angles=angles, degrees=degrees)
+        return self._lookup(self._key('from_euler', angles, euler_sequence, degrees),
+                            lambda: R.from_euler(seq=euler_sequence, angles=angles, degrees=degrees))
+
+    def as_euler(self, rotation, euler_sequence, degrees=True):
+        if not rotation.single:
+            return rotation.as_euler(seq=euler_sequence, degrees=degrees)
+        key = self._key('as_euler', _canonical_quaternion(rotation.as_quat()), euler_sequence, degrees)
+        euler_angles = self._lookup(key, lambda: rotation.as_euler(seq=euler_sequence, degrees=degrees))
+        # Callers get their own array so they cannot modify the cached entry
+        return euler_angles.copy()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._entries), 'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+# The cache is opt-in: with no active cache every conversion goes straight to scipy
+_active_cache = None
+
+
+def enable_rotation_cache(maxsize=4096, resolution=1e-9):
+    global _active_cache
+    _active_cache = RotationCache(maxsize=maxsize, resolution=resolution)
+    return _active_cache
+
+
+def disable_rotation_cache():
+    global _active_cache
+    _active_cache = None
+
+
+def get_rotation_cache():
+    return _active_cache
+
+
+@contextmanager
+def rotation_cache(maxsize=4096, resolution=1e-9):
+    global _active_cache
+    previous_cache = _active_cache
+    _active_cache = RotationCache(maxsize=maxsize, resolution=resolution)
+    try:
+        yield _active_cache
+    finally:
+        _active_cache = previous_cache
+
+
+def from_euler(euler_sequence, angles, degrees=True):
+    if _active_cache is None:
+        return R.from_euler(seq=euler_sequence, angles=angles, degrees=degrees)
+    return _active_cache.from_euler(euler_sequence, angles, degrees)
+
+
+def as_euler(rotation, euler_sequence, degrees=True):
+    if _active_cache is None:
+        return rotation.as_euler(seq=euler_sequence, degrees=degrees)
+    return _active_cache.as_euler(rotation, euler_sequence, degrees)
@@ -0,0 +1,121 @@
+import time
+import warnings
+import numpy as np
+from collections.abc import Mapping
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import ManeuverPlan
+from attitude_profile import slew_durations
+from fast_euler import GIMBAL_LOCK_TOLERANCE, euler_to_quaternion
+
+# Every intrinsic (body-axis) sequence a three-slew decomposition can use: six Tait-Bryan and six proper Euler
+DECOMPOSITION_SEQUENCES = ('XYZ', 'XZY', 'YXZ', 'YZX', 'ZXY', 'ZYX', 'XYX', 'XZX', 'YXY', 'YZY', 'ZXZ', 'ZYZ')
+DECOMPOSITION_OBJECTIVES = ('angle', 'time')
+DECOMPOSITION_CHUNK_LEGS = 65536
+
+
+def _lock_signs(sequences):
+    # For each Tait-Bryan sequence i-j-k, the sign s with R_j(pi/2) e_k = s e_i; at a lock the last slew then acts about
+    # the first axis with sign s (or -s at -pi/2). Proper sequences lock at b = 0 (sign +1) and b = pi (sign -1)
+    unit_axes = np.eye(3)
+    return np.array([1. if sequence[0] == sequence[2] else
+                     R.from_rotvec(unit_axes['XYZ'.index(sequence[1])] * np.pi / 2).apply(
+                         unit_axes['XYZ'.index(sequence[2])]) @ unit_axes['XYZ'.index(sequence[0])]
+                     for sequence in sequences])
+
+
+def _candidate_angles(rotations, sequences):
+    # (N, S, 4, 3) radians, wrapped to [-pi, pi): for each sequence the principal Euler solution, its twin (first and
+    # last axes half a turn further, middle angle pi - b for Tait-Bryan or -b for proper Euler) and, at gimbal lock,
+    # the two single-slew merges that put all of a +/- c on the first or on the last axis
+    # Away from a lock the merge slots repeat the principal solution
+    angles = np.empty((len(rotations), len(sequences), 4, 3))
+    # Gimbal-locked legs still decompose exactly, scipy just folds the third angle into the first
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        for position, sequence in enumerate(sequences):
+            angles[:, position, 0] = rotations.as_euler(sequence)
+    proper = np.array([sequence[0] == sequence[2] for sequence in sequences])
+    first, middle, last = angles[:, :, 0, 0], angles[:, :, 0, 1], angles[:, :, 0, 2]
+    angles[:, :, 1, 0] = first + np.pi
+    angles[:, :, 1, 1] = np.where(proper, -middle, np.pi - middle)
+    angles[:, :, 1, 2] = last + np.pi
+
+    lock_angles = np.where(proper, np.where(middle < np.pi / 2, 0., np.pi), np.copysign(np.pi / 2, middle))
+    locked = np.abs(middle - lock_angles) < GIMBAL_LOCK_TOLERANCE
+    signs = np.where(proper, np.where(lock_angles == 0, 1., -1.), _lock_signs(sequences) * np.sign(lock_angles))
+    angles[:, :, 2:] = angles[:, :, :1]
+    angles[:, :, 2, 0] = np.where(locked, first + signs * last, first)
+    angles[:, :, 3, 2] = np.where(locked, signs * first + last, last)
+    angles[:, :, 2:, 1] = np.where(locked, lock_angles, middle)[:, :, np.newaxis]
+    angles[:, :, 2, 2] = np.where(locked, 0., last)
+    angles[:, :, 3, 0] = np.where(locked, 0., first)
+    return (angles + np.pi) % (2 * np.pi) - np.pi
+
+
+def decompose_maneuvers(maneuvers, euler_sequence='ZYX', degrees=True, objective='angle', max_rate=None,
+                        max_acceleration=None, sequences=DECOMPOSITION_SEQUENCES,
+                        chunk_legs=DECOMPOSITION_CHUNK_LEGS):
+    # Splits every maneuver into three sequential single-axis slews, choosing the sequence and the sign/wrap solution
+    # with the lowest total slew angle or, with objective='time', the shortest rest-to-rest slew time
+    # maneuvers is a ManeuverPlan, the maneuver dictionary from combine_rotations or an (N, 3) Euler array in
+    # euler_sequence; sequences restricts the axis orders the hardware accepts
+    # max_rate and max_acceleration (the plan's unit per second) are scalars or per-body-axis (x, y, z) triples
+    # Returns 'sequences' (N,), 'angles' (N, 3) in the plan's unit, 'costs' (N,), plus totals and throughput
+    start_time = time.perf_counter()
+    if objective not in DECOMPOSITION_OBJECTIVES:
+        raise ValueError(f'objective must be one of {DECOMPOSITION_OBJECTIVES}, got {objective!r}')
+    if objective == 'time' and (max_rate is None or max_acceleration is None):
+        raise ValueError('max_rate and max_acceleration are needed for the time objective')
+    # Slews turn about body axes, so only intrinsic (uppercase) sequences describe them; lowercase extrinsic ones
+    # would stand for a different axis order and are rejected rather than reinterpreted
+    sequences = tuple(sequences)
+    unknown_sequences = [sequence for sequence in sequences if sequence not in DECOMPOSITION_SEQUENCES]
+    if unknown_sequences:
+        raise ValueError(f'sequences must be intrinsic sequences from {DECOMPOSITION_SEQUENCES}, '
+                         f'got {unknown_sequences}')
+    indices = None
+    if isinstance(maneuvers, ManeuverPlan):
+        degrees, indices = maneuvers.degrees, list(maneuvers.indices)
+        quaternions = np.asarray(maneuvers.maneuver_quaternions, dtype=float)
+    else:
+        if isinstance(maneuvers, Mapping):
+            indices = list(maneuvers)
+            maneuvers = list(maneuvers.values())
+        angle_array = np.asarray(maneuvers, dtype=float).reshape(-1, 3)
+        quaternions = euler_to_quaternion(euler_sequence, angle_array, degrees).reshape(-1, 4)
+    num_legs = len(quaternions)
+    indices = list(range(1, num_legs + 1)) if indices is None else indices
+
+    if objective == 'time':
+        if degrees:
+            max_rate, max_acceleration = np.radians(max_rate), np.radians(max_acceleration)
+        axis_numbers = np.array([['XYZ'.index(axis) for axis in sequence] for sequence in sequences])
+        # (S, 1, 3) limits for the axis each slew of each sequence turns about
+        axis_rates = np.broadcast_to(max_rate, 3)[axis_numbers][:, np.newaxis]
+        axis_accelerations = np.broadcast_to(max_acceleration, 3)[axis_numbers][:, np.newaxis]
+
+    best_sequences = np.empty(num_legs, dtype=np.intp)
+    best_angles = np.empty((num_legs, 3))
+    best_costs = np.empty(num_legs)
+    for start in range(0, num_legs, chunk_legs):
+        stop = min(start + chunk_legs, num_legs)
+        candidates = _candidate_angles(R.from_quat(quaternions[start:stop]), sequences)
+        if objective == 'angle':
+            costs = np.abs(candidates).sum(axis=-1)
+        else:
+            costs = slew_durations(np.abs(candidates), axis_rates, axis_accelerations).sum(axis=-1)
+        flat_costs = costs.reshape(stop - start, -1)
+        best = np.argmin(flat_costs, axis=1)
+        best_sequences[start:stop] = best // 4
+        best_angles[start:stop] = candidates.reshape(stop - start, -1, 3)[np.arange(stop - start), best]
+        best_costs[start:stop] = flat_costs[np.arange(stop - start), best]
+
+    if degrees:
+        best_angles = np.degrees(best_angles)
+        if objective == 'angle':
+            best_costs = np.degrees(best_costs)
+    elapsed_seconds = time.perf_counter() - start_time
+    return {'indices': indices, 'sequences': np.array(sequences)[best_sequences], 'angles': best_angles,
+            'costs': best_costs, 'total_cost': float(best_costs.sum()), 'objective': objective,
+            'elapsed_seconds': elapsed_seconds,
+            'legs_per_second': num_legs / elapsed_seconds if elapsed_seconds > 0 else float('inf')}
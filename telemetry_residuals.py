@@ -0,0 +1,143 @@
+import numpy as np
+from attitude_control_core import compose_quaternions, quaternion_angles, slerp_quaternions
+from attitude_profile import leg_timing, slew_fractions
+from fast_euler import euler_to_quaternion, quaternion_to_euler
+
+REFERENCES = ('commanded', 'profile')
+
+
+class ResidualEngine:
+    # Compares time-tagged attitude telemetry against a plan, one chunk of samples at a time
+    # The timeline has a slot per attitude row: slot 0 is the hold at the initial attitude before the first leg starts,
+    # slot k covers leg k from start_times[k - 1] until the next leg starts
+    # reference='commanded' compares against the commanded attitude of the active leg; reference='profile' against
+    # the rate-limited slew from attitude_profile, which needs max_rate and max_acceleration
+    # Angles, thresholds and residuals are in the plan's unit; each sample is held until the next one when
+    # accumulating time above threshold
+    def __init__(self, plan, start_times=None, reference='commanded', max_rate=None, max_acceleration=None,
+                 threshold=1.0):
+        if reference not in REFERENCES:
+            raise ValueError(f'reference must be one of {REFERENCES}, got {reference!r}')
+        if start_times is None or reference == 'profile':
+            if max_rate is None or max_acceleration is None:
+                raise ValueError('max_rate and max_acceleration are needed for profile references or derived '
+                                 'start times')
+            self.timing = leg_timing(plan, max_rate, max_acceleration)
+        if start_times is None:
+            start_times = self.timing['start_times']
+        start_times = np.asarray(start_times, dtype=float)
+        if len(start_times) != len(plan):
+            raise ValueError(f'{len(start_times)} start times for {len(plan)} legs')
+        if np.any(np.diff(start_times) < 0):
+            raise ValueError('start_times must be sorted')
+
+        self.plan = plan
+        self.start_times = start_times
+        self.reference = reference
+        self.max_rate = max_rate
+        self.max_acceleration = max_acceleration
+        self.threshold = threshold
+        self.attitude_quaternions = np.asarray(plan.attitude_quaternions, dtype=float)
+        self.reset()
+
+    def reset(self):
+        num_slots = len(self.plan) + 1
+        self._samples = np.zeros(num_slots, dtype=np.int64)
+        self._sum_squared_error = np.zeros(num_slots)
+        self._max_error = np.full(num_slots, -np.inf)
+        self._sum_squared_residuals = np.zeros((num_slots, 3))
+        self._max_residuals = np.full((num_slots, 3), -np.inf)
+        self._observed_time = np.zeros(num_slots)
+        self._time_above_threshold = np.zeros(num_slots)
+        self._pending = None
+
+    def active_legs(self, times):
+        # Timeline slot of every sample with one sorted-index lookup
+        return np.searchsorted(self.start_times, times, side='right')
+
+    def reference_quaternions(self, times, legs):
+        if self.reference == 'commanded':
+            return self.attitude_quaternions[legs]
+        slew_legs = np.maximum(legs - 1, 0)
+        fractions = slew_fractions(times - self.start_times[slew_legs], self.timing['slew_angles'][slew_legs],
+                                   self.timing['durations'][slew_legs], self.max_rate, self.max_acceleration)
+        fractions = np.where(legs == 0, 1.0, fractions)
+        return slerp_quaternions(self.attitude_quaternions[np.where(legs == 0, 0, slew_legs)],
+                                 self.attitude_quaternions[legs], fractions[:, np.newaxis])[:, 0]
+
+    def process(self, times, telemetry, telemetry_format='euler'):
+        # times (K,) in seconds, sorted and continuing from the previous chunk; telemetry (K, 3) Euler angles in the
+        # plan's sequence and unit or (K, 4) scalar-last quaternions
+        # Returns the per-sample results and folds them into the running per-leg statistics
+        times = np.asarray(times, dtype=float)
+        if len(times) == 0:
+            return {'time': times, 'leg': np.zeros(0, dtype=np.int64), 'error_angle': np.zeros(0),
+                    'euler_residuals': np.zeros((0, 3))}
+        if np.any(np.diff(times) < 0) or (self._pending is not None and times[0] < self._pending[0]):
+            raise ValueError('telemetry times must be sorted across and within chunks')
+        if telemetry_format == 'euler':
+            measured_euler = np.asarray(telemetry, dtype=float).reshape(-1, 3)
+            measured_quaternions = euler_to_quaternion(self.plan.euler_sequence, measured_euler,
+                                                       self.plan.degrees).reshape(-1, 4)
+        elif telemetry_format == 'quaternion':
+            measured_quaternions = np.asarray(telemetry, dtype=float).reshape(-1, 4)
+            measured_euler = quaternion_to_euler(self.plan.euler_sequence, measured_quaternions, self.plan.degrees)
+        else:
+            raise ValueError(f'telemetry_format must be euler or quaternion, got {telemetry_format!r}')
+
+        legs = self.active_legs(times)
+        reference_quaternions = self.reference_quaternions(times, legs)
+        error_quaternions = compose_quaternions(measured_quaternions, reference_quaternions * [-1, -1, -1, 1])
+        error_angles = quaternion_angles(error_quaternions)
+        if self.plan.degrees:
+            error_angles = np.degrees(error_angles)
+        if self.reference == 'commanded':
+            reference_euler = self.plan.attitude_euler()[legs]
+        else:
+            reference_euler = quaternion_to_euler(self.plan.euler_sequence, reference_quaternions, self.plan.degrees)
+        half_turn = 180. if self.plan.degrees else np.pi
+        residuals = (measured_euler - reference_euler + half_turn) % (2 * half_turn) - half_turn
+
+        num_slots = len(self._samples)
+        self._samples += np.bincount(legs, minlength=num_slots)
+        self._sum_squared_error += np.bincount(legs, weights=error_angles ** 2, minlength=num_slots)
+        np.maximum.at(self._max_error, legs, error_angles)
+        for axis in range(3):
+            self._sum_squared_residuals[:, axis] += np.bincount(legs, weights=residuals[:, axis] ** 2,
+                                                                minlength=num_slots)
+        np.maximum.at(self._max_residuals, legs, np.abs(residuals))
+
+        # Each sample lasts until the next one; the last sample of the chunk waits for the next chunk's first time
+        if self._pending is not None:
+            pending_time, pending_leg, pending_above = self._pending
+            self._add_duration(np.array([pending_leg]), np.array([times[0] - pending_time]), np.array([pending_above]))
+        above = error_angles > self.threshold
+        self._add_duration(legs[:-1], np.diff(times), above[:-1])
+        self._pending = (times[-1], legs[-1], above[-1])
+        return {'time': times, 'leg': legs, 'error_angle': error_angles, 'euler_residuals': residuals}
+
+    def _add_duration(self, legs, durations, above):
+        num_slots = len(self._samples)
+        self._observed_time += np.bincount(legs, weights=durations, minlength=num_slots)
+        self._time_above_threshold += np.bincount(legs, weights=durations * above, minlength=num_slots)
+
+    def summary(self):
+        # Per-slot statistics as arrays aligned with 'index' (the plan's start index, then its leg indices);
+        # slots without samples report NaN
+        with np.errstate(invalid='ignore', divide='ignore'):
+            samples = self._samples.astype(float)
+            return {'index': [self.plan.start_index] + list(self.plan.indices), 'samples': self._samples.copy(),
+                    'max_error': np.where(self._samples > 0, self._max_error, np.nan),
+                    'rms_error': np.sqrt(self._sum_squared_error / samples),
+                    'max_euler_residual': np.where(self._samples[:, np.newaxis] > 0, self._max_residuals, np.nan),
+                    'rms_euler_residual': np.sqrt(self._sum_squared_residuals / samples[:, np.newaxis]),
+                    'observed_time': self._observed_time.copy(),
+                    'time_above_threshold': self._time_above_threshold.copy()}
+
+
+def compute_residuals(plan, telemetry_chunks, telemetry_format='euler', **engine_options):
+    # Runs a whole stream of (times, telemetry) chunks through a ResidualEngine and returns its summary
+    engine = ResidualEngine(plan, **engine_options)
+    for times, telemetry in telemetry_chunks:
+        engine.process(times, telemetry, telemetry_format)
+    return engine.summary()
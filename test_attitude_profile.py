@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import plan_maneuvers
+from attitude_profile import leg_timing, sample_attitude_profile, slew_durations, slew_fractions
+
+
+class TestAttitudeProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10., 0., 0.], [[30, 0, 0], [30, 0, 0], [30, 0, 0.5], [42, 18, 77]])
+
+    def test_slew_durations(self):
+        # 2 deg/s max rate, 1 deg/s^2: ramps cover 4 deg, so 20 deg coasts for 8 s and 1 deg never reaches max rate
+        np.testing.assert_almost_equal(slew_durations([20., 1., 0.], 2., 1.), [12., 2., 0.])
+        np.testing.assert_almost_equal(slew_fractions(np.array([0., 2., 6., 10., 12.]), 20., 12., 2., 1.),
+                                       [0., 0.1, 0.5, 0.9, 1.])
+
+    def test_leg_timing(self):
+        timing = leg_timing(self.plan, max_rate=2., max_acceleration=1.)
+        np.testing.assert_almost_equal(timing['slew_angles'][:3], [20., 0., 0.5])
+        self.assertEqual(timing['durations'][1], 0)
+        np.testing.assert_almost_equal(timing['start_times'][1:], timing['end_times'][:-1])
+
+    def test_profile_hits_plan_attitudes(self):
+        timing = leg_timing(self.plan, max_rate=2., max_acceleration=1.)
+        chunks = list(sample_attitude_profile(self.plan, sample_rate=1000., max_rate=2., max_acceleration=1.,
+                                              chunk_samples=4096))
+        times = np.concatenate([chunk['time'] for chunk in chunks])
+        euler = np.concatenate([chunk['euler'] for chunk in chunks])
+        self.assertEqual(len(times), int(timing['end_times'][-1] * 1000) + 1)
+        self.assertTrue(all(len(chunk['time']) <= 4096 for chunk in chunks))
+        np.testing.assert_almost_equal(euler[0], [10, 0, 0])
+        np.testing.assert_almost_equal(euler[6000], [20, 0, 0], decimal=6)
+        np.testing.assert_almost_equal(euler[12000], [30, 0, 0], decimal=6)
+
+        # Sampled attitudes never jump by more than max_rate / sample_rate between samples
+        quaternions = np.concatenate([chunk['quaternions'] for chunk in chunks])
+        steps = (R.from_quat(quaternions[1:]) * R.from_quat(quaternions[:-1]).inv()).magnitude()
+        self.assertLess(np.degrees(steps).max(), 2. / 1000 + 1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import plan_maneuvers
+from attitude_control_utils import combine_rotations, plot_attitudes
+from batch_plotting import body_axis_segments, render_plan_pages
+
+
+class TestBatchPlotting(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10., 0., 0.], np.random.default_rng(3).uniform(-90, 90, (13, 3)))
+
+    def test_segments_follow_body_axes(self):
+        frame_matrices = R.from_euler('ZYX', [[0, 0, 0], [90, 0, 0]], degrees=True).as_matrix()
+        segments = body_axis_segments(frame_matrices, arrow_length=1.0)
+        self.assertEqual(segments.shape, (2, 3, 3, 2, 3))
+        np.testing.assert_almost_equal(segments[0, :, 0, 1], np.eye(3))
+        np.testing.assert_almost_equal(segments[1, 0, 0, 1], [0, 1, 0])
+        # Arrowhead barbs start at the tip and are HEAD_RATIO of the shaft long
+        np.testing.assert_almost_equal(np.linalg.norm(segments[..., 1:, 1, :] - segments[..., 1:, 0, :], axis=-1), 0.3)
+
+    def test_pages_written(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            report = render_plan_pages(self.plan, output_directory, rows=2, columns=3)
+            self.assertEqual([page['panels'] for page in report['pages']], [6, 6, 2])
+            for page in report['pages']:
+                self.assertTrue(os.path.getsize(page['path']) > 0)
+
+    def test_parallel_pdf_pages_from_dictionaries(self):
+        maneuvers, attitudes = combine_rotations([10., 0., 0.], {1: [30, 0, 0], 2: [100, 0, 0], 3: [60, 0, 0]})
+        with tempfile.TemporaryDirectory() as output_directory:
+            report = plot_attitudes(attitudes, maneuvers, output_directory=output_directory, rows=1, columns=2,
+                                    file_format='pdf', num_workers=2)
+            self.assertEqual(sorted(os.listdir(output_directory)), ['maneuver_page_0001.pdf', 'maneuver_page_0002.pdf'])
+            self.assertEqual([page['page'] for page in report['pages']], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from attitude_control_core import plan_maneuvers
+from batch_runner import MANIFEST_NAME, main, read_command_file, run_batch
+from plan_store import open_plan
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_directory = os.path.join(self.directory.name, 'commands')
+        self.output_directory = os.path.join(self.directory.name, 'results')
+        os.makedirs(self.input_directory)
+        rng = np.random.default_rng(19)
+        self.angles = {}
+        for number in range(4):
+            angles = rng.uniform(-60, 60, (25, 3))
+            self.angles[f'job{number}'] = angles
+            if number % 2:
+                with open(os.path.join(self.input_directory, f'job{number}.json'), 'w') as command_file:
+                    json.dump({'initial_attitude': [10, 0, 0], 'euler_angle_type': 'commanded_maneuver',
+                               'commands': {str(index): list(row) for index, row in enumerate(angles, start=1)}},
+                              command_file)
+            else:
+                rows = np.column_stack([np.arange(26), np.vstack([[10, 0, 0], angles])])
+                np.savetxt(os.path.join(self.input_directory, f'job{number}.csv'), rows, delimiter=',',
+                           header='index,angle_1,angle_2,angle_3', comments='')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reads_csv_and_json(self):
+        csv_job = read_command_file(os.path.join(self.input_directory, 'job0.csv'))
+        np.testing.assert_array_equal(csv_job['initial_attitude'], [10, 0, 0])
+        self.assertEqual(csv_job['indices'], list(range(1, 26)))
+        json_job = read_command_file(os.path.join(self.input_directory, 'job1.json'))
+        self.assertEqual(json_job['euler_angle_type'], 'commanded_maneuver')
+        np.testing.assert_array_equal(json_job['angles'], self.angles['job1'])
+
+    def test_rejects_csv_without_index_column(self):
+        path = os.path.join(self.input_directory, 'no_index.csv')
+        np.savetxt(path, self.angles['job0'][:4], delimiter=',')
+        with self.assertRaisesRegex(ValueError, 'no_index.csv.*got 3'):
+            read_command_file(path)
+
+    def test_runs_and_resumes(self):
+        summary = run_batch([self.input_directory], self.output_directory, ('csv', 'plan'), num_workers=1)
+        self.assertEqual((summary['files'], summary['skipped'], summary['legs']), (4, 0, 100))
+        stored_plan = open_plan(os.path.join(self.output_directory, 'job1.plan'))
+        expected_plan = plan_maneuvers([10, 0, 0], self.angles['job1'], 'commanded_maneuver')
+        np.testing.assert_allclose(stored_plan.attitude_euler(), expected_plan.attitude_euler(), atol=1e-9)
+        table = np.loadtxt(os.path.join(self.output_directory, 'job0.csv'), delimiter=',', skiprows=1)
+        np.testing.assert_allclose(table[:, 7:], self.angles['job0'], atol=1e-6)
+
+        # Finished files are skipped; a changed file or a newly requested output is redone
+        summary = run_batch([self.input_directory], self.output_directory, ('csv',), num_workers=1)
+        self.assertEqual((summary['files'], summary['skipped']), (0, 4))
+        with open(os.path.join(self.input_directory, 'job0.csv'), 'a') as command_file:
+            command_file.write('26,1,2,3\n')
+        summary = run_batch([os.path.join(self.input_directory, '*.csv')], self.output_directory, ('csv',),
+                            num_workers=1)
+        self.assertEqual((summary['files'], summary['skipped'], summary['legs']), (1, 1, 26))
+        summary = run_batch([self.input_directory], self.output_directory, ('jsonl',), num_workers=1)
+        self.assertEqual(summary['files'], 4)
+        with open(os.path.join(self.output_directory, MANIFEST_NAME)) as manifest_file:
+            self.assertEqual(len(manifest_file.readlines()), 9)
+        # The jsonl run adds to what the manifest already holds, so the earlier csv and plan outputs still count
+        summary = run_batch([self.input_directory], self.output_directory, ('csv', 'jsonl', 'plan'), num_workers=1)
+        self.assertEqual((summary['files'], summary['skipped']), (1, 3))
+
+    def test_rejects_output_directory_holding_inputs(self):
+        with open(os.path.join(self.input_directory, 'job0.csv')) as command_file:
+            original = command_file.read()
+        with self.assertRaises(ValueError):
+            run_batch([os.path.join(self.input_directory, '*.csv')], self.input_directory + os.sep, num_workers=1)
+        with open(os.path.join(self.input_directory, 'job0.csv')) as command_file:
+            self.assertEqual(command_file.read(), original)
+
+    def test_process_pool_and_failures(self):
+        with open(os.path.join(self.input_directory, 'broken.json'), 'w') as command_file:
+            command_file.write('{"commands": ')
+        summary = run_batch([self.input_directory], self.output_directory, num_workers=2)
+        self.assertEqual(summary['files'], 4)
+        self.assertEqual([os.path.basename(failure['source']) for failure in summary['failed']], ['broken.json'])
+        # Failed files are not recorded, so they are retried on the next run
+        self.assertEqual(main([self.input_directory, '-o', self.output_directory, '--workers', '1']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
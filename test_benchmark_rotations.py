@@ -0,0 +1,32 @@
+import unittest
+from benchmark_rotations import compare_to_baseline, run_benchmarks
+
+
+class TestBenchmarkRotations(unittest.TestCase):
+
+    def test_small_sweep_cases(self):
+        report = run_benchmarks(max_legs=10, repeat=2, include_import=False, include_plot=False,
+                                euler_sequences=['ZYX'], min_seconds=0.005)
+        self.assertIn('compute_single_rotation/commanded_attitude/ZYX/deg', report['results'])
+        self.assertIn('plan_maneuvers/commanded_maneuver/ZYX/rad/n=10', report['results'])
+        self.assertIn('combine_rotations/commanded_attitude/ZYX/deg/n=1', report['results'])
+        self.assertTrue(all(result['throughput'] > 0 and result['spread'] >= 0 and result['samples'] == 2
+                            for result in report['results'].values()))
+
+    def test_regression_gate(self):
+        baseline = {'results': {'fast': {'throughput': 100.0, 'unit': 'legs/s', 'spread': 0.05},
+                                'slow': {'throughput': 100.0, 'unit': 'legs/s', 'spread': 0.05},
+                                'noisy': {'throughput': 100.0, 'unit': 'legs/s', 'spread': 0.3}}}
+        results = {'fast': {'throughput': 90.0, 'unit': 'legs/s', 'spread': 0.05},
+                   'slow': {'throughput': 70.0, 'unit': 'legs/s', 'spread': 0.05},
+                   'noisy': {'throughput': 70.0, 'unit': 'legs/s', 'spread': 0.05},
+                   'new': {'throughput': 1.0, 'unit': 'legs/s', 'spread': 0.0}}
+        regressions = compare_to_baseline(results, baseline, threshold=0.1)
+        # The same 30% drop fails a steady case but falls inside the noise band of one that varies by 30% run to run
+        self.assertEqual([regression['case'] for regression in regressions], ['slow'])
+        self.assertAlmostEqual(regressions[0]['change'], -0.3)
+        self.assertAlmostEqual(regressions[0]['allowed_drop'], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import warnings
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import combine_rotations, compute_single_rotation
+from fast_euler import FAST_SEQUENCES, compute_single_maneuver, euler_to_quaternion, quaternion_to_euler
+
+
+class TestFastEuler(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(14)
+
+    def test_euler_to_quaternion_matches_scipy(self):
+        for euler_sequence in FAST_SEQUENCES:
+            for degrees, scale in ((True, 180), (False, np.pi)):
+                angles = self.rng.uniform(-scale, scale, (500, 3))
+                expected = R.from_euler(euler_sequence, angles, degrees=degrees).as_quat()
+                np.testing.assert_allclose(euler_to_quaternion(euler_sequence, angles, degrees), expected,
+                                           rtol=0, atol=1e-12)
+                np.testing.assert_allclose(euler_to_quaternion(euler_sequence, angles[0], degrees), expected[0],
+                                           rtol=0, atol=1e-12)
+
+    def test_quaternion_to_euler_matches_scipy(self):
+        quaternions = R.random(500, rng=14).as_quat()
+        for euler_sequence in FAST_SEQUENCES:
+            for degrees in (True, False):
+                expected = R.from_quat(quaternions).as_euler(euler_sequence, degrees=degrees)
+                np.testing.assert_allclose(quaternion_to_euler(euler_sequence, quaternions, degrees), expected,
+                                           rtol=0, atol=1e-12)
+                np.testing.assert_allclose(quaternion_to_euler(euler_sequence, quaternions[0], degrees), expected[0],
+                                           rtol=0, atol=1e-12)
+
+    def test_half_turns_keep_scipy_sign(self):
+        # scipy only wraps angles outside [-pi, pi], so exact half turns keep their sign
+        angles = [[180, 0, 0], [-180, 0, 0], [0, 0, 180], [0, 0, -180], [180, 30, 180], [-180, 30, -180],
+                  [10, 20, 180]]
+        for euler_sequence in FAST_SEQUENCES:
+            for degrees, half_turn in ((True, 180), (False, np.pi)):
+                scaled = np.array(angles) * half_turn / 180
+                quaternions = R.from_euler(euler_sequence, scaled, degrees=degrees).as_quat()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    expected = R.from_quat(quaternions).as_euler(euler_sequence, degrees=degrees)
+                    np.testing.assert_array_equal(quaternion_to_euler(euler_sequence, quaternions, degrees), expected)
+                    for quaternion, expected_angles in zip(quaternions, expected):
+                        np.testing.assert_array_equal(quaternion_to_euler(euler_sequence, quaternion, degrees),
+                                                      expected_angles)
+        maneuvers, attitudes = combine_rotations([0, 0, 0], {1: [180, 0, 0]})
+        np.testing.assert_array_equal(maneuvers[1], [180, 0, 0])
+        np.testing.assert_array_equal(attitudes[1], [180, 0, 0])
+        np.testing.assert_array_equal(compute_single_maneuver([0, 0, 0], [np.pi, 0, 0], degrees=False)[1],
+                                      [np.pi, 0, 0])
+
+    def test_gimbal_lock_falls_back_to_scipy(self):
+        angles = [[30, 90, 0], [10, -90, 0], [40, 20, 5]]
+        quaternions = R.from_euler('ZYX', angles, degrees=True).as_quat()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected = R.from_quat(quaternions).as_euler('ZYX', degrees=True)
+            np.testing.assert_allclose(quaternion_to_euler('ZYX', quaternions), expected, rtol=0, atol=1e-12)
+            np.testing.assert_allclose(quaternion_to_euler('ZYX', quaternions[0]), expected[0], rtol=0, atol=1e-12)
+
+    def test_other_sequences_fall_back_to_scipy(self):
+        angles = self.rng.uniform(-60, 60, (10, 3))
+        quaternions = euler_to_quaternion('xyz', angles)
+        np.testing.assert_allclose(quaternions, R.from_euler('xyz', angles, degrees=True).as_quat(), atol=1e-12)
+        np.testing.assert_allclose(quaternion_to_euler('YXY', quaternions),
+                                   R.from_quat(quaternions).as_euler('YXY', degrees=True), atol=1e-12)
+
+    def test_compute_single_maneuver_matches_compute_single_rotation(self):
+        for euler_sequence in tuple(FAST_SEQUENCES) + ('YZX',):
+            for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+                initial_attitude = self.rng.uniform(-60, 60, 3)
+                euler_angles = self.rng.uniform(-60, 60, 3)
+                rotation, final_attitude = compute_single_rotation(initial_attitude, euler_angles, euler_angle_type,
+                                                                   euler_sequence)
+                maneuver_angles, final_angles = compute_single_maneuver(initial_attitude, euler_angles,
+                                                                        euler_angle_type, euler_sequence)
+                np.testing.assert_allclose(maneuver_angles, rotation.as_euler(euler_sequence, degrees=True),
+                                           rtol=0, atol=1e-12)
+                np.testing.assert_allclose(final_angles, final_attitude.as_euler(euler_sequence, degrees=True),
+                                           rtol=0, atol=1e-12)
+
+    def test_compute_single_maneuver_rejects_unknown_type(self):
+        with self.assertRaises(ValueError):
+            compute_single_maneuver([0, 0, 0], [10, 0, 0], 'commanded_rate')
+
+
+if __name__ == '__main__':
+    unittest.main()
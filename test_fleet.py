@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import plan_maneuvers
+from fleet import plan_fleet
+
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(16)
+        self.initial_attitudes = rng.uniform(-60, 60, (7, 3))
+        self.shared_commands = rng.uniform(-60, 60, (5, 3))
+        self.vehicle_commands = rng.uniform(-60, 60, (7, 5, 3))
+
+    def assert_same_rotations(self, computed, expected, euler_sequence='ZYX'):
+        difference = R.from_euler(euler_sequence, computed.reshape(-1, 3), degrees=True) * \
+            R.from_euler(euler_sequence, expected.reshape(-1, 3), degrees=True).inv()
+        self.assertLess(np.max(difference.magnitude()), 1e-9)
+
+    def test_matches_per_vehicle_plans(self):
+        for euler_sequence in ('ZYX', 'ZXZ', 'YXZ'):
+            for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+                for commands in (self.shared_commands, self.vehicle_commands):
+                    # A tiny chunk budget forces one vehicle per chunk
+                    results = plan_fleet(self.initial_attitudes, commands, euler_angle_type, euler_sequence,
+                                         max_chunk_bytes=1, include_quaternions=True)
+                    self.assertEqual(results['maneuvers'].shape, (7, 5, 3))
+                    self.assertEqual(results['attitudes'].shape, (7, 6, 3))
+                    self.assertEqual(results['attitude_quaternions'].shape, (7, 6, 4))
+                    for vehicle, initial_attitude in enumerate(self.initial_attitudes):
+                        vehicle_commands = commands if commands.ndim == 2 else commands[vehicle]
+                        plan = plan_maneuvers(initial_attitude, vehicle_commands, euler_angle_type, euler_sequence)
+                        self.assert_same_rotations(results['maneuvers'][vehicle], plan.maneuver_euler(),
+                                                   euler_sequence)
+                        self.assert_same_rotations(results['attitudes'][vehicle], plan.attitude_euler(),
+                                                   euler_sequence)
+                        self.assertTrue(np.allclose(np.abs(np.sum(results['attitude_quaternions'][vehicle] *
+                                                                  plan.attitude_quaternions, axis=-1)), 1))
+
+    def test_ned_inertial_to_body(self):
+        for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+            for commands in (self.shared_commands, self.vehicle_commands):
+                results = plan_fleet(self.initial_attitudes, commands, euler_angle_type, max_chunk_bytes=1,
+                                     include_quaternions=True, reference_frame='NED',
+                                     rotation_direction='inertial_to_body')
+                self.assertEqual((results['reference_frame'], results['rotation_direction']),
+                                 ('NED', 'inertial_to_body'))
+                for vehicle, initial_attitude in enumerate(self.initial_attitudes):
+                    vehicle_commands = commands if commands.ndim == 2 else commands[vehicle]
+                    plan = plan_maneuvers(initial_attitude, vehicle_commands, euler_angle_type, reference_frame='NED',
+                                          rotation_direction='inertial_to_body')
+                    self.assert_same_rotations(results['maneuvers'][vehicle], plan.maneuver_euler())
+                    self.assert_same_rotations(results['attitudes'][vehicle], plan.attitude_euler())
+                    self.assertTrue(np.allclose(np.abs(np.sum(results['maneuver_quaternions'][vehicle] *
+                                                              plan.maneuver_quaternions, axis=-1)), 1))
+
+    def test_chunking_does_not_change_results(self):
+        whole = plan_fleet(self.initial_attitudes, self.vehicle_commands, 'commanded_maneuver')
+        chunked = plan_fleet(self.initial_attitudes, self.vehicle_commands, 'commanded_maneuver',
+                             max_chunk_bytes=3 * 5 * 320)
+        np.testing.assert_array_equal(whole['attitudes'], chunked['attitudes'])
+        np.testing.assert_array_equal(whole['maneuvers'], chunked['maneuvers'])
+
+    def test_shape_errors(self):
+        with self.assertRaises(ValueError):
+            plan_fleet(self.initial_attitudes, self.vehicle_commands[:3])
+        with self.assertRaises(ValueError):
+            plan_fleet(self.initial_attitudes, self.shared_commands[:, :2])
+        results = plan_fleet(self.initial_attitudes, np.empty((0, 3)))
+        self.assertEqual(results['maneuvers'].shape, (7, 0, 3))
+        np.testing.assert_array_equal(results['attitudes'][:, 0], self.initial_attitudes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import plan_maneuvers
+import incremental_plan as incremental_plan_module
+from fast_euler import quaternion_to_euler
+from incremental_plan import IncrementalPlan
+
+
+class TestIncrementalPlan(unittest.TestCase):
+
+    def assert_matches_full_plan(self, incremental_plan, angle_dictionary, euler_angle_type, **convention):
+        full_plan = plan_maneuvers([10, 20, 30], np.array(list(angle_dictionary.values())).reshape(-1, 3),
+                                   euler_angle_type, indices=list(angle_dictionary), **convention)
+        plan = incremental_plan.to_plan()
+        self.assertEqual((plan.reference_frame, plan.rotation_direction),
+                         (full_plan.reference_frame, full_plan.rotation_direction))
+        self.assertEqual(list(plan.indices), list(angle_dictionary))
+        for computed, expected in ((plan.attitude_euler(), full_plan.attitude_euler()),
+                                   (plan.maneuver_euler(), full_plan.maneuver_euler())):
+            # Compare as rotations so +/-180 degree wrap-around in the Euler angles does not matter
+            difference = R.from_euler('ZYX', computed, degrees=True) * R.from_euler('ZYX', expected, degrees=True).inv()
+            self.assertLess(np.max(difference.magnitude(), initial=0), 1e-9)
+
+    def test_edits_match_full_recomputation(self):
+        rng = np.random.default_rng(15)
+        for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+            angle_dictionary = {index: rng.uniform(-60, 60, 3) for index in range(1, 41)}
+            incremental_plan = IncrementalPlan([10, 20, 30], angle_dictionary, euler_angle_type)
+            next_index = 100
+            for step in range(60):
+                keys = list(angle_dictionary)
+                operation = step % 3
+                angles = rng.uniform(-60, 60, 3)
+                if operation == 0:
+                    index = keys[rng.integers(len(keys))]
+                    incremental_plan.edit(index, angles)
+                    angle_dictionary[index] = angles
+                elif operation == 1:
+                    position = int(rng.integers(len(keys) + 1))
+                    before = keys[position] if position < len(keys) else None
+                    incremental_plan.insert(next_index, angles, before=before)
+                    keys.insert(position, next_index)
+                    angle_dictionary[next_index] = angles
+                    angle_dictionary = {index: angle_dictionary[index] for index in keys}
+                    next_index += 1
+                else:
+                    index = keys[rng.integers(len(keys))]
+                    incremental_plan.delete(index)
+                    del angle_dictionary[index]
+                # Reading part-way through exercises the partial Euler refresh
+                if step % 7 == 0:
+                    incremental_plan.attitude_euler()
+                self.assert_matches_full_plan(incremental_plan, angle_dictionary, euler_angle_type)
+
+    def test_ned_inertial_to_body_edits(self):
+        rng = np.random.default_rng(25)
+        convention = {'reference_frame': 'NED', 'rotation_direction': 'inertial_to_body'}
+        for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+            angle_dictionary = {index: rng.uniform(-60, 60, 3) for index in range(1, 11)}
+            incremental_plan = IncrementalPlan([10, 20, 30], angle_dictionary, euler_angle_type, **convention)
+            angle_dictionary[4] = rng.uniform(-60, 60, 3)
+            incremental_plan.edit(4, angle_dictionary[4])
+            incremental_plan.insert(20, [5, 10, 15], before=7)
+            angle_dictionary = {index: angle_dictionary.get(index, [5, 10, 15])
+                                for index in [1, 2, 3, 4, 5, 6, 20, 7, 8, 9, 10]}
+            incremental_plan.delete(2)
+            del angle_dictionary[2]
+            self.assert_matches_full_plan(incremental_plan, angle_dictionary, euler_angle_type, **convention)
+
+    def converted_rows(self, incremental_plan):
+        # Rows converted back to Euler by the next attitude_euler() and maneuver_euler() reads
+        with mock.patch.object(incremental_plan_module, 'quaternion_to_euler', wraps=quaternion_to_euler) as convert:
+            incremental_plan.attitude_euler()
+            attitude_rows = sum(len(call.args[1]) for call in convert.call_args_list)
+            incremental_plan.maneuver_euler()
+            maneuver_rows = sum(len(call.args[1]) for call in convert.call_args_list) - attitude_rows
+        return attitude_rows, maneuver_rows
+
+    def test_edit_only_touches_dependent_legs(self):
+        angle_dictionary = {index: [index, 0, 0] for index in range(1, 11)}
+        attitude_plan = IncrementalPlan([0, 0, 0], angle_dictionary, 'commanded_attitude')
+        self.assertEqual(self.converted_rows(attitude_plan), (10, 10))
+        attitude_plan.edit(5, [50, 0, 0])
+        self.assertEqual(self.converted_rows(attitude_plan), (1, 2))
+        self.assertEqual(self.converted_rows(attitude_plan), (0, 0))
+        np.testing.assert_almost_equal(attitude_plan.maneuver_euler()[[3, 4, 5]], [[1, 0, 0], [46, 0, 0], [-44, 0, 0]])
+
+        maneuver_plan = IncrementalPlan([0, 0, 0], angle_dictionary, 'commanded_maneuver')
+        self.converted_rows(maneuver_plan)
+        maneuver_plan.edit(5, [50, 0, 0])
+        self.assertEqual(self.converted_rows(maneuver_plan), (6, 1))
+        np.testing.assert_almost_equal(maneuver_plan.attitude_euler()[[4, 5, 10]], [[10, 0, 0], [60, 0, 0], [100, 0, 0]])
+
+    def test_snapshots_and_errors(self):
+        incremental_plan = IncrementalPlan([0, 0, 0], {1: [10, 0, 0], 2: [20, 0, 0]})
+        maneuvers, attitudes = incremental_plan.dictionaries()
+        incremental_plan.edit(2, [45, 0, 0])
+        np.testing.assert_almost_equal(attitudes[2], [20, 0, 0])
+        np.testing.assert_almost_equal(incremental_plan.dictionaries()[1][2], [45, 0, 0])
+        with self.assertRaises(KeyError):
+            incremental_plan.edit(3, [0, 0, 0])
+        with self.assertRaises(ValueError):
+            incremental_plan.insert(1, [0, 0, 0])
+        with self.assertRaises(ValueError):
+            IncrementalPlan([0, 0, 0], {}, 'commanded_rate')
+
+
+if __name__ == '__main__':
+    unittest.main()
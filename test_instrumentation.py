@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+import numpy as np
+from attitude_control_core import compute_single_rotation, plan_maneuvers
+from instrumentation import disable_profiling, enable_profiling, get_profiler, profiling, stage
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_profiler())
+        with stage('from_euler') as disabled_stage:
+            compute_single_rotation([10, 0, 0], [30, 0, 0])
+        self.assertIsNone(get_profiler())
+        self.assertIs(disabled_stage, stage('compose'))
+
+    def test_stage_report(self):
+        with profiling(track_memory=True) as profiler:
+            for _ in range(5):
+                compute_single_rotation([10, 0, 0], [30, 0, 0])
+            plan = plan_maneuvers([10, 0, 0], np.random.default_rng(0).uniform(-60, 60, (1000, 3)))
+            plan.attitude_euler()
+            plan.attitude_euler()
+        self.assertIsNone(get_profiler())
+
+        report = profiler.report()
+        self.assertEqual(report['from_euler']['calls'], 6)
+        self.assertEqual(report['compose']['calls'], 6)
+        self.assertEqual(report['as_euler']['calls'], 1)
+        self.assertGreater(report['as_euler']['allocated_bytes'], 1000 * 3 * 8)
+        for stage_report in report.values():
+            self.assertLessEqual(stage_report['p50_seconds'], stage_report['p99_seconds'])
+            self.assertLessEqual(stage_report['p99_seconds'], stage_report['max_seconds'])
+
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_path = os.path.join(output_directory, 'profile.json')
+            profiler.to_json(output_path)
+            with open(output_path) as report_file:
+                self.assertEqual(json.load(report_file)['compose']['calls'], 6)
+
+    def test_nested_stages_keep_outer_peak(self):
+        with profiling(track_memory=True) as profiler:
+            with stage('outer'):
+                block = np.ones(10 ** 6)
+                del block
+                with stage('inner'):
+                    small = np.ones(10)
+                del small
+        report = profiler.report()
+        self.assertGreater(report['outer']['allocated_bytes'], 8 * 10 ** 6)
+        self.assertLess(report['inner']['allocated_bytes'], 10 ** 5)
+
+    def test_disable_stops_tracing_it_started(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        enable_profiling(track_memory=True)
+        self.assertTrue(tracemalloc.is_tracing())
+        disable_profiling()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        # Tracing that was already on belongs to someone else and is left running
+        tracemalloc.start()
+        try:
+            enable_profiling(track_memory=True)
+            disable_profiling()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
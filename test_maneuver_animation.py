@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+import numpy as np
+from PIL import Image
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import plan_maneuvers, slerp_quaternions
+from attitude_control_utils import combine_rotations
+from maneuver_animation import FRAME_BYTES, export_maneuver_animation, export_single_maneuver_animation, \
+    maneuver_frame_blocks
+
+
+class TestManeuverAnimation(unittest.TestCase):
+
+    def test_slerp_endpoints_and_midpoint(self):
+        start = R.from_euler('ZYX', [[0, 0, 0], [10, 20, 30]], degrees=True).as_quat()
+        end = R.from_euler('ZYX', [[90, 0, 0], [10, 20, 30]], degrees=True).as_quat()
+        frames = slerp_quaternions(start, -end, [0, 0.5, 1])
+        self.assertEqual(frames.shape, (2, 3, 4))
+        np.testing.assert_almost_equal(R.from_quat(frames[0]).as_euler('ZYX', degrees=True),
+                                       [[0, 0, 0], [45, 0, 0], [90, 0, 0]])
+        # Identical attitudes (here given with opposite quaternion signs) stay put instead of dividing by zero
+        np.testing.assert_almost_equal(R.from_quat(frames[1]).as_euler('ZYX', degrees=True), [[10, 20, 30]] * 3)
+
+    def test_frame_blocks_respect_memory_budget(self):
+        plan = plan_maneuvers([0, 0, 0], np.random.default_rng(5).uniform(-90, 90, (20, 3)))
+        whole = np.concatenate([block for _, block in maneuver_frame_blocks(plan.attitude_quaternions, 10)])
+        blocks = list(maneuver_frame_blocks(plan.attitude_quaternions, 10, max_block_bytes=30 * FRAME_BYTES))
+        self.assertEqual(len(blocks), 7)
+        self.assertTrue(all(len(block) <= 31 for _, block in blocks))
+        np.testing.assert_array_equal(np.concatenate([block for _, block in blocks]), whole)
+        self.assertEqual(len(whole), 20 * 10 + 1)
+
+    def test_gif_export(self):
+        maneuvers, attitudes = combine_rotations([10., 0., 0.], {1: [30, 0, 0], 2: [30, 40, 0]})
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_path = os.path.join(output_directory, 'plan.gif')
+            report = export_maneuver_animation(attitudes, output_path, frames_per_leg=4, dpi=40)
+            self.assertEqual(report['frames'], 9)
+            with Image.open(output_path) as animation:
+                self.assertEqual(animation.n_frames, 9)
+
+            output_path = os.path.join(output_directory, 'single.gif')
+            report = export_single_maneuver_animation([0, 0, 0], [20, 0, 0], output_path, frames_per_leg=3, dpi=40)
+            self.assertEqual(report['frames'], 4)
+            self.assertGreater(report['frames_per_second'], 0)
+
+    def test_plan_labels_use_plan_sequence_and_unit(self):
+        class RecordingWriter:
+            def __init__(self):
+                self.annotations = []
+
+            @contextmanager
+            def saving(self, figure, output_path, dpi):
+                self.figure = figure
+                yield self
+
+            def grab_frame(self):
+                self.annotations.append(self.figure.axes[0].texts[-1].get_text())
+
+        plan = plan_maneuvers([0, 0, 0], [[0.5, 0, 0]], euler_sequence='XYZ', degrees=False)
+        writer = RecordingWriter()
+        export_maneuver_animation(plan, 'unused.gif', frames_per_leg=2, dpi=40, writer=writer)
+        self.assertEqual(writer.annotations[-1], 'Attitude:\nR = 0.5\nP = 0.0\nY = 0.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
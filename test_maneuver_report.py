@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from attitude_control_core import combine_rotations, plan_maneuvers, print_maneuvers
+from maneuver_report import write_maneuver_report, write_plan_report
+
+
+class TestManeuverReport(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10, 20, 30], np.random.default_rng(18).uniform(-60, 60, (50, 3)))
+
+    def test_csv_and_jsonl_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'report.csv')
+            report = write_plan_report(self.plan, csv_path, 'csv', precision=10, block_legs=16)
+            self.assertEqual(report['legs'], 50)
+            table = np.loadtxt(csv_path, delimiter=',', skiprows=1)
+            np.testing.assert_array_equal(table[:, 0], range(1, 51))
+            np.testing.assert_allclose(table[:, 1:4], self.plan.attitude_euler()[:-1], atol=1e-9)
+            np.testing.assert_allclose(table[:, 4:7], self.plan.maneuver_euler(), atol=1e-9)
+            np.testing.assert_allclose(table[:, 7:], self.plan.attitude_euler()[1:], atol=1e-9)
+
+        output = io.StringIO()
+        write_plan_report(self.plan, output, 'jsonl', block_legs=7)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(records), 50)
+        self.assertEqual(records[4]['index'], 5)
+        np.testing.assert_allclose(records[4]['maneuver'], self.plan.maneuver_euler()[4], atol=1e-7)
+
+    def test_text_layout_matches_print_maneuvers(self):
+        # Output of the original print loop, which printed each attitude and maneuver with numpy's repr
+        baseline = ('=====================================\n'
+                    'Starting Attitude: [10, 20, 30]\n'
+                    'Maneuver Required: [ 21.11605468 -22.24218091 -28.45177526]\n'
+                    'Ending Attitude:   [20.  0.  0.]\n'
+                    '=====================================\n'
+                    'Starting Attitude: [20.  0.  0.]\n'
+                    'Maneuver Required: [29.92969102  4.69776366 -1.71394361]\n'
+                    'Ending Attitude:   [50.  5.  0.]\n')
+        maneuvers, attitudes = combine_rotations([10, 20, 30], {1: [20, 0, 0], 2: [50, 5, 0]})
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_maneuvers([10, 20, 30], maneuvers, attitudes)
+        self.assertEqual(output.getvalue(), baseline)
+
+    def test_leaves_inputs_untouched_and_accepts_any_keys(self):
+        maneuvers = {'first': np.array([20., 0., 0.])}
+        attitudes = {'start': np.array([5., 0., 0.]), 'first': np.array([30., 0., 0.])}
+        output = io.StringIO()
+        write_maneuver_report([1, 0, 0], maneuvers, attitudes, output, 'jsonl')
+        self.assertEqual(json.loads(output.getvalue())['index'], 'first')
+        self.assertEqual(json.loads(output.getvalue())['start'], [1, 0, 0])
+        np.testing.assert_equal(attitudes['start'], [5., 0., 0.])
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            write_plan_report(self.plan, io.StringIO(), 'xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
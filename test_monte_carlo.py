@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from attitude_control_core import plan_maneuvers
+from monte_carlo import RESULT_KEYS, monte_carlo_sweep
+
+
+class TestMonteCarloSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.sweep_options = dict(initial_attitude=[10., 0., 0.],
+                                  command_template=[[30, 0, 0], [100, 0, 0], [60, 0, 0], [42, 18, 77]],
+                                  num_trials=50, initial_attitude_spread=[5, 2, 2], command_spread=1.0, seed=7,
+                                  chunk_size=16)
+
+    def test_results_independent_of_worker_count(self):
+        serial_results = monte_carlo_sweep(num_workers=1, **self.sweep_options)
+        parallel_results = monte_carlo_sweep(num_workers=2, **self.sweep_options)
+        self.assertEqual(serial_results['maneuvers'].shape, (50, 4, 3))
+        self.assertEqual(serial_results['attitudes'].shape, (50, 5, 3))
+        self.assertEqual(serial_results['slew_angles'].shape, (50, 4))
+        self.assertGreater(serial_results['trials_per_second'], 0)
+        for key in RESULT_KEYS:
+            np.testing.assert_array_equal(serial_results[key], parallel_results[key])
+
+    def test_trials_match_single_plans(self):
+        for euler_angle_type in ['commanded_attitude', 'commanded_maneuver']:
+            results = monte_carlo_sweep(num_workers=1, euler_angle_type=euler_angle_type, **self.sweep_options)
+            for trial in [0, 17, 49]:
+                plan = plan_maneuvers(results['initial_attitudes'][trial], results['commands'][trial],
+                                      euler_angle_type=euler_angle_type)
+                np.testing.assert_almost_equal(results['maneuvers'][trial], plan.maneuver_euler(), decimal=9)
+                np.testing.assert_almost_equal(results['attitudes'][trial], plan.attitude_euler(), decimal=9)
+
+    def test_ned_inertial_to_body_trials(self):
+        for euler_angle_type in ['commanded_attitude', 'commanded_maneuver']:
+            results = monte_carlo_sweep(num_workers=1, euler_angle_type=euler_angle_type, reference_frame='NED',
+                                        rotation_direction='inertial_to_body', **self.sweep_options)
+            self.assertEqual((results['reference_frame'], results['rotation_direction']), ('NED', 'inertial_to_body'))
+            for trial in [0, 49]:
+                plan = plan_maneuvers(results['initial_attitudes'][trial], results['commands'][trial],
+                                      euler_angle_type=euler_angle_type, reference_frame='NED',
+                                      rotation_direction='inertial_to_body')
+                np.testing.assert_almost_equal(results['maneuvers'][trial], plan.maneuver_euler(), decimal=9)
+                np.testing.assert_almost_equal(results['attitudes'][trial], plan.attitude_euler(), decimal=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from attitude_control_core import plan_maneuvers
+from parallel_scan import PARALLEL_SCAN_TOLERANCE, parallel_plan_maneuvers
+
+
+class TestParallelScan(unittest.TestCase):
+
+    def setUp(self):
+        self.initial_attitude = np.array([10., 0., 0.])
+        self.angle_array = np.random.default_rng(0).uniform(-30, 30, (10001, 3))
+
+    def assert_plans_agree(self, plan, serial_plan):
+        attitude_error = plan.attitude_rotations * serial_plan.attitude_rotations.inv()
+        self.assertLess(attitude_error.magnitude().max(), PARALLEL_SCAN_TOLERANCE)
+        np.testing.assert_almost_equal(plan.maneuver_euler(), serial_plan.maneuver_euler(), decimal=10)
+
+    def test_matches_serial_plan(self):
+        serial_plan = plan_maneuvers(self.initial_attitude, self.angle_array, euler_angle_type='commanded_maneuver')
+        for num_workers, block_size in [(1, 1000), (2, None), (3, 777)]:
+            plan = parallel_plan_maneuvers(self.initial_attitude, self.angle_array, num_workers=num_workers,
+                                           block_size=block_size)
+            self.assertEqual(len(plan), len(self.angle_array))
+            self.assert_plans_agree(plan, serial_plan)
+
+    def test_ned_inertial_to_body_plan(self):
+        serial_plan = plan_maneuvers(self.initial_attitude, self.angle_array, euler_angle_type='commanded_maneuver',
+                                     reference_frame='NED', rotation_direction='inertial_to_body')
+        plan = parallel_plan_maneuvers(self.initial_attitude, self.angle_array, num_workers=1, block_size=777,
+                                       reference_frame='NED', rotation_direction='inertial_to_body')
+        self.assertEqual((plan.reference_frame, plan.rotation_direction), ('NED', 'inertial_to_body'))
+        self.assert_plans_agree(plan, serial_plan)
+
+    def test_empty_plan(self):
+        plan = parallel_plan_maneuvers(self.initial_attitude, np.empty((0, 3)), num_workers=2)
+        self.assertEqual(len(plan), 0)
+        np.testing.assert_almost_equal(plan.attitude_euler(), [self.initial_attitude])
+
+
+if __name__ == '__main__':
+    unittest.main()
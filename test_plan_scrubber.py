@@ -0,0 +1,57 @@
+import types
+import unittest
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import combine_rotations, plan_maneuvers
+from plan_scrubber import PlanScrubber
+
+
+def agg_figure():
+    figure = Figure(figsize=(6, 4), dpi=60)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+class TestPlanScrubber(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10, 0, 0], np.random.default_rng(20).uniform(-90, 90, (250, 3)))
+
+    def test_steps_move_artists_to_precomputed_frames(self):
+        scrubber = PlanScrubber(self.plan, figure=agg_figure())
+        scrubber.figure.canvas.draw()
+        self.assertIsNotNone(scrubber._background)
+
+        scrubber.show_leg(42)
+        matrix = R.from_euler('ZYX', self.plan.attitude_euler()[42], degrees=True).as_matrix()
+        np.testing.assert_allclose(scrubber.quivers[1]._segments3d[0][1], matrix[:, 1] * 0.75, atol=1e-9)
+        np.testing.assert_allclose(scrubber.labels[2].get_position_3d(), matrix[:, 2], atol=1e-9)
+        self.assertEqual(scrubber.title.get_text(), 'Maneuver 42 (42 of 250)')
+        self.assertIn('Maneuver:', scrubber.annotations[1].get_text())
+        self.assertEqual(scrubber.slider.val, 42)
+
+    def test_keys_and_slider(self):
+        scrubber = PlanScrubber(self.plan, figure=agg_figure())
+        for key, expected_leg in (('right', 1), ('up', 2), ('pageup', 4), ('left', 3), ('end', 250), ('right', 250),
+                                  ('home', 0), ('down', 0)):
+            scrubber._on_key(types.SimpleNamespace(key=key))
+            self.assertEqual(scrubber.leg, expected_leg)
+        self.assertEqual(scrubber.title.get_text(), 'Initial Attitude')
+        scrubber.slider.set_val(17)
+        self.assertEqual(scrubber.leg, 17)
+
+    def test_accepts_combine_rotations_output(self):
+        maneuvers, attitudes = combine_rotations([10., 0., 0.], {5: [30, 0, 0], 9: [30, 40, 0]})
+        scrubber = PlanScrubber(attitudes, maneuvers, figure=agg_figure())
+        self.assertEqual(len(scrubber), 3)
+        scrubber.show_leg(2)
+        self.assertEqual(scrubber.title.get_text(), 'Maneuver 9 (2 of 2)')
+        self.assertIn('P = 40.00', scrubber.annotations[2].get_text())
+        with self.assertRaises(ValueError):
+            PlanScrubber([[0, 0, 0]], [[1, 0, 0]], figure=agg_figure())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from attitude_control_core import combine_rotations, plan_maneuvers, stream_rotations
+from plan_store import append_plan, open_plan, read_header, write_dictionaries, write_plan
+
+
+class TestPlanStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.plan')
+        self.angle_array = np.random.default_rng(17).uniform(-60, 60, (40, 3))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_and_zero_copy_slices(self):
+        plan = plan_maneuvers([10, 20, 30], self.angle_array, 'commanded_maneuver', 'ZXZ', degrees=True)
+        write_plan(self.path, plan)
+        header, _ = read_header(self.path)
+        self.assertEqual(header['euler_sequence'], 'ZXZ')
+        self.assertEqual(header['euler_angle_type'], 'commanded_maneuver')
+
+        stored_plan = open_plan(self.path)
+        self.assertEqual(len(stored_plan), 40)
+        np.testing.assert_array_equal(stored_plan.attitude_quaternions, plan.attitude_quaternions)
+        np.testing.assert_array_equal(stored_plan.attitude_euler(), plan.attitude_euler())
+        np.testing.assert_array_equal(stored_plan.maneuver_euler(), plan.maneuver_euler())
+        self.assertEqual(list(stored_plan.indices), list(range(1, 41)))
+
+        window = stored_plan[10:20]
+        self.assertTrue(np.shares_memory(window.attitude_quaternions, stored_plan.attitude_quaternions))
+        self.assertTrue(np.shares_memory(window.maneuver_euler(), stored_plan.maneuver_euler()))
+        np.testing.assert_array_equal(window.attitude_euler(), plan.attitude_euler()[10:21])
+        self.assertEqual(window.start_index, 10)
+
+    def test_append_stream_chunks(self):
+        chunks = list(stream_rotations([10, 20, 30], [self.angle_array], 'commanded_maneuver', chunk_size=16))
+        write_plan(self.path, chunks[0])
+        for chunk in chunks[1:]:
+            append_plan(self.path, chunk)
+        # A partial record from an interrupted append is ignored and then overwritten by the next append
+        with open(self.path, 'ab') as plan_file:
+            plan_file.write(b'\x00' * 7)
+        self.assertEqual(len(open_plan(self.path)), 40)
+        append_plan(self.path, plan_maneuvers(open_plan(self.path).attitude_euler()[-1], [[5, 0, 0]],
+                                              'commanded_maneuver', indices=[41]))
+
+        stored_plan = open_plan(self.path)
+        full_plan = plan_maneuvers([10, 20, 30], np.vstack([self.angle_array, [[5, 0, 0]]]), 'commanded_maneuver')
+        self.assertEqual(list(stored_plan.indices), list(range(1, 42)))
+        np.testing.assert_allclose(stored_plan.attitude_euler(), full_plan.attitude_euler(), atol=1e-9)
+
+    def test_append_rejects_mismatched_plans(self):
+        write_plan(self.path, plan_maneuvers([0, 0, 0], self.angle_array))
+        with self.assertRaises(ValueError):
+            append_plan(self.path, plan_maneuvers(self.angle_array[-1], [[5, 0, 0]], euler_sequence='XYZ'))
+        with self.assertRaises(ValueError):
+            append_plan(self.path, plan_maneuvers([1, 2, 3], [[5, 0, 0]]))
+
+    def test_write_dictionaries_float32(self):
+        angle_dictionary = {index * 10: angles for index, angles in enumerate(self.angle_array, start=1)}
+        maneuvers, attitudes = combine_rotations([10, 20, 30], angle_dictionary)
+        write_dictionaries(self.path, maneuvers, attitudes, dtype=np.float32)
+        self.assertEqual(os.path.getsize(self.path) % 64, 0)
+        stored_plan = open_plan(self.path)
+        self.assertEqual(stored_plan.attitude_quaternions.dtype, np.float32)
+        self.assertEqual(list(stored_plan.maneuver_dictionary), list(maneuvers))
+        np.testing.assert_allclose(stored_plan.maneuver_dictionary[200], maneuvers[200], atol=1e-4)
+        np.testing.assert_allclose(stored_plan.attitude_dictionary[0], [10, 20, 30], atol=1e-5)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as plan_file:
+            plan_file.write(b'not a plan')
+        with self.assertRaises(ValueError):
+            open_plan(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
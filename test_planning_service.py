@@ -0,0 +1,92 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+from attitude_control_core import combine_rotations, compute_single_rotation
+from planning_service import PlanningClient, PlanningService, run_load_test
+
+
+class TestPlanningService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.directory.name, 'planner.sock')
+        self.service = PlanningService(max_batch_delay=0.005)
+        await self.service.start(self.address)
+        self.client = await PlanningClient.connect(self.address)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.service.close()
+        self.directory.cleanup()
+
+    async def test_concurrent_maneuvers_are_batched(self):
+        rng = np.random.default_rng(23)
+        initial_attitudes = rng.uniform(-90, 90, (40, 3))
+        commands = rng.uniform(-90, 90, (40, 3))
+        responses = await asyncio.gather(*(self.client.maneuver(initial, command, euler_angle_type='commanded_maneuver')
+                                           for initial, command in zip(initial_attitudes, commands)))
+        for initial, command, response in zip(initial_attitudes, commands, responses):
+            maneuver, attitude = compute_single_rotation(initial, command, 'commanded_maneuver')
+            np.testing.assert_allclose(response['maneuver'], maneuver.as_euler('ZYX', degrees=True), atol=1e-9)
+            np.testing.assert_allclose(response['attitude'], attitude.as_euler('ZYX', degrees=True), atol=1e-9)
+            self.assertGreater(response['latency_seconds'], 0)
+        self.assertGreater(max(response['batch_size'] for response in responses), 1)
+        metrics = await self.client.metrics()
+        self.assertEqual(metrics['requests'], 40)
+        self.assertLess(metrics['batches'], 40)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    async def test_plans_and_errors(self):
+        commands = {3: [30, 0, 0], 7: [30, 40, 0], 8: [42, 18, 77]}
+        plan, other_plan, bad_type, bad_shape = await asyncio.gather(
+            self.client.plan([10, 0, 0], commands),
+            self.client.plan([10, 0, 0], list(commands.values()), degrees=False),
+            self.client.maneuver([0, 0, 0], [1, 2, 3], euler_angle_type='commanded_nothing'),
+            self.client.request({'op': 'plan', 'initial_attitude': [0, 0], 'commands': [[1, 2, 3]]}))
+        maneuvers, attitudes = combine_rotations([10., 0., 0.], commands)
+        self.assertEqual(plan['indices'], [3, 7, 8])
+        np.testing.assert_allclose(plan['maneuvers'], list(maneuvers.values()), atol=1e-9)
+        np.testing.assert_allclose(plan['attitudes'], list(attitudes.values()), atol=1e-9)
+        self.assertEqual(len(other_plan['attitudes']), 4)
+        self.assertIn('angle_type', bad_type['error'])
+        self.assertIn('ValueError', bad_shape['error'])
+
+    async def test_malformed_requests_do_not_stop_the_batcher(self):
+        bad_sequence, list_sequence, unknown_sequence = await asyncio.wait_for(asyncio.gather(
+            self.client.maneuver([0, 0, 0], [1, 2, 3], euler_sequence=5),
+            self.client.maneuver([0, 0, 0], [1, 2, 3], euler_sequence=['Z', 'Y', 'X']),
+            self.client.maneuver([0, 0, 0], [1, 2, 3], euler_sequence='ZYQ')), timeout=5)
+        self.assertIn('TypeError', bad_sequence['error'])
+        self.assertIn('TypeError', list_sequence['error'])
+        self.assertIn('error', unknown_sequence)
+        response = await asyncio.wait_for(self.client.maneuver([10, 0, 0], [20, 0, 0]), timeout=5)
+        np.testing.assert_allclose(response['attitude'], [20, 0, 0], atol=1e-9)
+
+    async def test_close_answers_pending_requests(self):
+        # A long batch delay holds the first request in the batcher while the second waits in the queue
+        address = os.path.join(self.directory.name, 'slow.sock')
+        service = PlanningService(max_batch_size=4, max_batch_delay=60)
+        await service.start(address)
+        client = await PlanningClient.connect(address)
+        requests = [asyncio.ensure_future(client.maneuver([0, 0, 0], [10, 0, 0])) for _ in range(2)]
+        while service.queue.qsize() < 1:
+            await asyncio.sleep(0.001)
+        closing = asyncio.ensure_future(service.close())
+        responses = await asyncio.wait_for(asyncio.gather(*requests), timeout=5)
+        await client.close()
+        await asyncio.wait_for(closing, timeout=5)
+        for response in responses:
+            self.assertIn('ConnectionError', response['error'])
+
+    async def test_load_test_reports_latency_percentiles(self):
+        summary = await run_load_test(self.address, num_requests=300, concurrency=16, connections=2, plan_legs=10)
+        self.assertEqual((summary['requests'], summary['errors']), (300, 0))
+        self.assertLessEqual(summary['p50_seconds'], summary['p99_seconds'])
+        self.assertGreater(summary['requests_per_second'], 0)
+        self.assertGreater(summary['mean_batch_size'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
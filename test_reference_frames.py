@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import combine_rotations, compute_single_rotation, plan_maneuvers
+from plan_scrubber import PlanScrubber
+from plan_store import open_plan, write_plan
+from reference_frames import FRAME_MATRICES, convert_quaternions, display_matrices
+
+
+class TestReferenceFrames(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(25)
+        self.initial_attitude = np.array([30., 20., 10.])
+        self.commands = rng.uniform(-90, 90, (12, 3))
+        self.attitudes = R.random(6, random_state=25)
+        self.maneuvers = R.random(6, random_state=26)
+
+    def test_convert_quaternions_matches_matrix_algebra(self):
+        ned = FRAME_MATRICES['NED']
+        converted = convert_quaternions(self.attitudes.as_quat(), 'NED', 'body_to_inertial', 'ENU', 'body_to_inertial')
+        np.testing.assert_allclose(R.from_quat(converted).as_matrix(), ned @ self.attitudes.as_matrix(), atol=1e-12)
+        converted = convert_quaternions(self.maneuvers.as_quat(), 'NED', 'body_to_inertial', 'ENU', 'body_to_inertial',
+                                        'maneuver')
+        np.testing.assert_allclose(R.from_quat(converted).as_matrix(), ned @ self.maneuvers.as_matrix() @ ned.T,
+                                   atol=1e-12)
+        converted = convert_quaternions(self.attitudes.as_quat(), 'ENU', 'body_to_inertial', 'NED', 'inertial_to_body')
+        np.testing.assert_allclose(R.from_quat(converted).as_matrix(),
+                                   np.swapaxes(ned.T @ self.attitudes.as_matrix(), -1, -2), atol=1e-12)
+        np.testing.assert_allclose(display_matrices(self.attitudes.as_matrix(), 'NED', 'inertial_to_body'),
+                                   ned @ np.swapaxes(self.attitudes.as_matrix(), -1, -2), atol=1e-12)
+        with self.assertRaises(ValueError):
+            convert_quaternions(self.attitudes.as_quat(), 'ECEF')
+
+    def test_inertial_to_body_composition(self):
+        # Inertial-to-body results are the conjugates of planning the conjugated inputs body-to-inertial
+        for euler_angle_type in ('commanded_attitude', 'commanded_maneuver'):
+            plan = plan_maneuvers(self.initial_attitude, self.commands, euler_angle_type,
+                                  rotation_direction='inertial_to_body')
+            initial = R.from_euler('ZYX', self.initial_attitude, degrees=True)
+            commands = R.from_euler('ZYX', self.commands, degrees=True)
+            if euler_angle_type == 'commanded_maneuver':
+                expected = initial * commands[0]
+                np.testing.assert_allclose(plan.attitude_rotations[1].as_matrix(), expected.as_matrix(), atol=1e-12)
+            maneuver, attitude = compute_single_rotation(self.initial_attitude, self.commands[0], euler_angle_type,
+                                                         rotation_direction='inertial_to_body')
+            np.testing.assert_allclose(plan.maneuver_euler()[0], maneuver.as_euler('ZYX', degrees=True), atol=1e-9)
+            np.testing.assert_allclose(plan.attitude_euler()[1], attitude.as_euler('ZYX', degrees=True), atol=1e-9)
+        maneuvers, attitudes = combine_rotations(self.initial_attitude, {1: self.commands[0]},
+                                                 rotation_direction='inertial_to_body')
+        single_leg_plan = plan_maneuvers(self.initial_attitude, self.commands[:1], rotation_direction='inertial_to_body')
+        np.testing.assert_allclose(maneuvers[1], single_leg_plan.maneuver_euler()[0], atol=1e-9)
+        with self.assertRaises(ValueError):
+            plan_maneuvers(self.initial_attitude, self.commands, rotation_direction='sideways')
+
+    def test_plan_in_frame_round_trip_and_storage(self):
+        plan = plan_maneuvers(self.initial_attitude, self.commands, reference_frame='NED')
+        enu_plan = plan.in_frame('ENU', 'inertial_to_body')
+        self.assertEqual((enu_plan.reference_frame, enu_plan.rotation_direction), ('ENU', 'inertial_to_body'))
+        back = enu_plan.in_frame('NED', 'body_to_inertial')
+        np.testing.assert_allclose(back.attitude_euler(), plan.attitude_euler(), atol=1e-9)
+        np.testing.assert_allclose(back.maneuver_euler(), plan.maneuver_euler(), atol=1e-9)
+        self.assertEqual(plan[2:5].reference_frame, 'NED')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ned.plan')
+            write_plan(path, enu_plan)
+            stored = open_plan(path)
+            self.assertEqual((stored.reference_frame, stored.rotation_direction), ('ENU', 'inertial_to_body'))
+            np.testing.assert_allclose(stored.attitude_euler(), enu_plan.attitude_euler(), atol=1e-9)
+
+    def test_ned_plan_is_drawn_in_enu(self):
+        # A level NED attitude points the body x axis north and z down, which are +y and -z in the plot
+        plan = plan_maneuvers([0, 0, 0], [[90, 0, 0]], reference_frame='NED')
+        figure = Figure(figsize=(6, 4), dpi=60)
+        FigureCanvasAgg(figure)
+        scrubber = PlanScrubber(plan, figure=figure)
+        np.testing.assert_allclose(scrubber.label_positions[0], [[0, 1, 0], [1, 0, 0], [0, 0, -1]], atol=1e-12)
+        # After a 90 degree yaw about down the nose points east
+        np.testing.assert_allclose(scrubber.label_positions[1, 0], [1, 0, 0], atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import compute_single_rotation
+from fast_euler import compute_single_maneuver, quaternion_to_euler
+from rotation_cache import RotationCache, get_rotation_cache, rotation_cache
+
+
+class TestRotationCache(unittest.TestCase):
+
+    def test_hits_misses_and_evictions(self):
+        cache = RotationCache(maxsize=2)
+        cache.from_euler('ZYX', [0, 0, 0])
+        cache.from_euler('ZYX', [0, 0, 0])
+        cache.from_euler('ZYX', [20, 0, 0])
+        cache.from_euler('ZYX', [20, 15, 0])
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 3)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+        # The same angles in radians or another sequence are separate entries
+        cache.from_euler('ZYX', [20, 15, 0], degrees=False)
+        cache.from_euler('XYZ', [20, 15, 0])
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_as_euler_returns_private_copies(self):
+        cache = RotationCache()
+        rotation = cache.from_euler('ZYX', [20, 15, 5])
+        euler_angles = cache.as_euler(rotation, 'ZYX')
+        euler_angles[0] = 99
+        np.testing.assert_almost_equal(cache.as_euler(rotation, 'ZYX'), [20, 15, 5])
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_as_euler_shares_entries_between_quaternion_signs(self):
+        cache = RotationCache()
+        quaternion = R.from_euler('ZYX', [20, 15, 5], degrees=True).as_quat()
+        cache.as_euler(R.from_quat(quaternion), 'ZYX')
+        np.testing.assert_almost_equal(cache.as_euler(R.from_quat(-quaternion), 'ZYX'), [20, 15, 5])
+        self.assertEqual((cache.stats()['hits'], cache.stats()['size']), (1, 1))
+
+    def test_scipy_fallback_euler_reads_use_active_cache(self):
+        # ZYZ has no closed-form path, so its single-rotation Euler reads go through scipy and the cache
+        with rotation_cache(maxsize=16) as cache:
+            quaternion = R.from_euler('ZYZ', [20, 15, 5], degrees=True).as_quat()
+            for _ in range(2):
+                np.testing.assert_almost_equal(quaternion_to_euler('ZYZ', quaternion), [20, 15, 5])
+            self.assertEqual(cache.stats()['hits'], 1)
+            for _ in range(2):
+                maneuver, attitude = compute_single_maneuver([10, 0, 0], [30, 5, 0], euler_sequence='ZYZ')
+            self.assertEqual(cache.stats()['hits'], 5)
+        np.testing.assert_almost_equal(attitude, [30, 5, 0])
+
+    def test_compute_single_rotation_uses_active_cache(self):
+        uncached_rotation, uncached_attitude = compute_single_rotation([10, 0, 0], [30, 5, 0])
+        with rotation_cache(maxsize=16) as cache:
+            for _ in range(3):
+                rotation, attitude = compute_single_rotation([10, 0, 0], [30, 5, 0])
+            self.assertEqual(cache.stats()['misses'], 2)
+            self.assertEqual(cache.stats()['hits'], 4)
+        self.assertIsNone(get_rotation_cache())
+        np.testing.assert_almost_equal(rotation.as_quat(), uncached_rotation.as_quat())
+        np.testing.assert_almost_equal(attitude.as_quat(), uncached_attitude.as_quat())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
+import json
+import subprocess
+import sys
 import unittest
 import numpy as np
 from scipy.spatial.transform import Rotation as R
-from attitude_control_utils import compute_single_rotation, combine_rotations, plot_setup, plot_attitudes
+from attitude_control_utils import compute_single_rotation, combine_rotations, combine_rotations_batch, plan_maneuvers, \
+    stream_rotations, print_maneuvers, plot_setup, plot_attitudes
 
 
 class TestRotationFunctions(unittest.TestCase):
@@ -69,6 +73,131 @@ class TestRotationFunctions(unittest.TestCase):
         for index in commanded_attitudes:
             np.testing.assert_almost_equal(commanded_attitudes[index], recovered_attitudes[index], decimal=5)
 
+    def test_batch_matches_dictionary(self):
+        angle_array = np.array(list(self.angle_dict_long.values()), dtype=float)
+        for euler_angle_type in ['commanded_attitude', 'commanded_maneuver']:
+            maneuvers, attitudes = combine_rotations(initial_attitude=self.initial_attitude,
+                                                     angle_dictionary=self.angle_dict_long,
+                                                     euler_angle_type=euler_angle_type,
+                                                     euler_sequence=self.euler_sequence, degrees=True)
+            maneuver_array, attitude_array = combine_rotations_batch(initial_attitude=self.initial_attitude,
+                                                                     angle_array=angle_array,
+                                                                     euler_angle_type=euler_angle_type,
+                                                                     euler_sequence=self.euler_sequence, degrees=True)
+            self.assertEqual(maneuver_array.shape, (4, 3))
+            self.assertEqual(attitude_array.shape, (5, 3))
+            for index in maneuvers:
+                np.testing.assert_almost_equal(maneuvers[index], maneuver_array[index - 1], decimal=10)
+            for index in attitudes:
+                np.testing.assert_almost_equal(attitudes[index], attitude_array[index], decimal=10)
+
+    def test_long_chain_round_trip(self):
+        rng = np.random.default_rng(0)
+        angle_dict = {index: angles for index, angles in enumerate(rng.uniform(-80, 80, (100000, 3)), start=1)}
+        maneuvers, attitudes = combine_rotations(initial_attitude=self.initial_attitude, angle_dictionary=angle_dict,
+                                                 euler_angle_type='commanded_attitude',
+                                                 euler_sequence=self.euler_sequence, degrees=True)
+        recovered_maneuvers, recovered_attitudes = combine_rotations(initial_attitude=self.initial_attitude,
+                                                                     angle_dictionary=maneuvers,
+                                                                     euler_angle_type='commanded_maneuver',
+                                                                     euler_sequence=self.euler_sequence,
+                                                                     degrees=True)
+        self.assertEqual(list(recovered_attitudes.keys()), list(range(100001)))
+        final_error = R.from_euler(self.euler_sequence, attitudes[100000], degrees=True) * \
+            R.from_euler(self.euler_sequence, recovered_attitudes[100000], degrees=True).inv()
+        self.assertLess(final_error.magnitude(), 1e-9)
+
+    def test_maneuver_plan_views(self):
+        angle_array = np.array(list(self.angle_dict_long.values()), dtype=float)
+        plan = plan_maneuvers(initial_attitude=self.initial_attitude, angle_array=angle_array,
+                              euler_angle_type='commanded_attitude', euler_sequence=self.euler_sequence, degrees=True)
+        self.assertEqual(len(plan), 4)
+        self.assertEqual(plan.attitude_quaternions.shape, (5, 4))
+        self.assertEqual(plan.maneuver_quaternions.shape, (4, 4))
+
+        # Slices share memory with the parent plan and keep the original leg numbering
+        window = plan[1:3]
+        self.assertEqual(len(window), 2)
+        self.assertTrue(np.shares_memory(window.attitude_quaternions, plan.attitude_quaternions))
+        self.assertEqual(list(window.attitude_dictionary.keys()), [1, 2, 3])
+        np.testing.assert_almost_equal(window.attitude_euler(), plan.attitude_euler()[1:4], decimal=10)
+
+        # Dictionary access is read-only
+        with self.assertRaises(TypeError):
+            plan.attitude_dictionary[0] = [0, 0, 0]
+
+        # float32 storage halves the footprint and stays within single-precision tolerance
+        compact_plan = plan_maneuvers(initial_attitude=self.initial_attitude, angle_array=angle_array,
+                                      euler_angle_type='commanded_attitude', euler_sequence=self.euler_sequence,
+                                      degrees=True, dtype=np.float32)
+        self.assertEqual(compact_plan.nbytes * 2, plan.nbytes)
+        np.testing.assert_almost_equal(compact_plan.maneuver_euler(), plan.maneuver_euler(), decimal=3)
+
+    def test_maneuver_plan_representations(self):
+        angle_array = np.random.default_rng(21).uniform(-60, 60, (30, 3))
+        plan = plan_maneuvers(self.initial_attitude, angle_array, 'commanded_maneuver')
+        attitudes = R.from_quat(plan.attitude_quaternions)
+        maneuvers = R.from_quat(plan.maneuver_quaternions)
+        np.testing.assert_allclose(plan.attitude_as('matrix'), attitudes.as_matrix(), atol=1e-12)
+        np.testing.assert_allclose(plan.maneuver_as('rotvec'), maneuvers.as_rotvec(degrees=True), atol=1e-10)
+        np.testing.assert_allclose(plan.attitude_as('rotvec', degrees=False), attitudes.as_rotvec(), atol=1e-12)
+        np.testing.assert_allclose(plan.attitude_as('mrp'), attitudes.as_mrp(), atol=1e-12)
+        np.testing.assert_allclose(plan.attitude_as('euler', 'XZY', degrees=False), attitudes.as_euler('XZY'),
+                                   atol=1e-12)
+        self.assertIs(plan.attitude_as('quaternion'), plan.attitude_quaternions)
+        self.assertIs(plan.attitude_as('euler'), plan.attitude_euler())
+
+        # Each representation is converted once and then shared, including with slices of the plan
+        self.assertIs(plan.attitude_as('matrix'), plan.attitude_as('matrix'))
+        window = plan[5:10]
+        self.assertTrue(np.shares_memory(window.attitude_as('matrix'), plan.attitude_as('matrix')))
+        np.testing.assert_array_equal(window.attitude_as('matrix'), plan.attitude_as('matrix')[5:11])
+        np.testing.assert_array_equal(window.maneuver_as('rotvec'), plan.maneuver_as('rotvec')[5:10])
+        with self.assertRaises(ValueError):
+            plan.attitude_as('axis_angle')
+
+    def test_stream_matches_plan(self):
+        angle_array = np.random.default_rng(1).uniform(-60, 60, (25, 3))
+        indexed_commands = [(index, angles) for index, angles in enumerate(angle_array[:10], start=1)]
+        for euler_angle_type in ['commanded_attitude', 'commanded_maneuver']:
+            plan = plan_maneuvers(self.initial_attitude, angle_array, euler_angle_type=euler_angle_type)
+            chunks = list(stream_rotations(self.initial_attitude, iter(indexed_commands + [angle_array[10:18],
+                                                                                           angle_array[18:]]),
+                                           euler_angle_type=euler_angle_type, chunk_size=4))
+            self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2, 8, 7])
+            self.assertEqual(list(chunks[3].attitude_dictionary.keys()), list(range(10, 19)))
+            np.testing.assert_almost_equal(np.concatenate([chunk.maneuver_euler() for chunk in chunks]),
+                                           plan.maneuver_euler(), decimal=10)
+            np.testing.assert_almost_equal(np.concatenate([chunks[0].attitude_euler()[:1]] +
+                                                          [chunk.attitude_euler()[1:] for chunk in chunks]),
+                                           plan.attitude_euler(), decimal=10)
+
+    def test_print_maneuvers_leaves_dictionaries_untouched(self):
+        maneuvers = {1: np.array([20., 0., 0.])}
+        attitudes = {0: np.array([5., 0., 0.]), 1: np.array([30., 0., 0.])}
+        print_maneuvers(self.initial_attitude, maneuvers, attitudes)
+        np.testing.assert_equal(attitudes[0], [5., 0., 0.])
+
+
+class TestImportTime(unittest.TestCase):
+    # Generous wall-clock budget for a cold import; numpy + scipy alone take a few hundred milliseconds
+    import_time_budget = 3.0
+
+    def measure_import(self, module_name):
+        script = (f'import json, sys, time\n'
+                  f'start = time.perf_counter()\n'
+                  f'import {module_name}\n'
+                  f'elapsed = time.perf_counter() - start\n'
+                  f'print(json.dumps({{"seconds": elapsed, "matplotlib": "matplotlib" in sys.modules}}))')
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        return json.loads(output)
+
+    def test_core_import_is_headless(self):
+        for module_name in ['attitude_control_core', 'attitude_control_utils']:
+            result = self.measure_import(module_name)
+            self.assertFalse(result['matplotlib'], f'{module_name} imported matplotlib')
+            self.assertLess(result['seconds'], self.import_time_budget)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+import itertools
+import unittest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from attitude_control_core import combine_rotations, plan_maneuvers
+from attitude_profile import slew_durations
+from slew_decomposition import DECOMPOSITION_SEQUENCES, decompose_maneuvers
+
+
+def brute_force_cost(rotation, objective, max_rate, max_acceleration):
+    # Per-leg search over every sequence and every 2*pi wrap of each principal angle, twin solutions included
+    best = np.inf
+    for sequence in DECOMPOSITION_SEQUENCES:
+        principal = rotation.as_euler(sequence)
+        twin = principal + [np.pi, np.pi, np.pi]
+        twin[1] = (-principal[1]) if sequence[0] == sequence[2] else np.pi - principal[1]
+        for solution, wraps in itertools.product((principal, twin), itertools.product((-1, 0, 1), repeat=3)):
+            angles = np.abs(solution + 2 * np.pi * np.array(wraps))
+            if objective == 'angle':
+                cost = angles.sum()
+            else:
+                axes = ['XYZ'.index(axis) for axis in sequence]
+                cost = slew_durations(angles, max_rate[axes], max_acceleration[axes]).sum()
+            best = min(best, cost)
+    return best
+
+
+class TestSlewDecomposition(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10, 0, 0], np.random.default_rng(24).uniform(-180, 180, (60, 3)))
+        self.max_rate = np.array([2., 2., 0.5])
+        self.max_acceleration = np.array([1., 1., 0.2])
+
+    def reconstruct(self, result):
+        quaternions = np.array([R.from_euler(sequence, angles, degrees=True).as_quat()
+                                for sequence, angles in zip(result['sequences'], result['angles'])])
+        return R.from_quat(quaternions)
+
+    def test_matches_brute_force(self):
+        maneuvers = R.from_quat(self.plan.maneuver_quaternions)
+        for objective in ('angle', 'time'):
+            result = decompose_maneuvers(self.plan, objective=objective, max_rate=self.max_rate,
+                                         max_acceleration=self.max_acceleration)
+            errors = (self.reconstruct(result) * maneuvers.inv()).magnitude()
+            self.assertLess(errors.max(), 1e-9)
+            expected = [brute_force_cost(maneuver, objective, np.radians(self.max_rate),
+                                         np.radians(self.max_acceleration)) for maneuver in maneuvers]
+            if objective == 'angle':
+                expected = np.degrees(expected)
+            np.testing.assert_allclose(result['costs'], expected, rtol=1e-9)
+
+    def test_dictionary_input_and_restricted_sequences(self):
+        maneuvers, _ = combine_rotations([0., 0., 0.], {4: [90, 0, 0], 9: [0, 90, 0], 12: [30, 20, 10]},
+                                         euler_angle_type='commanded_maneuver')
+        result = decompose_maneuvers(maneuvers, sequences=('ZYX', 'XYZ'))
+        self.assertEqual(result['indices'], [4, 9, 12])
+        # Single-axis maneuvers cost exactly their one slew
+        np.testing.assert_allclose(result['costs'][:2], [90., 90.])
+        self.assertTrue(set(result['sequences']) <= {'ZYX', 'XYZ'})
+        self.assertAlmostEqual(result['total_cost'], result['costs'].sum())
+        with self.assertRaises(ValueError):
+            decompose_maneuvers(maneuvers, objective='time')
+        with self.assertRaises(ValueError):
+            decompose_maneuvers(maneuvers, objective='fuel')
+        # Extrinsic x-y-z is a different body-axis order from intrinsic X-Y-Z, so it is not silently upper-cased
+        with self.assertRaises(ValueError):
+            decompose_maneuvers(maneuvers, sequences=('ZYX', 'xyz'))
+
+    def test_gimbal_lock_merges_onto_one_axis(self):
+        # At a 90 degree middle slew only the sum of the outer slews matters, so all of it goes on the cheaper axis
+        locked = np.array([[30., 90., 20.], [-50., -90., 35.]])
+        maneuvers = R.from_euler('ZYX', locked, degrees=True)
+        result = decompose_maneuvers(locked, sequences=('ZYX',))
+        np.testing.assert_allclose(result['costs'], [100., 105.])
+        self.assertLess((self.reconstruct(result) * maneuvers.inv()).magnitude().max(), 1e-6)
+        result = decompose_maneuvers(locked, sequences=('ZYX',), objective='time', max_rate=[5., 1., 0.1],
+                                     max_acceleration=[5., 1., 0.1])
+        np.testing.assert_allclose(result['angles'][:, 0], 0., atol=1e-6)
+        self.assertLess((self.reconstruct(result) * maneuvers.inv()).magnitude().max(), 1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
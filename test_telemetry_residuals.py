@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from attitude_control_core import plan_maneuvers
+from attitude_profile import sample_attitude_profile
+from telemetry_residuals import ResidualEngine, compute_residuals
+
+
+class TestTelemetryResiduals(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = plan_maneuvers([10, 0, 0], np.random.default_rng(22).uniform(-60, 60, (20, 3)))
+        self.chunks = list(sample_attitude_profile(self.plan, 20, max_rate=5, max_acceleration=2, chunk_samples=500))
+
+    def test_profile_telemetry_has_no_residuals(self):
+        summary = compute_residuals(self.plan, ((chunk['time'], chunk['quaternions']) for chunk in self.chunks),
+                                    telemetry_format='quaternion', reference='profile', max_rate=5,
+                                    max_acceleration=2)
+        self.assertEqual(summary['samples'].sum(), sum(len(chunk['time']) for chunk in self.chunks))
+        self.assertLess(np.nanmax(summary['max_error']), 1e-6)
+        self.assertLess(np.nanmax(summary['max_euler_residual']), 1e-6)
+        np.testing.assert_array_equal(summary['time_above_threshold'], 0)
+        self.assertEqual(summary['index'], list(range(21)))
+
+    def test_injected_error_and_leg_lookup(self):
+        # A constant 2 degree yaw offset shows up on every sample of every leg and on the first Euler axis only
+        engine = ResidualEngine(self.plan, reference='profile', max_rate=5, max_acceleration=2, threshold=1.0)
+        for chunk in self.chunks:
+            result = engine.process(chunk['time'], chunk['euler'] + [2., 0., 0.])
+            np.testing.assert_array_equal(result['leg'], chunk['leg'])
+        summary = engine.summary()
+        sampled = summary['samples'] > 0
+        np.testing.assert_allclose(summary['rms_euler_residual'][sampled, 0], 2., atol=1e-9)
+        np.testing.assert_allclose(summary['rms_euler_residual'][sampled, 1:], 0., atol=1e-9)
+        self.assertGreater(np.nanmin(summary['max_error']), 1.)
+        # Held samples cover the whole telemetry span, all of it above the 1 degree threshold
+        np.testing.assert_allclose(summary['time_above_threshold'], summary['observed_time'])
+        self.assertAlmostEqual(summary['observed_time'].sum(), self.chunks[-1]['time'][-1] - self.chunks[0]['time'][0])
+
+    def test_commanded_reference_with_start_times(self):
+        # Against the step command, a sample after the slew has settled matches and one at the leg start does not
+        start_times = np.arange(1, 21) * 100.
+        engine = ResidualEngine(self.plan, start_times=start_times, threshold=0.5)
+        attitudes = self.plan.attitude_euler()
+        result = engine.process([50., 150., 199.], [attitudes[0], attitudes[0], attitudes[1]])
+        np.testing.assert_array_equal(result['leg'], [0, 1, 1])
+        self.assertAlmostEqual(result['error_angle'][0], 0.)
+        self.assertGreater(result['error_angle'][1], 0.5)
+        self.assertAlmostEqual(result['error_angle'][2], 0.)
+        summary = engine.summary()
+        self.assertAlmostEqual(summary['time_above_threshold'][1], 49.)
+        self.assertTrue(np.isnan(summary['rms_error'][2]))
+        with self.assertRaises(ValueError):
+            engine.process([100.], [attitudes[1]])
+        with self.assertRaises(ValueError):
+            ResidualEngine(self.plan, reference='profile')
+
+
+if __name__ == '__main__':
+    unittest.main()